@@ -0,0 +1,151 @@
+"""
+Benchmark the HTML parsing backends (services/helpers/html_parse.py) on saved pages.
+
+Usage (from backend/):
+    python -m benchmarks.html_parsers               # every page in benchmarks/fixtures/
+    python -m benchmarks.html_parsers --repeat 20
+    python -m benchmarks.html_parsers --capture     # save live Redbubble/Etsy pages as fixtures first
+    python -m benchmarks.html_parsers --synthesize  # rewrite the synthetic fixtures
+
+The file name picks the extraction: redbubble_* pages run link_texts("/shop/") (as
+scrape_redbubble_popular_tags does), and etsy_* pages run listing_cards(10) (as
+analyze_etsy_competitors does). Every backend must return the same data, and the
+benchmark fails loudly when one does not.
+
+The *.synthetic.html fixtures mimic the live pages' selectors and size. Captured pages
+sit next to them and are picked up automatically.
+"""
+import argparse
+import asyncio
+import glob
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from services.helpers.html_parse import BACKENDS, get_backend
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+CAPTURE_PAGES = {
+    "redbubble_explore.html": "https://www.redbubble.com/explore/for-you",
+    "etsy_search.html": "https://www.etsy.com/search?q=funny+cat+shirt&ref=pagination&page=1",
+}
+
+
+def extract(backend, name: str, html: str):
+    if name.startswith("etsy"):
+        return backend.listing_cards(html, 10)
+    return backend.link_texts(html, "/shop/")
+
+
+def measure(backend, name: str, html: str, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(backend, name, html)
+        timings.append(time.perf_counter() - start)
+    # Memory in a separate pass: tracemalloc slows the timed runs down
+    tracemalloc.start()
+    extract(backend, name, html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(timings) * 1000, "peak_kb": peak / 1024}
+
+
+def run(repeat: int) -> None:
+    pages = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    if not pages:
+        print(f"No fixture pages in {FIXTURES_DIR} — run with --capture or --synthesize")
+        return
+    backends = [get_backend(name) for name in BACKENDS]
+    print("peak = Python heap (tracemalloc); lxml's libxml2 tree lives outside it and is freed with the document")
+    for path in pages:
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(f"\n{name} ({len(html) / 1024:.0f} KB)")
+        expected = extract(backends[-1], name, html)
+        for backend in backends:
+            result = extract(backend, name, html)
+            if result != expected:
+                raise SystemExit(f"{backend.name} disagrees with {backends[-1].name} on {name}")
+            stats = measure(backend, name, html, repeat)
+            print(f"  {backend.name:<9} {stats['median_ms']:8.1f} ms   peak {stats['peak_kb']:8.0f} KB   ({len(result)} items)")
+
+
+async def capture() -> None:
+    from services.helpers.http_pool import http_pool
+    from services.research.competitor_analysis import HEADERS
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for filename, url in CAPTURE_PAGES.items():
+        response = await http_pool.get(url, headers=HEADERS, timeout=30)
+        if response.status_code != 200:
+            print(f"Could not capture {url}: {response.status_code}")
+            continue
+        with open(os.path.join(FIXTURES_DIR, filename), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"Saved {filename} ({len(response.content) / 1024:.0f} KB)")
+    await http_pool.aclose()
+
+
+def _chrome(rng: random.Random) -> str:
+    """Head scripts, styles and navigation markup that real pages carry around the content."""
+    script = "".join(f"window.__c{i}={{a:{rng.random():.6f},b:'{'x' * 40}'}};" for i in range(800))
+    style = "".join(f".c{i}{{margin:{i % 9}px;color:#{i * 7919 % 0xFFFFFF:06x}}}" for i in range(1500))
+    nav = "".join(
+        f'<li class="nav-item"><a href="/about/{i}" class="nav-link">Section {i}</a></li>' for i in range(200)
+    )
+    return f"<head><meta charset='utf-8'><style>{style}</style><script>{script}</script></head><body><nav><ul>{nav}</ul></nav>"
+
+
+def synthesize() -> None:
+    """Write pages shaped like the live ones (same selectors, similar size and nesting)."""
+    rng = random.Random(7)
+    words = ["cat", "mom", "retro", "funny", "dog", "dad", "vintage", "sunset", "frog", "coffee", "nurse", "teacher"]
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    links = []
+    for i in range(1200):
+        phrase = " ".join(rng.sample(words, rng.randint(1, 3)))
+        href = f"/shop/{phrase.replace(' ', '+')}" if i % 3 == 0 else f"/i/t-shirt/{i}"
+        links.append(
+            f'<div class="card"><div class="media"><img src="/img/{i}.jpg" alt=""></div>'
+            f'<a href="{href}" class="tag-link"><span>{phrase.title()}</span></a>'
+            f'<p class="meta">{" ".join(rng.choices(words, k=12))}</p></div>'
+        )
+    redbubble = f"<!DOCTYPE html><html>{_chrome(rng)}<main>{''.join(links)}</main></body></html>"
+
+    cards = []
+    for i in range(64):
+        title = " ".join(rng.choices(words, k=8)).title()
+        tags = "".join(f'<span class="tag">{w}</span>' for w in rng.choices(words, k=15))
+        cards.append(
+            f'<div class="v2-listing-card wt-position-relative" data-listing-id="{i}">'
+            f'<a href="https://www.etsy.com/listing/{100000 + i}/x" class="listing-link">'
+            f'<div class="image"><img src="/il/{i}.jpg"></div></a>'
+            f'<div class="v2-listing-card__info"><h3 class="wt-text-caption">{title}</h3>'
+            f'<div class="shop">{tags}</div>'
+            f'<p class="price"><span class="currency-symbol">$</span>'
+            f'<span class="currency-value">{rng.randint(12, 40)}.{rng.randint(0, 99):02d}</span></p></div></div>'
+        )
+    filler = "".join(f'<div class="wt-grid__item"><p>{" ".join(rng.choices(words, k=20))}</p></div>' for _ in range(2000))
+    etsy = f"<!DOCTYPE html><html>{_chrome(rng)}<main>{''.join(cards)}{filler}</main></body></html>"
+
+    for filename, html in (("redbubble_explore.synthetic.html", redbubble), ("etsy_search.synthetic.html", etsy)):
+        with open(os.path.join(FIXTURES_DIR, filename), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"Wrote {filename} ({len(html) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--capture", action="store_true", help="save live pages into benchmarks/fixtures/")
+    parser.add_argument("--synthesize", action="store_true", help="rewrite the synthetic fixture pages")
+    args = parser.parse_args()
+    if args.capture:
+        asyncio.run(capture())
+    if args.synthesize:
+        synthesize()
+    run(args.repeat)
@@ -12,6 +12,42 @@ class Settings(BaseSettings):
     SHOPIFY_ACCESS_TOKEN: str = ""
     PRINTFUL_API_KEY: str = ""
 
+    # Trend pipeline — Groq free tier is ~6000 tokens/min shared across all calls
+    GROQ_TPM_LIMIT: int = 6000
+    SCORING_CONCURRENCY: int = 4
+    SCORING_BATCH_SIZE: int = 10  # keywords packed into one scoring request
+    SCORING_BUDGET_PER_RUN: int = 30  # keywords scored per run, highest expected value first
+    SIMILARITY_INHERIT_THRESHOLD: float = 0.85  # reuse a recent score above this trigram cosine
+    GOOGLE_SEED_TIME_BUDGET: int = 90  # seconds of Google scraping per run; sets how many seeds rotate in
+    ETSY_EXPAND_DEPTH: int = 2  # autocomplete BFS: 0 = seeds, 1 = seed + a..z, 2+ = suggestions as prefixes
+    ETSY_EXPAND_REQUEST_BUDGET: int = 400  # network requests per run (cached prefixes are free)
+    ETSY_EXPAND_TIME_BUDGET: int = 45  # seconds; the expansion returns what it has found by then
+    SCRAPE_DEADLINE: int = 150  # seconds for all sources together; later ones are cut off (services/pipeline/sources.py)
+
+    # LLM gateway (services/ai/gateway.py) — one budget per provider/model shared by every AI call
+    GROQ_RPM_LIMIT: int = 30  # Groq free tier requests/min (tokens/min is GROQ_TPM_LIMIT)
+    LLM_INTERACTIVE_RESERVE: float = 0.25  # share of each model's budget bulk calls leave free for interactive ones
+    LLM_MAX_ATTEMPTS: int = 4  # tries per call on 429 / 5xx / connection errors, with jittered backoff
+    LLM_HEDGING_ENABLED: bool = True  # hedge interactive calls to OpenAI when Groq is slower than its p90
+    LLM_HEDGE_DEFAULT_DELAY: float = 3.0  # seconds, until a model has enough latency samples for a p90
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_CACHE_ENABLED: bool = True  # llm_cache table (services/ai/llm_cache.py); TTLs are set per call site
+    LLM_CACHE_MAX_MB: int = 50
+
+    # Shared scraper HTTP pool (services/helpers/http_pool.py)
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_PER_HOST_CONCURRENCY: int = 5  # default max in-flight requests per host
+    HTTP2_ENABLED: bool = False  # needs the h2 package (pip install httpx[http2])
+    HTTP_CACHE_MODE: str = "normal"  # normal | record | replay | off (services/helpers/http_cache.py)
+    HTTP_CACHE_DIR: str = ""  # defaults to backend/data/http_cache
+    HTTP_CACHE_MAX_MB: int = 256
+    HTML_PARSER: str = "auto"  # auto | lxml | strainer | soup (services/helpers/html_parse.py)
+
+    # Claude deep analysis — spend caps in USD, drawn down by real token usage
+    ANALYSIS_DAILY_BUDGET_USD: float = 0.50
+    ANALYSIS_MONTHLY_BUDGET_USD: float = 5.00
+    ANALYSIS_CONCURRENCY: int = 3
+
     class Config:
         env_file = "../.env"
         extra = "ignore"
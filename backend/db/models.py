@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Float, Boolean, DateTime, Integer, Text, JSON
+from sqlalchemy import String, Float, Boolean, DateTime, Integer, BigInteger, Text, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from db.database import Base
 
@@ -10,7 +10,11 @@ class Trend(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     keyword: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # canonical_key(keyword) — unique, so concurrent runs can't insert the same trend twice
+    keyword_normalized: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, unique=True)
     source: Mapped[str] = mapped_column(String(50), nullable=False)  # google / tiktok / pinterest
+    sources: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)  # every source that returned it
+    aliases: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)  # near-duplicate variants folded in
 
     # Groq fast scoring
     score_groq: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
@@ -19,6 +23,9 @@ class Trend(Base):
     ip_safe: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
     product_suggestions: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     score_reasoning: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Set when the score was reused from a near-identical trend instead of an LLM call
+    score_inherited_from: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # trends.id
+    score_similarity: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # cosine, 0-1
 
     # Claude deep analysis (7+ scores only)
     deep_analysis: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -33,10 +40,14 @@ class Trend(Base):
     scrape_count: Mapped[int] = mapped_column(Integer, default=1)
     last_scored_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     last_analyzed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    days_trending: Mapped[int] = mapped_column(Integer, default=0)
+    analysis_queued_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)  # waiting for budget
+    days_trending: Mapped[int] = mapped_column(Integer, default=0)  # distinct days seen (trend_snapshots)
+    season_count: Mapped[int] = mapped_column(Integer, default=1)  # distinct seasons seen (trend_snapshots)
 
     # Trend momentum
     trend_velocity: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # rising/stable/declining
+    interest_velocity: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # interest points/day
+    interest_acceleration: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # change in velocity
     peak_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     peak_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
@@ -126,3 +137,94 @@ class SavedDesign(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PipelineRun(Base):
+    __tablename__ = "pipeline_runs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)  # uuid4
+    trigger: Mapped[str] = mapped_column(String(20), nullable=False)  # sse / batch
+    status: Mapped[str] = mapped_column(String(20), default="running", index=True)  # running / completed / failed / cancelled / interrupted
+    resumed_from: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)  # interrupted run whose backlog this run picked up
+
+    stats: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # scraped_total, scored, cached, ...
+    stage_timings: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # {"scrape": {"seconds": 41.2, ...}, ...}
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class TrendSeed(Base):
+    """Seed keyword whose related queries feed the Google Trends source; rotated by staleness and yield."""
+    __tablename__ = "trend_seeds"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    keyword: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    last_fetched_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    fetch_count: Mapped[int] = mapped_column(Integer, default=0)
+    last_yield: Mapped[int] = mapped_column(Integer, default=0)  # new keywords found on the last fetch
+    total_yield: Mapped[int] = mapped_column(Integer, default=0)
+    yield_score: Mapped[float] = mapped_column(Float, default=0.0)  # moving average of new keywords per fetch
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ScraperState(Base):
+    """Small key-value store for state scrapers keep between runs (e.g. learned request pacing)."""
+    __tablename__ = "scraper_state"
+
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)  # "pacer:google_trends"
+    value: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class TrendSnapshot(Base):
+    """Append-only history: one row per trend per pipeline run that saw it."""
+    __tablename__ = "trend_snapshots"
+    __table_args__ = (Index("ix_trend_snapshots_trend_captured", "trend_id", "captured_at"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    trend_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)  # pipeline_runs.id
+    captured_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    sources: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)  # sources that returned it this run
+    avg_interest: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # only when Google reported it
+    interest_peak: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # score_groq at capture time
+
+
+class ApiSpend(Base):
+    """Ledger of paid LLM calls — one row per call, with its real token usage."""
+    __tablename__ = "api_spend"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    provider: Mapped[str] = mapped_column(String(30), nullable=False)  # anthropic / openai
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    purpose: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # deep_analysis / ...
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cost_usd: Mapped[float] = mapped_column(Float, default=0.0)
+    trend_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    run_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)  # pipeline_runs.id
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class LLMCacheEntry(Base):
+    """Stored LLM completion, keyed by everything that determines it (see services/ai/llm_cache.py)."""
+    __tablename__ = "llm_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of provider/model/prompt/params
+    provider: Mapped[str] = mapped_column(String(30), nullable=False)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    purpose: Mapped[str] = mapped_column(String(50), nullable=False, index=True)  # design_ideas / seo / ...
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    temperature: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    max_tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)  # LRU order
@@ -4,6 +4,7 @@ Novraux Backend — FastAPI entry point.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from db.database import create_tables
+from services.helpers.http_pool import http_pool
 from routers import trends, seo, orders, research, calendar
 from routers import shopify as shopify_router
 from routers import vault as vault_router
@@ -30,6 +31,11 @@ def on_startup():
     print("[Novraux] Database tables ready.")
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await http_pool.aclose()
+
+
 # Health check
 @app.get("/health")
 def health():
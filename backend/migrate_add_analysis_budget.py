@@ -0,0 +1,42 @@
+"""
+Database migration: Add the api_spend ledger and the deep-analysis queue.
+Run this once before deploying the budgeted deep-analysis stage.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+CREATE TABLE IF NOT EXISTS api_spend (
+    id SERIAL PRIMARY KEY,
+    provider VARCHAR(30) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    purpose VARCHAR(50) NOT NULL,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cost_usd FLOAT DEFAULT 0.0,
+    trend_id INTEGER,
+    run_id VARCHAR(36),
+    created_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_api_spend_purpose ON api_spend (purpose);
+CREATE INDEX IF NOT EXISTS ix_api_spend_created_at ON api_spend (created_at);
+
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS analysis_queued_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_trends_analysis_queued_at ON trends (analysis_queued_at);
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added api_spend table and analysis_queued_at to trends table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add analysis spend ledger...")
+    run_migration()
@@ -0,0 +1,65 @@
+"""
+Database migration: Add normalized keyword + unique index to trends table.
+Run this once before deploying the bulk-upsert pipeline.
+
+Backfills keyword_normalized, merges existing duplicate rows (keeps the most
+recently scored one, sums scrape counts, keeps the earliest created_at),
+then creates the unique index the pipeline's ON CONFLICT upsert relies on.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS keyword_normalized VARCHAR(255);
+
+-- Same rule as services.helpers.keywords.normalize_keyword
+UPDATE trends
+SET keyword_normalized = btrim(regexp_replace(lower(keyword), '\\s+', ' ', 'g'))
+WHERE keyword_normalized IS NULL;
+
+-- Fold duplicate stats into the row we keep
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER w_order AS rn,
+           sum(coalesce(scrape_count, 1)) OVER w_all AS total_scrapes,
+           min(created_at) OVER w_all AS first_seen
+    FROM trends
+    WINDOW w_all AS (PARTITION BY keyword_normalized),
+           w_order AS (PARTITION BY keyword_normalized ORDER BY last_scored_at DESC NULLS LAST, id)
+)
+UPDATE trends t
+SET scrape_count = r.total_scrapes,
+    created_at = r.first_seen
+FROM ranked r
+WHERE t.id = r.id AND r.rn = 1;
+
+-- Drop the duplicates
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER (
+               PARTITION BY keyword_normalized ORDER BY last_scored_at DESC NULLS LAST, id
+           ) AS rn
+    FROM trends
+)
+DELETE FROM trends t
+USING ranked r
+WHERE t.id = r.id AND r.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_trends_keyword_normalized ON trends (keyword_normalized);
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added keyword_normalized + unique index to trends table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add normalized keyword index to trends table...")
+    run_migration()
@@ -0,0 +1,44 @@
+"""
+Database migration: Add the llm_cache table.
+Stores LLM completions for interactive call sites (design ideas, briefs, listings, gap reports, SEO)
+so repeating the same request is answered from Postgres instead of the provider.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key VARCHAR(64) PRIMARY KEY,
+    provider VARCHAR(30) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    purpose VARCHAR(50) NOT NULL,
+    prompt_hash VARCHAR(64) NOT NULL,
+    temperature FLOAT,
+    max_tokens INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    size_bytes INTEGER DEFAULT 0,
+    hits INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT now(),
+    expires_at TIMESTAMP NOT NULL,
+    last_used_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_purpose ON llm_cache (purpose);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used_at ON llm_cache (last_used_at);
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added llm_cache table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add LLM response cache...")
+    run_migration()
@@ -0,0 +1,27 @@
+"""
+Database migration: Add score inheritance fields to trends table.
+Run this once before deploying the similarity cache.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS score_inherited_from INTEGER;
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS score_similarity FLOAT;
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added score_inherited_from / score_similarity to trends table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add score inheritance fields to trends table...")
+    run_migration()
@@ -0,0 +1,30 @@
+"""
+Database migration: Add the scraper_state key-value table.
+Holds state scrapers keep between runs, such as the learned Google Trends request pace.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+CREATE TABLE IF NOT EXISTS scraper_state (
+    key VARCHAR(100) PRIMARY KEY,
+    value JSON,
+    updated_at TIMESTAMP DEFAULT now()
+);
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added scraper_state table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add scraper state...")
+    run_migration()
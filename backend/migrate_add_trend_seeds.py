@@ -0,0 +1,41 @@
+"""
+Database migration: Add the trend_seeds table and fill it with the built-in POD seeds.
+Seeds can then be edited through /trends/seeds instead of google_trends.py.
+"""
+from sqlalchemy import text
+from db.database import engine
+from services.scrapers.google_trends import POD_SEED_KEYWORDS
+
+migration_sql = """
+CREATE TABLE IF NOT EXISTS trend_seeds (
+    id SERIAL PRIMARY KEY,
+    keyword VARCHAR(255) NOT NULL UNIQUE,
+    enabled BOOLEAN DEFAULT TRUE,
+    last_fetched_at TIMESTAMP,
+    fetch_count INTEGER DEFAULT 0,
+    last_yield INTEGER DEFAULT 0,
+    total_yield INTEGER DEFAULT 0,
+    yield_score FLOAT DEFAULT 0.0,
+    created_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_trend_seeds_id ON trend_seeds (id);
+"""
+
+seed_sql = "INSERT INTO trend_seeds (keyword) VALUES (:keyword) ON CONFLICT (keyword) DO NOTHING"
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.execute(text(seed_sql), [{"keyword": k} for k in POD_SEED_KEYWORDS])
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print(f"Added trend_seeds table with {len(POD_SEED_KEYWORDS)} default seeds.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add trend seeds...")
+    run_migration()
@@ -0,0 +1,48 @@
+"""
+Database migration: Add the append-only trend_snapshots history and momentum columns.
+Existing trends get one backfilled snapshot from their current values so momentum has a baseline.
+"""
+from sqlalchemy import text
+from db.database import engine
+
+migration_sql = """
+CREATE TABLE IF NOT EXISTS trend_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    trend_id INTEGER NOT NULL,
+    run_id VARCHAR(36),
+    captured_at TIMESTAMP DEFAULT now(),
+    sources JSON,
+    avg_interest INTEGER,
+    interest_peak INTEGER,
+    score FLOAT
+);
+CREATE INDEX IF NOT EXISTS ix_trend_snapshots_captured_at ON trend_snapshots (captured_at);
+CREATE INDEX IF NOT EXISTS ix_trend_snapshots_trend_captured ON trend_snapshots (trend_id, captured_at);
+
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS season_count INTEGER DEFAULT 1;
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS interest_velocity FLOAT;
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS interest_acceleration FLOAT;
+
+INSERT INTO trend_snapshots (trend_id, captured_at, sources, avg_interest, interest_peak, score)
+SELECT t.id, COALESCE(t.last_scraped_at, t.created_at, now()),
+       COALESCE(t.sources, json_build_array(t.source)),
+       t.avg_interest, t.interest_peak, t.score_groq
+FROM trends t
+WHERE NOT EXISTS (SELECT 1 FROM trend_snapshots s WHERE s.trend_id = t.id);
+"""
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+            print("✅ Migration completed successfully!")
+            print("Added trend_snapshots table and momentum columns to trends table.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Add trend snapshot history...")
+    run_migration()
@@ -0,0 +1,126 @@
+"""
+Database migration: Canonical keyword keys + near-duplicate clustering for trends.
+Run this once before deploying the canonicalizing pipeline (after migrate_add_keyword_index.py).
+
+Adds the sources/aliases columns, re-keys every row with canonical_key() (hashtag
+segmentation, stopwords, plurals) and folds near-duplicate rows ("Cat Mom Life",
+"catmomlife", "cat mom life gifts") into one row per cluster. The kept row is the
+most recently scored one; it gets the summed scrape counts, the earliest created_at,
+the best peak score, every source and the other rows' keywords as aliases.
+Rows pointing at a merged trend (trend_snapshots, api_spend, score_inherited_from) are
+moved to the kept row, and momentum is recomputed over the combined history, so the
+script is safe to re-run on a live database after canonical_key() changes.
+"""
+from sqlalchemy import inspect, text, update
+from db.database import engine, SessionLocal
+from db.models import ApiSpend, Trend, TrendSnapshot
+from services.pipeline.momentum import refresh_momentum
+from services.helpers.keywords import WordSegmenter, canonical_key
+from services.helpers.keyword_clusters import KeywordClusters
+
+migration_sql = """
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS sources JSON;
+ALTER TABLE trends ADD COLUMN IF NOT EXISTS aliases JSON;
+"""
+
+
+def _merged(*lists) -> list:
+    merged = []
+    for values in lists:
+        for value in values or []:
+            if value and value not in merged:
+                merged.append(value)
+    return merged
+
+
+def cluster_trends(db) -> tuple[int, int]:
+    """Re-key and merge trend rows in one transaction. Returns (clusters, rows removed)."""
+    trends = (
+        db.query(Trend)
+        .order_by(Trend.last_scored_at.desc().nullslast(), Trend.id)
+        .all()
+    )
+    segmenter = WordSegmenter.default().copy()
+    segmenter.learn(t.keyword for t in trends)
+
+    # Best row first, so each cluster's representative is the row we keep
+    clusters = KeywordClusters()
+    keeper_of: dict[str, Trend] = {}
+    groups: dict[int, list[Trend]] = {}
+    new_keys: dict[int, str] = {}
+    for trend in trends:
+        key = canonical_key(trend.keyword, segmenter)
+        rep = clusters.add(key)
+        if rep not in keeper_of:
+            keeper_of[rep] = trend
+            new_keys[trend.id] = key
+        groups.setdefault(keeper_of[rep].id, []).append(trend)
+
+    # Tables from later migrations may not exist yet on a first run
+    inspector = inspect(db.get_bind())
+    referencing = [m for m in (TrendSnapshot, ApiSpend) if inspector.has_table(m.__tablename__)]
+
+    removed = 0
+    merged_into: dict[int, int] = {}
+    for keeper_id, members in groups.items():
+        keeper, others = members[0], members[1:]
+        if others:
+            other_ids = [o.id for o in others]
+            for model in referencing:
+                db.execute(update(model).where(model.trend_id.in_(other_ids)).values(trend_id=keeper.id))
+            merged_into.update((other_id, keeper.id) for other_id in other_ids)
+        keeper.sources = _merged(keeper.sources, [keeper.source], *[[o.source] + (o.sources or []) for o in others])
+        keeper.aliases = [
+            a for a in _merged(keeper.aliases, *[[o.keyword] + (o.aliases or []) for o in others])
+            if a != keeper.keyword
+        ]
+        for other in others:
+            keeper.scrape_count = (keeper.scrape_count or 1) + (other.scrape_count or 1)
+            if other.created_at and (not keeper.created_at or other.created_at < keeper.created_at):
+                keeper.created_at = other.created_at
+            if other.peak_score and other.peak_score > (keeper.peak_score or 0):
+                keeper.peak_score, keeper.peak_date = other.peak_score, other.peak_date
+            db.delete(other)
+            removed += 1
+    for trend in trends:
+        if trend.score_inherited_from in merged_into:
+            source_id = merged_into[trend.score_inherited_from]
+            # A row that inherited from its own cluster now owns that score
+            trend.score_inherited_from = None if source_id == trend.id else source_id
+    db.flush()
+
+    # Clear changed keys first so two rows swapping keys can't trip the unique index
+    changed = [t for t in keeper_of.values() if t.keyword_normalized != new_keys[t.id]]
+    for trend in changed:
+        trend.keyword_normalized = None
+    db.flush()
+    for trend in changed:
+        trend.keyword_normalized = new_keys[trend.id]
+    if removed and TrendSnapshot in referencing:
+        # Kept rows now carry their merged rows' snapshots: days_trending, season_count, velocity
+        refresh_momentum(db)
+    db.commit()
+    return len(groups), removed
+
+
+def run_migration():
+    """Execute the migration."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(migration_sql))
+            conn.commit()
+
+        db = SessionLocal()
+        try:
+            clusters, removed = cluster_trends(db)
+        finally:
+            db.close()
+        print("✅ Migration completed successfully!")
+        print(f"Added sources/aliases columns; {clusters} trends kept, {removed} near-duplicate rows merged.")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Running migration: Canonicalize and cluster trend keywords...")
+    run_migration()
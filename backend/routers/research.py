@@ -1,5 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Request
+from sse_starlette.sse import EventSourceResponse
+from contextlib import aclosing
+from functools import partial
+from typing import Callable, List, Dict, Optional
+import asyncio
+import json
+import threading
 from services.research.competitor_analysis import analyze_redbubble_competitors
 from services.research.niche_validator import niche_validator
 from services.ai.gap_analyzer import generate_market_gap_report
@@ -8,18 +14,55 @@ from services.ai.image_generator import image_generator
 
 router = APIRouter(prefix="/research", tags=["Research"])
 
+
+async def _relay(make_events: Callable, *args):
+    """
+    Run a blocking (kind, data) event generator in the default executor and yield its events
+    as they arrive. When the consumer stops early the generator is closed in its thread,
+    which closes the provider's token stream.
+    """
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        events = make_events(*args)
+        try:
+            for event in events:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+                if stop.is_set():
+                    break
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", {"success": False, "error": str(e)}))
+        finally:
+            events.close()
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    loop.run_in_executor(None, produce)
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+    finally:
+        stop.set()
+
+
+def _sse(kind: str, data) -> dict:
+    return {"event": kind, "data": json.dumps(data)}
+
+
 @router.get("/gap-analysis")
-def get_market_gap(keyword: str, platform: str = "redbubble"):
+async def get_market_gap(keyword: str, platform: str = "redbubble", refresh: bool = False):
     """
     Search competitors on a platform and generate an AI market gap report.
+    AI answers are cached; refresh=true asks the model again.
     """
     print(f"[Research API] Analyzing market gap for: {keyword} on {platform}")
     
     if platform.lower() == "redbubble":
-        competitors = analyze_redbubble_competitors(keyword)
+        competitors = await analyze_redbubble_competitors(keyword)
     else:
         # Fallback to redbubble if platform not supported yet
-        competitors = analyze_redbubble_competitors(keyword)
+        competitors = await analyze_redbubble_competitors(keyword)
         
     if not competitors:
         return {
@@ -28,7 +71,9 @@ def get_market_gap(keyword: str, platform: str = "redbubble"):
             "competitors": []
         }
         
-    report = generate_market_gap_report(keyword, competitors)
+    # LLM calls block (they may queue in the gateway), so they run off the event loop
+    loop = asyncio.get_event_loop()
+    report = await loop.run_in_executor(None, generate_market_gap_report, keyword, competitors, refresh)
     
     return {
         "keyword": keyword,
@@ -39,38 +84,43 @@ def get_market_gap(keyword: str, platform: str = "redbubble"):
     }
 
 @router.post("/explore")
-async def explore_niche(keyword: str):
+async def explore_niche(keyword: str, refresh: bool = False):
     """
     Perform a unified niche deep dive across Etsy and Redbubble.
+    AI answers are cached; refresh=true asks the model again.
     """
     print(f"[Research API] Deep exploration triggered for: {keyword}")
-    result = await niche_validator.explore_niche(keyword)
+    result = await niche_validator.explore_niche(keyword, refresh=refresh)
     if not result.get("success"):
         raise HTTPException(status_code=404, detail=result.get("message"))
     return result
 @router.post("/niche/analyze")
-async def analyze_niche_pod(niche: str, generate_designs: bool = True, style_preference: str = "Balanced"):
+async def analyze_niche_pod(niche: str, generate_designs: bool = True, style_preference: str = "Balanced", refresh: bool = False):
     """
     Complete niche analysis for POD including:
     - Market validation
     - Gap analysis
     - Design generation (if enabled)
     Returns everything needed to start creating designs.
+    AI answers are cached; refresh=true asks the model again (e.g. for new design ideas).
     """
     print(f"[Research API] Analyzing niche for POD ({style_preference}): {niche}")
     
     # Step 1: Validate niche across platforms
-    validation = await niche_validator.explore_niche(niche)
+    validation = await niche_validator.explore_niche(niche, refresh=refresh)
     
     # Step 2: Generate gap report
-    competitors = analyze_redbubble_competitors(niche)
-    gap_report = generate_market_gap_report(niche, competitors) if competitors else "No competitor data"
+    competitors = await analyze_redbubble_competitors(niche)
+    loop = asyncio.get_event_loop()
+    gap_report = await loop.run_in_executor(None, generate_market_gap_report, niche, competitors, refresh) if competitors else "No competitor data"
     
     # Step 3: Generate design ideas (if enabled)
     designs = None
     if generate_designs:
         print(f"[Research API] Calling design_generator.generate_design_ideas for {niche} with style {style_preference}")
-        designs_result = design_generator.generate_design_ideas(niche, num_ideas=5, style_preference=style_preference)
+        designs_result = await loop.run_in_executor(
+            None, partial(design_generator.generate_design_ideas, niche, num_ideas=5, style_preference=style_preference, refresh=refresh)
+        )
         print(f"[Research API] Design generation result: {designs_result.get('success')}")
         designs = designs_result if designs_result.get("success") else None
         if designs is None:
@@ -86,36 +136,139 @@ async def analyze_niche_pod(niche: str, generate_designs: bool = True, style_pre
         "next_step": "Click on a design to generate full brief and listing copy"
     }
 
+async def _analyze_niche_events(request: Request, niche: str, style_preference: str, num_ideas: int, refresh: bool):
+    """
+    Design ideas stream from the start, alongside market validation and the gap report
+    (they do not depend on them), so the first design is not held up by the scrapers.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    design_events = {"design": "design", "done": "designs_done", "error": "designs_error"}
+
+    async def designs():
+        try:
+            async with aclosing(_relay(
+                partial(design_generator.stream_design_ideas, niche, num_ideas, style_preference, refresh)
+            )) as events:
+                async for kind, data in events:
+                    await queue.put((design_events[kind], data))
+        finally:
+            await queue.put(None)
+
+    async def market():
+        try:
+            validation = await niche_validator.explore_niche(niche, refresh=refresh)
+            await queue.put(("validation", validation))
+            competitors = await analyze_redbubble_competitors(niche)
+            loop = asyncio.get_event_loop()
+            gap_report = await loop.run_in_executor(None, generate_market_gap_report, niche, competitors, refresh) if competitors else "No competitor data"
+            await queue.put(("gap_analysis", {
+                "gap_analysis": gap_report,
+                "competitor_count": len(competitors) if competitors else 0,
+            }))
+        except Exception as e:
+            print(f"[Research API] Market analysis failed for {niche}: {e}")
+            await queue.put(("market_error", {"error": str(e)}))
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.ensure_future(designs()), asyncio.ensure_future(market())]
+    running = len(tasks)
+    try:
+        while running:
+            item = await queue.get()
+            if item is None:
+                running -= 1
+                continue
+            yield _sse(*item)
+            if await request.is_disconnected():
+                print(f"[Research API] Client left the niche stream for {niche}")
+                return
+        yield _sse("done", {
+            "success": True,
+            "niche": niche,
+            "next_step": "Click on a design to generate full brief and listing copy",
+        })
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.get("/niche/analyze/stream")
+async def analyze_niche_pod_stream(request: Request, niche: str, style_preference: str = "Balanced",
+                                   num_ideas: int = 5, refresh: bool = False):
+    """
+    Streaming /niche/analyze over SSE (GET, so EventSource can open it).
+    Events: `design` (one per idea, as soon as the model has written it), `designs_done` or
+    `designs_error`, `validation`, `gap_analysis` (or `market_error`), then `done`.
+    """
+    print(f"[Research API] Streaming niche analysis ({style_preference}): {niche}")
+    return EventSourceResponse(_analyze_niche_events(request, niche, style_preference, num_ideas, refresh))
+
+
+async def _design_copy_events(request: Request, events):
+    async with aclosing(events):
+        async for kind, data in events:
+            yield _sse(kind, data)
+            if await request.is_disconnected():
+                return
+
 @router.post("/design/brief")
-async def get_design_brief(niche: str, design_title: str, design_concept: str, style_preference: str = "Balanced"):
+async def get_design_brief(niche: str, design_title: str, design_concept: str, style_preference: str = "Balanced", refresh: bool = False):
     """
     Generate a detailed design brief for a specific design concept.
     Includes target audience, colors, typography, creation instructions.
     """
     print(f"[Research API] Generating brief for design: {design_title} in niche: {niche} ({style_preference})")
     
-    brief_result = design_generator.generate_design_brief(niche, design_title, design_concept, style_preference=style_preference)
+    loop = asyncio.get_event_loop()
+    brief_result = await loop.run_in_executor(
+        None, partial(design_generator.generate_design_brief, niche, design_title, design_concept, style_preference=style_preference, refresh=refresh)
+    )
     
     if not brief_result.get("success"):
         raise HTTPException(status_code=500, detail=brief_result.get("error", "Failed to generate brief"))
     
     return brief_result
 
+@router.get("/design/brief/stream")
+async def stream_design_brief(request: Request, niche: str, design_title: str, design_concept: str,
+                              style_preference: str = "Balanced", refresh: bool = False):
+    """
+    Streaming /design/brief over SSE: a `field` event ({key, value}) per brief section as
+    it completes, then `done` with the whole brief (or `error`).
+    """
+    print(f"[Research API] Streaming brief for design: {design_title} in niche: {niche} ({style_preference})")
+    events = _relay(partial(design_generator.stream_design_brief, niche, design_title, design_concept, style_preference, refresh))
+    return EventSourceResponse(_design_copy_events(request, events))
+
 @router.post("/design/listing")
-async def get_listing_copy(niche: str, design_title: str, design_text: str):
+async def get_listing_copy(niche: str, design_title: str, design_text: str, refresh: bool = False):
     """
     Generate SEO-optimized Etsy listing title, description, and tags.
     Ready to copy-paste to Etsy.
     """
     print(f"[Research API] Generating listing for: {design_title}")
     
-    listing_result = design_generator.generate_listing_description(niche, design_title, design_text)
+    loop = asyncio.get_event_loop()
+    listing_result = await loop.run_in_executor(
+        None, design_generator.generate_listing_description, niche, design_title, design_text, refresh
+    )
     
     if not listing_result.get("success"):
         raise HTTPException(status_code=500, detail=listing_result.get("error", "Failed to generate listing"))
     
     return listing_result
 
+@router.get("/design/listing/stream")
+async def stream_listing_copy(request: Request, niche: str, design_title: str, design_text: str, refresh: bool = False):
+    """
+    Streaming /design/listing over SSE: a `field` event ({key, value}) per listing section
+    as it completes, then `done` with the whole listing (or `error`).
+    """
+    print(f"[Research API] Streaming listing for: {design_title}")
+    events = _relay(partial(design_generator.stream_listing_description, niche, design_title, design_text, refresh))
+    return EventSourceResponse(_design_copy_events(request, events))
+
 @router.post("/design/mockup")
 async def generate_design_mockup(
     niche: str,
@@ -69,10 +69,12 @@ def get_single_product(product_id: int):
 def generate_product_seo(
     product_id: int,
     use_smart_model: bool = Query(False),
+    refresh: bool = Query(False),
 ):
     """
     AI-generate SEO for a single product. Returns PREVIEW only — does NOT push yet.
     Review the result, then call POST /shopify/products/push-seo to apply.
+    The answer is cached per title + description; refresh=true asks the model again.
     """
     try:
         product = get_product(product_id)
@@ -84,6 +86,7 @@ def generate_product_seo(
         description=product.get("body_html", ""),
         platform="shopify",
         use_smart_model=use_smart_model,
+        refresh=refresh,
     )
 
     if "error" in seo:
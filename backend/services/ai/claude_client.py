@@ -2,20 +2,13 @@
 Claude client — deep analysis for high-scoring trends (7+).
 Produces design briefs, target audience profiles, and copy angles.
 """
-import anthropic
-from config import settings
+from services.ai.gateway import BULK, llm_gateway
 
-# Initialize lazily so the app doesn't crash if the key is missing
-_client = None
+ANALYSIS_MODEL = "claude-3-haiku-20240307"
+ANALYSIS_MAX_TOKENS = 800
 
-
-def get_client():
-    global _client
-    if _client is None:
-        if not settings.ANTHROPIC_API_KEY:
-            raise RuntimeError("ANTHROPIC_API_KEY is not set in .env")
-        _client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    return _client
+# USD per million tokens (Anthropic list price for Haiku)
+PRICE_PER_MTOK = {"input": 0.25, "output": 1.25}
 
 
 DEEP_ANALYSIS_PROMPT = """You are an expert Print-on-Demand brand strategist for Novraux, a premium POD brand.
@@ -44,24 +37,51 @@ Product suggestions from scoring: {product_suggestions}
 """
 
 
+def _build_prompt(keyword: str, score: float, product_suggestions: list) -> str:
+    return DEEP_ANALYSIS_PROMPT.format(
+        keyword=keyword,
+        score=score,
+        product_suggestions=", ".join(product_suggestions or []),
+    )
+
+
+def token_cost(input_tokens: int, output_tokens: int) -> float:
+    """USD cost of a Haiku call from its token usage."""
+    return (input_tokens * PRICE_PER_MTOK["input"] + output_tokens * PRICE_PER_MTOK["output"]) / 1_000_000
+
+
+def estimate_analysis_cost(keyword: str, score: float, product_suggestions: list) -> float:
+    """
+    Upper bound on one deep_analyze call (~4 chars/token in, max_tokens out).
+    Reserved against the spend budget before the call; the real usage replaces it after.
+    """
+    input_tokens = len(_build_prompt(keyword, score, product_suggestions)) // 4 + 20
+    return token_cost(input_tokens, ANALYSIS_MAX_TOKENS)
+
+
 def deep_analyze(keyword: str, score: float, product_suggestions: list) -> dict:
-    """Run deep Claude analysis on a high-scoring trend."""
+    """
+    Run deep Claude analysis on a high-scoring trend.
+    Also returns the call's token usage and its real cost (zero usage when it failed).
+    """
+    usage = {"input_tokens": 0, "output_tokens": 0}
     try:
-        client = get_client()
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=800,
-            messages=[
+        response = llm_gateway.chat(
+            "anthropic",
+            ANALYSIS_MODEL,
+            [
                 {
                     "role": "user",
-                    "content": DEEP_ANALYSIS_PROMPT.format(
-                        keyword=keyword,
-                        score=score,
-                        product_suggestions=", ".join(product_suggestions or []),
-                    ),
+                    "content": _build_prompt(keyword, score, product_suggestions),
                 }
             ],
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            priority=BULK,
         )
+        usage = {
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+        }
         full_text = response.content[0].text
 
         # Parse sections
@@ -85,8 +105,18 @@ def deep_analyze(keyword: str, score: float, product_suggestions: list) -> dict:
             "design_brief": sections.get("Design Brief", ""),
             "target_audience": sections.get("Target Audience", ""),
             "deep_analysis": full_text,
+            "model": ANALYSIS_MODEL,
+            "usage": usage,
+            "cost": token_cost(**usage),
         }
 
     except Exception as e:
         print(f"[Claude] Failed to analyze '{keyword}': {e}")
-        return {"design_brief": None, "target_audience": None, "deep_analysis": None}
+        return {
+            "design_brief": None,
+            "target_audience": None,
+            "deep_analysis": None,
+            "model": ANALYSIS_MODEL,
+            "usage": usage,
+            "cost": token_cost(**usage),
+        }
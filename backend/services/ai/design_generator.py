@@ -2,36 +2,71 @@
 Design Generator Service
 Uses LLMs to generate design ideas, briefs, and mockup descriptions for POD niches.
 """
-import os
 import json
-from typing import Optional
-from groq import Groq
+from typing import Any, Iterator, Optional
+from services.ai.gateway import INTERACTIVE, llm_gateway
+from services.helpers.json_stream import JsonStreamParser
 
-# Initialize Groq client (will be created on first use if API key exists)
-_groq_client = None
+DESIGN_MODEL = "llama-3.1-8b-instant"  # Fast Groq model
 
-def _get_groq_client():
-    """Lazy initialization of Groq client"""
-    global _groq_client
-    if _groq_client is None:
-        api_key = os.getenv("AI_API_KEY")
-        if not api_key:
-            raise ValueError("AI_API_KEY environment variable not set. Please add it to .env")
-        _groq_client = Groq(api_key=api_key)
-    return _groq_client
+# Response cache TTLs: ideas are re-rolled more often than a brief or listing for a chosen design
+IDEAS_CACHE_TTL = 24 * 3600
+BRIEF_CACHE_TTL = 7 * 24 * 3600
+LISTING_CACHE_TTL = 7 * 24 * 3600
 
 
-class DesignGenerator:
-    """Generate design concepts and briefs for POD niches using Groq."""
-    
-    @staticmethod
-    def generate_design_ideas(niche: str, num_ideas: int = 5, style_preference: str = "Balanced") -> dict:
-        """
-        Generate design ideas for a given niche with a specific style preference.
-        Returns: List of design concepts with descriptions.
-        """
-        print(f"[Design Generator] Starting {style_preference} design generation for niche: {niche}")
-        prompt = f"""You are a creative POD (Print-On-Demand) design expert specializing in Etsy.
+def _parses(text: str, opener: str, closer: str) -> bool:
+    """Whether the reply holds the JSON the caller extracts (only those replies are cached)."""
+    start, end = text.find(opener), text.rfind(closer) + 1
+    if start == -1 or end <= start:
+        return False
+    try:
+        json.loads(text[start:end])
+        return True
+    except ValueError:
+        return False
+
+
+def _complete(prompt: str, max_tokens: int, purpose: str, cache_ttl: float, refresh: bool, json_kind: str) -> str:
+    """One interactive Groq call through the gateway (or the response cache); returns the stripped reply text."""
+    opener, closer = ("[", "]") if json_kind == "array" else ("{", "}")
+    text = llm_gateway.complete(
+        "groq",
+        DESIGN_MODEL,
+        [{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        priority=INTERACTIVE,
+        purpose=purpose,
+        cache_ttl=cache_ttl,
+        refresh=refresh,
+        validate=lambda t: _parses(t, opener, closer),
+        temperature=0.7,
+    )
+    return text.strip()
+
+
+def _stream_json(parser: JsonStreamParser, prompt: str, max_tokens: int, purpose: str, cache_ttl: float,
+                 refresh: bool) -> Iterator[Any]:
+    """_complete through the streaming API: yields each array element / object member as it completes."""
+    opener, closer = ("[", "]") if parser.kind == "array" else ("{", "}")
+    for delta in llm_gateway.complete_stream(
+        "groq",
+        DESIGN_MODEL,
+        [{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        priority=INTERACTIVE,
+        purpose=purpose,
+        cache_ttl=cache_ttl,
+        refresh=refresh,
+        validate=lambda t: _parses(t, opener, closer),
+        temperature=0.7,
+    ):
+        yield from parser.feed(delta)
+
+
+def _ideas_prompt(niche: str, num_ideas: int, style_preference: str) -> str:
+    """Design ideas prompt (a JSON array of designs)."""
+    return f"""You are a creative POD (Print-On-Demand) design expert specializing in Etsy.
         
 Generate {num_ideas} unique, profitable design ideas for the niche: "{niche}"
 The designs MUST strictly follow this visual style preference: {style_preference}.
@@ -62,15 +97,69 @@ Example format:
 Niche: {niche}
 Generate {num_ideas} designs now:"""
 
+
+def _brief_prompt(niche: str, design_title: str, design_concept: str, style_preference: str) -> str:
+    """Design brief prompt (one JSON object)."""
+    return f"""You are an expert POD designer creating a detailed design brief for Etsy.
+
+Niche: {niche}
+Design Title: {design_title}
+Design Concept: {design_concept}
+Style Preference: {style_preference}
+Ensure the entire brief, especially typography and visual style, adheres to the requested Style Preference.
+
+Generate a detailed design brief including:
+1. Target Audience (who will buy this)
+2. Color Palette Recommendation (3-5 colors with hex codes)
+3. Typography Style (font style and mood)
+4. Visual Style (minimalist, vintage, modern, etc.)
+5. Key Messages (main copy and supporting text)
+6. Design Dimensions (for t-shirts, mugs, etc.)
+7. Copyright/IP Considerations
+8. Alternative Variations (3 ways to modify this design)
+9. Estimated Price Point
+10. Marketing Hooks (how to describe this in the listing)
+
+Provide comprehensive but concise guidance for a designer to create this.
+Format as JSON with these fields."""
+
+
+def _listing_prompt(niche: str, design_title: str, design_text: str) -> str:
+    """Etsy listing prompt (one JSON object)."""
+    return f"""You are an expert Etsy SEO specialist.
+
+Create a high-converting Etsy listing for a POD product.
+
+Niche: {niche}
+Design Title: {design_title}
+Design Text/Phrase: {design_text}
+
+Generate:
+1. Product Title (80 characters max, SEO-optimized)
+2. Short Description (2 sentences, benefits-focused)
+3. Full Description (5-7 sentences, including use cases, quality, care)
+4. Tags (13 tags, mix of broad and long-tail keywords)
+5. Category Suggestions (for Etsy)
+6. Shipping Details (standard POD info)
+
+Format as JSON with these fields."""
+
+
+class DesignGenerator:
+    """Generate design concepts and briefs for POD niches using Groq."""
+    
+    @staticmethod
+    def generate_design_ideas(niche: str, num_ideas: int = 5, style_preference: str = "Balanced", refresh: bool = False) -> dict:
+        """
+        Generate design ideas for a given niche with a specific style preference.
+        Returns: List of design concepts with descriptions.
+        Pass refresh=True for new ideas instead of the cached ones.
+        """
+        print(f"[Design Generator] Starting {style_preference} design generation for niche: {niche}")
+        prompt = _ideas_prompt(niche, num_ideas, style_preference)
+
         try:
-            message = _get_groq_client().chat.completions.create(
-                model="llama-3.1-8b-instant",  # Fast Groq model
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2000,
-            )
-            
-            response_text = message.choices[0].message.content.strip()
+            response_text = _complete(prompt, 2000, "design_ideas", IDEAS_CACHE_TTL, refresh, "array")
             print(f"[Design Generator] Got response from Groq, length: {len(response_text)}")
             
             # Extract JSON from response
@@ -102,43 +191,16 @@ Generate {num_ideas} designs now:"""
             }
     
     @staticmethod
-    def generate_design_brief(niche: str, design_title: str, design_concept: str, style_preference: str = "Balanced") -> dict:
+    def generate_design_brief(niche: str, design_title: str, design_concept: str, style_preference: str = "Balanced",
+                              refresh: bool = False) -> dict:
         """
         Generate a detailed design brief for a specific design concept.
         Includes target audience, color palette, typography, and creation instructions.
         """
-        prompt = f"""You are an expert POD designer creating a detailed design brief for Etsy.
-
-Niche: {niche}
-Design Title: {design_title}
-Design Concept: {design_concept}
-Style Preference: {style_preference}
-Ensure the entire brief, especially typography and visual style, adheres to the requested Style Preference.
-
-Generate a detailed design brief including:
-1. Target Audience (who will buy this)
-2. Color Palette Recommendation (3-5 colors with hex codes)
-3. Typography Style (font style and mood)
-4. Visual Style (minimalist, vintage, modern, etc.)
-5. Key Messages (main copy and supporting text)
-6. Design Dimensions (for t-shirts, mugs, etc.)
-7. Copyright/IP Considerations
-8. Alternative Variations (3 ways to modify this design)
-9. Estimated Price Point
-10. Marketing Hooks (how to describe this in the listing)
-
-Provide comprehensive but concise guidance for a designer to create this.
-Format as JSON with these fields."""
+        prompt = _brief_prompt(niche, design_title, design_concept, style_preference)
 
         try:
-            message = _get_groq_client().chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2000,
-            )
-            
-            response_text = message.choices[0].message.content.strip()
+            response_text = _complete(prompt, 2000, "design_brief", BRIEF_CACHE_TTL, refresh, "object")
             print(f"[Design Generator] Got brief response from Groq, length: {len(response_text)}")
             
             # Try to extract JSON
@@ -170,37 +232,14 @@ Format as JSON with these fields."""
             }
     
     @staticmethod
-    def generate_listing_description(niche: str, design_title: str, design_text: str) -> dict:
+    def generate_listing_description(niche: str, design_title: str, design_text: str, refresh: bool = False) -> dict:
         """
         Generate SEO-optimized listing description and tags for Etsy.
         """
-        prompt = f"""You are an expert Etsy SEO specialist.
-
-Create a high-converting Etsy listing for a POD product.
-
-Niche: {niche}
-Design Title: {design_title}
-Design Text/Phrase: {design_text}
-
-Generate:
-1. Product Title (80 characters max, SEO-optimized)
-2. Short Description (2 sentences, benefits-focused)
-3. Full Description (5-7 sentences, including use cases, quality, care)
-4. Tags (13 tags, mix of broad and long-tail keywords)
-5. Category Suggestions (for Etsy)
-6. Shipping Details (standard POD info)
-
-Format as JSON with these fields."""
+        prompt = _listing_prompt(niche, design_title, design_text)
 
         try:
-            message = _get_groq_client().chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=1500,
-            )
-            
-            response_text = message.choices[0].message.content.strip()
+            response_text = _complete(prompt, 1500, "design_listing", LISTING_CACHE_TTL, refresh, "object")
             print(f"[Design Generator] Got listing response from Groq, length: {len(response_text)}")
             
             # Extract JSON
@@ -232,5 +271,67 @@ Format as JSON with these fields."""
             }
 
 
+    @staticmethod
+    def stream_design_ideas(niche: str, num_ideas: int = 5, style_preference: str = "Balanced",
+                            refresh: bool = False) -> Iterator[tuple[str, dict]]:
+        """
+        generate_design_ideas over the provider's token stream. Yields ("design", idea) as each
+        object's closing brace arrives, then ("done", {success, niche, total}),
+        or ("error", {success, error, niche}) when the call fails or nothing parses.
+        """
+        print(f"[Design Generator] Streaming {style_preference} design ideas for niche: {niche}")
+        parser = JsonStreamParser("array")
+        try:
+            for design in _stream_json(parser, _ideas_prompt(niche, num_ideas, style_preference), 2000,
+                                       "design_ideas", IDEAS_CACHE_TTL, refresh):
+                yield "design", design
+        except Exception as e:
+            print(f"[Design Generator] ERROR streaming design ideas: {str(e)}")
+            yield "error", {"success": False, "error": str(e), "niche": niche}
+            return
+        if not parser.items:
+            yield "error", {"success": False, "error": "Could not parse design ideas", "niche": niche}
+            return
+        print(f"[Design Generator] Streamed {len(parser.items)} designs ({parser.errors} malformed)")
+        yield "done", {"success": True, "niche": niche, "total": len(parser.items)}
+
+    @staticmethod
+    def _stream_object(prompt: str, max_tokens: int, purpose: str, cache_ttl: float, refresh: bool,
+                       result_key: str, niche: str, design_title: str) -> Iterator[tuple[str, dict]]:
+        parser = JsonStreamParser("object")
+        try:
+            for key, value in _stream_json(parser, prompt, max_tokens, purpose, cache_ttl, refresh):
+                yield "field", {"key": key, "value": value}
+        except Exception as e:
+            print(f"[Design Generator] ERROR streaming {result_key}: {str(e)}")
+            yield "error", {"success": False, "error": str(e), "niche": niche}
+            return
+        if not parser.items:
+            yield "error", {"success": False, "error": f"Could not parse {result_key}", "niche": niche}
+            return
+        yield "done", {"success": True, result_key: dict(parser.items), "niche": niche, "design_title": design_title}
+
+    @staticmethod
+    def stream_design_brief(niche: str, design_title: str, design_concept: str, style_preference: str = "Balanced",
+                            refresh: bool = False) -> Iterator[tuple[str, dict]]:
+        """
+        generate_design_brief over the token stream: ("field", {key, value}) per top-level brief
+        field as it completes, then ("done", {success, brief, niche, design_title}) or ("error", ...).
+        """
+        return DesignGenerator._stream_object(
+            _brief_prompt(niche, design_title, design_concept, style_preference), 2000,
+            "design_brief", BRIEF_CACHE_TTL, refresh, "brief", niche, design_title,
+        )
+
+    @staticmethod
+    def stream_listing_description(niche: str, design_title: str, design_text: str,
+                                   refresh: bool = False) -> Iterator[tuple[str, dict]]:
+        """generate_listing_description over the token stream; events as in stream_design_brief (result key "listing")."""
+        return DesignGenerator._stream_object(
+            _listing_prompt(niche, design_title, design_text), 1500,
+            "design_listing", LISTING_CACHE_TTL, refresh, "listing", niche, design_title,
+        )
+
+
 # Singleton instance
 design_generator = DesignGenerator()
@@ -1,15 +1,16 @@
 from typing import List, Dict
 from config import settings
-from groq import Groq
+from services.ai.gateway import HEDGE_FALLBACK, INTERACTIVE, llm_gateway
 
-# Initialize Groq client
-client = Groq(api_key=settings.AI_API_KEY) if settings.AI_API_KEY else None
+# The prompt carries the competitor listings, so a changed market is a new cache key anyway
+GAP_REPORT_CACHE_TTL = 12 * 3600
 
-def generate_market_gap_report(keyword: str, competitors: List[Dict]) -> str:
+def generate_market_gap_report(keyword: str, competitors: List[Dict], refresh: bool = False) -> str:
     """
     Analyzes competitor data and generates a "Market Gap" report using Groq.
+    Served from the LLM response cache unless refresh=True; a slow Groq answer is hedged to OpenAI.
     """
-    if not client:
+    if not settings.AI_API_KEY:
         return "Groq API key not configured."
     
     if not competitors:
@@ -41,13 +42,18 @@ def generate_market_gap_report(keyword: str, competitors: List[Dict]) -> str:
     """
 
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+        return llm_gateway.complete(
+            "groq",
+            "llama-3.1-8b-instant",
+            [{"role": "user", "content": prompt}],
+            max_tokens=500,
+            priority=INTERACTIVE,
+            purpose="gap_report",
+            cache_ttl=GAP_REPORT_CACHE_TTL,
+            refresh=refresh,
+            fallback=HEDGE_FALLBACK,
             temperature=0.7,
-            max_tokens=500
         )
-        return completion.choices[0].message.content
     except Exception as e:
         return f"Error generating gap report: {e}"
 
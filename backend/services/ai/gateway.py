@@ -0,0 +1,601 @@
+"""
+LLM gateway — the one place AI services reach a model provider.
+
+Every chat call goes through llm_gateway.chat(provider, model, messages, ...):
+- Clients (Groq, OpenAI, Anthropic) are created once, lazily, from settings.
+- Each (provider, model) has a process-wide token bucket and request bucket sized to the
+  provider's per-minute limits, so the pipeline, SEO jobs and /research/* endpoints draw
+  on one shared budget instead of each tripping 429s on their own.
+- Calls queue by priority class: "interactive" (a user waiting on /research/* or an SEO
+  preview) is admitted before any queued "bulk" call (pipeline scoring, deep analysis,
+  bulk SEO), and bulk calls leave LLM_INTERACTIVE_RESERVE of each bucket free.
+- 429s, 5xx and connection errors are retried with jittered exponential backoff
+  (tenacity). A 429 also pauses the model's queue for its Retry-After, so every waiting
+  caller backs off together instead of retrying into the same limit.
+- complete() returns just the reply text and can answer from the persistent response
+  cache (services/ai/llm_cache.py) when the call site gives a cache TTL.
+- chat_stream() / complete_stream() use the provider's streaming API and yield text
+  deltas as they arrive (same admission, retries on opening, and cache entries).
+- complete(..., fallback=HEDGE_FALLBACK) hedges a latency-sensitive call: when the
+  primary model has not answered within its recent p90 latency (an in-process histogram
+  per model), the same request goes to the fallback model too. The first valid answer
+  wins, and the other request is called off: dropped from its queue or retry loop if it
+  has not been sent, or its late answer discarded if it is already in flight.
+
+Calls block the calling thread; async code runs them in the default executor.
+
+Usage:
+    response = llm_gateway.chat(
+        "groq", "llama-3.1-8b-instant",
+        [{"role": "user", "content": prompt}],
+        max_tokens=500, temperature=0.7, priority=INTERACTIVE,
+    )
+    text = response.choices[0].message.content
+
+    text = llm_gateway.complete(
+        "groq", "llama-3.1-8b-instant", messages, max_tokens=500, temperature=0.7,
+        priority=INTERACTIVE, purpose="gap_report", cache_ttl=12 * 3600, refresh=refresh,
+    )
+    text, (provider, model) = llm_gateway.complete(..., fallback=HEDGE_FALLBACK, with_source=True)
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+import anthropic
+import groq
+import openai
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, stop_when_event_set, wait_random_exponential
+from config import settings
+from services.ai.llm_cache import cache_key, llm_cache
+from services.helpers.rate_limiter import TokenBucket
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = {INTERACTIVE: 0, BULK: 1}
+
+# (tokens per minute, requests per minute) for a model without its own entry
+PROVIDER_LIMITS = {
+    "groq": (settings.GROQ_TPM_LIMIT, settings.GROQ_RPM_LIMIT),
+    "openai": (60000, 500),  # gpt-3.5-turbo, usage tier 1
+    "anthropic": (50000, 50),  # claude-3-haiku, build tier 1
+}
+MODEL_LIMITS: dict[tuple[str, str], tuple[int, int]] = {}
+
+# How long a 429 without a Retry-After header pauses its model's queue
+DEFAULT_THROTTLE_PAUSE = 5.0
+# A queued caller re-checks at least this often (admission is also signalled on every change)
+MAX_ADMISSION_WAIT = 1.0
+
+# Second provider for hedged calls (needs OPENAI_API_KEY; without it calls are not hedged)
+HEDGE_FALLBACK = ("openai", "gpt-3.5-turbo")
+# A model's p90 is trusted as the hedge delay after this many answers; until then LLM_HEDGE_DEFAULT_DELAY
+MIN_HEDGE_SAMPLES = 20
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 20.0, 30.0, 60.0)
+# Every new sample scales the older counts by this, so the histogram follows the last ~100 answers
+LATENCY_DECAY = 0.99
+
+# Hedged calls wait on these threads, so a caller's executor thread only blocks on the winner
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+_STATUS_ERRORS = (groq.APIStatusError, openai.APIStatusError, anthropic.APIStatusError)
+_CONNECTION_ERRORS = (groq.APIConnectionError, openai.APIConnectionError, anthropic.APIConnectionError)
+
+
+def estimate_tokens(messages: list[dict], max_tokens: int) -> int:
+    """Prompt (~4 characters per token) plus the whole completion budget."""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, _STATUS_ERRORS):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, _CONNECTION_ERRORS)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class HedgeCancelled(Exception):
+    """The other side of a hedged call already answered."""
+
+
+def response_text(provider: str, response) -> str:
+    if provider == "anthropic":
+        return response.content[0].text
+    return response.choices[0].message.content
+
+
+def _stream_delta(provider: str, event) -> Optional[str]:
+    """Text carried by one streamed event (None for events without any)."""
+    if provider == "anthropic":
+        delta = getattr(event, "delta", None) if getattr(event, "type", None) == "content_block_delta" else None
+        return getattr(delta, "text", None)
+    if not event.choices:
+        return None
+    return event.choices[0].delta.content
+
+
+def _used_tokens(response) -> Optional[int]:
+    """Real token usage reported by the provider (None when the response has none)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    if total is None:
+        total = (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0)
+    return total
+
+
+class LatencyHistogram:
+    """Exponentially decayed histogram of answer latencies (send to response, queueing excluded)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS, decay: float = LATENCY_DECAY):
+        self.buckets = buckets
+        self.decay = decay
+        self.counts = [0.0] * (len(buckets) + 1)
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            self.counts = [c * self.decay for c in self.counts]
+            self.counts[index] += 1
+            self.samples += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None before any sample)."""
+        with self._lock:
+            total = sum(self.counts)
+            if not total:
+                return None
+            running = 0.0
+            for i, count in enumerate(self.counts):
+                running += count
+                if running >= q * total:
+                    return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class ModelLimiter:
+    """Token + request buckets for one (provider, model), with a priority-ordered admission queue."""
+
+    def __init__(self, provider: str, model: str, tokens_per_minute: int, requests_per_minute: int):
+        self.provider = provider
+        self.model = model
+        self.tokens = TokenBucket(capacity=tokens_per_minute, period=60)
+        self.requests = TokenBucket(capacity=requests_per_minute, period=60)
+        self.paused_until = 0.0
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.calls = {p: 0 for p in PRIORITIES}
+        self.wait_seconds = {p: 0.0 for p in PRIORITIES}
+        self.tokens_used = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def _try_admit(self, ticket: tuple[int, int], amount: int, priority: str) -> float:
+        """0 when the call may go now (tokens taken), otherwise seconds to wait."""
+        if self._waiting[0] != ticket:
+            return MAX_ADMISSION_WAIT
+        paused = self.paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        reserve = settings.LLM_INTERACTIVE_RESERVE if priority == BULK else 0.0
+        wait = self.requests.try_acquire(1, reserve=reserve * self.requests.capacity)
+        if wait > 0:
+            return wait
+        wait = self.tokens.try_acquire(amount, reserve=reserve * self.tokens.capacity)
+        if wait > 0:
+            self.requests.refund(1)
+        return wait
+
+    def acquire(self, amount: int, priority: str, cancel: Optional[threading.Event] = None) -> None:
+        """Block until this call is first in line and both buckets cover it (or `cancel` is set)."""
+        ticket = (PRIORITIES[priority], next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            # A new interactive call may now be first in line
+            self._cond.notify_all()
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        raise HedgeCancelled()
+                    wait = self._try_admit(ticket, amount, priority)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(min(wait, MAX_ADMISSION_WAIT))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            self.calls[priority] += 1
+            self.wait_seconds[priority] += time.monotonic() - started
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Give back the part of a reservation the call did not use."""
+        if used is not None:
+            self.tokens_used += used
+            self.tokens.refund(reserved - used)
+
+    def wake(self) -> None:
+        """Have queued callers re-check now (one of them may have been cancelled)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold the whole queue (a 429 means the provider's window is spent for everyone)."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def status(self) -> dict:
+        with self._cond:
+            waiting = {p: sum(1 for rank, _ in self._waiting if rank == PRIORITIES[p]) for p in PRIORITIES}
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "tokens_per_minute": self.tokens.capacity,
+            "requests_per_minute": self.requests.capacity,
+            "tokens_available": round(self.tokens.available),
+            "requests_available": round(self.requests.available, 1),
+            "paused_seconds": round(max(self.paused_until - time.monotonic(), 0.0), 1),
+            "waiting": waiting,
+            "calls": dict(self.calls),
+            "avg_wait_seconds": {
+                p: round(self.wait_seconds[p] / self.calls[p], 2) if self.calls[p] else 0.0 for p in PRIORITIES
+            },
+            "latency_p50_seconds": self.latency.quantile(0.5),
+            "latency_p90_seconds": self.latency.quantile(0.9),
+            "latency_samples": self.latency.samples,
+            "tokens_used": self.tokens_used,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "errors": self.errors,
+        }
+
+
+class LLMGateway:
+    """Shared clients, per-model limiters and retries for every LLM call in the process."""
+
+    def __init__(self):
+        self._clients: dict = {}
+        self._limiters: dict[tuple[str, str], ModelLimiter] = {}
+        self._lock = threading.Lock()
+        self.hedging = {"calls": 0, "hedged": 0, "fallback_wins": 0}
+
+    def client(self, provider: str):
+        """The provider's SDK client. Retries are the gateway's job, so the SDKs' own are off."""
+        with self._lock:
+            if provider not in self._clients:
+                if provider == "groq":
+                    if not settings.AI_API_KEY:
+                        raise RuntimeError("AI_API_KEY is not set in .env")
+                    self._clients[provider] = groq.Groq(api_key=settings.AI_API_KEY, max_retries=0)
+                elif provider == "openai":
+                    if not settings.OPENAI_API_KEY:
+                        raise RuntimeError("OPENAI_API_KEY is not set in .env")
+                    self._clients[provider] = openai.OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+                elif provider == "anthropic":
+                    if not settings.ANTHROPIC_API_KEY:
+                        raise RuntimeError("ANTHROPIC_API_KEY is not set in .env")
+                    self._clients[provider] = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY, max_retries=0)
+                else:
+                    raise ValueError(f"Unknown LLM provider {provider!r}")
+            return self._clients[provider]
+
+    def available(self, provider: str) -> bool:
+        """Whether the provider's API key is configured."""
+        key = {"groq": settings.AI_API_KEY, "openai": settings.OPENAI_API_KEY, "anthropic": settings.ANTHROPIC_API_KEY}
+        return bool(key.get(provider))
+
+    def limiter(self, provider: str, model: str) -> ModelLimiter:
+        key = (provider, model)
+        with self._lock:
+            if key not in self._limiters:
+                tpm, rpm = MODEL_LIMITS.get(key) or PROVIDER_LIMITS[provider]
+                self._limiters[key] = ModelLimiter(provider, model, tpm, rpm)
+            return self._limiters[key]
+
+    def _send(self, provider: str, model: str, messages: list[dict], max_tokens: int, **kwargs):
+        client = self.client(provider)
+        if provider == "anthropic":
+            return client.messages.create(model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+        return client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+
+    def chat(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        priority: str = BULK,
+        cancel: Optional[threading.Event] = None,
+        **kwargs,
+    ):
+        """
+        One chat completion under the model's shared budget; returns the provider's response object.
+        Extra kwargs (temperature, response_format, ...) go to the SDK call unchanged.
+        Raises the last error once retries are exhausted or the error is not retryable, and
+        HedgeCancelled when `cancel` is set before the request is sent.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; choose from {', '.join(PRIORITIES)}")
+        limiter = self.limiter(provider, model)
+        estimate = estimate_tokens(messages, max_tokens)
+
+        def attempt():
+            limiter.acquire(estimate, priority, cancel)
+            sent = time.monotonic()
+            try:
+                response = self._send(provider, model, messages, max_tokens, **kwargs)
+            except BaseException as e:
+                self._failed(limiter, estimate, e)
+                raise
+            limiter.latency.record(time.monotonic() - sent)
+            limiter.settle(estimate, _used_tokens(response))
+            return response
+
+        return self._retrying(limiter, cancel)(attempt)
+
+    def _failed(self, limiter: ModelLimiter, estimate: int, exc: BaseException) -> None:
+        if isinstance(exc, _STATUS_ERRORS) and exc.status_code == 429:
+            # Tokens stay spent: the provider's window is already full
+            limiter.throttled += 1
+            limiter.pause(_retry_after(exc) or DEFAULT_THROTTLE_PAUSE)
+        else:
+            limiter.errors += 1
+            limiter.settle(estimate, 0)
+
+    def _retrying(self, limiter: ModelLimiter, cancel: Optional[threading.Event]) -> Retrying:
+        def before_sleep(retry_state):
+            limiter.retries += 1
+            exc = retry_state.outcome.exception()
+            print(
+                f"[LLM] {limiter.provider}/{limiter.model} attempt {retry_state.attempt_number} failed "
+                f"({exc.__class__.__name__}); retrying in {retry_state.next_action.sleep:.1f}s"
+            )
+
+        stop = stop_after_attempt(max(settings.LLM_MAX_ATTEMPTS, 1))
+        return Retrying(
+            retry=retry_if_exception(_retryable),
+            wait=wait_random_exponential(multiplier=1, max=30),
+            stop=stop | stop_when_event_set(cancel) if cancel is not None else stop,
+            # A cancelled call wakes from its backoff at once
+            sleep=cancel.wait if cancel is not None else time.sleep,
+            before_sleep=before_sleep,
+            reraise=True,
+        )
+
+    def chat_stream(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        priority: str = BULK,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        chat() through the provider's streaming API, as a generator of text deltas.
+        Opening the stream is admitted and retried like chat(); once tokens have arrived an
+        error is raised to the caller (a retry would repeat text it has already consumed).
+        Closing the generator early closes the HTTP response.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; choose from {', '.join(PRIORITIES)}")
+        limiter = self.limiter(provider, model)
+        estimate = estimate_tokens(messages, max_tokens)
+
+        def open_stream():
+            limiter.acquire(estimate, priority)
+            sent = time.monotonic()
+            try:
+                return self._send(provider, model, messages, max_tokens, stream=True, **kwargs), sent
+            except BaseException as e:
+                self._failed(limiter, estimate, e)
+                raise
+
+        stream, sent = self._retrying(limiter, None)(open_stream)
+        generated = 0
+        finished = False
+        try:
+            for event in stream:
+                delta = _stream_delta(provider, event)
+                if delta:
+                    generated += len(delta)
+                    yield delta
+            finished = True
+        except Exception:
+            limiter.errors += 1
+            raise
+        finally:
+            stream.close()
+            if finished:
+                limiter.latency.record(time.monotonic() - sent)
+            # Streams carry no usage block in these SDK versions: count ~4 characters per token
+            limiter.settle(estimate, estimate - max_tokens + generated // 4)
+
+    def hedge_delay(self, provider: str, model: str) -> float:
+        """How long to give `model` before hedging: its recent p90 once it has enough samples."""
+        latency = self.limiter(provider, model).latency
+        p90 = latency.quantile(0.9) if latency.samples >= MIN_HEDGE_SAMPLES else None
+        return max(p90 if p90 is not None else settings.LLM_HEDGE_DEFAULT_DELAY, settings.LLM_HEDGE_MIN_DELAY)
+
+    def _count_hedge(self, counter: str) -> None:
+        # Hedged calls run on many executor threads at once
+        with self._lock:
+            self.hedging[counter] += 1
+
+    def _hedged(
+        self,
+        primary: tuple[str, str],
+        fallback: tuple[str, str],
+        messages: list[dict],
+        max_tokens: int,
+        priority: str,
+        validate: Optional[Callable[[str], bool]],
+        purpose: str,
+        **kwargs,
+    ) -> tuple[tuple[str, str], str]:
+        """((provider, model) that won, reply text). The fallback starts at the hedge delay or when the primary fails."""
+        cancels = {primary: threading.Event(), fallback: threading.Event()}
+
+        def run(target: tuple[str, str]) -> str:
+            provider, model = target
+            response = self.chat(provider, model, messages, max_tokens, priority=priority, cancel=cancels[target], **kwargs)
+            return response_text(provider, response)
+
+        delay = self.hedge_delay(*primary)
+        started = time.monotonic()
+        pending = {_hedge_pool.submit(run, primary): primary}
+        outcomes: dict[tuple[str, str], object] = {}
+        hedged = False
+        self._count_hedge("calls")
+        while pending:
+            timeout = None if hedged else max(delay - (time.monotonic() - started), 0.0)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                target = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    outcomes[target] = e
+                    continue
+                if validate is None or validate(text):
+                    for loser_future, loser in pending.items():
+                        cancels[loser].set()
+                        loser_future.cancel()
+                        self.limiter(*loser).wake()
+                    if target == fallback:
+                        self._count_hedge("fallback_wins")
+                    return target, text
+                outcomes[target] = text
+            if not hedged:
+                # The primary is slower than its p90, failed, or answered something unusable
+                hedged = True
+                self._count_hedge("hedged")
+                print(
+                    f"[LLM] Hedging {purpose or 'call'}: {'/'.join(primary)} "
+                    f"{'no valid answer' if done else 'silent'} after {time.monotonic() - started:.1f}s "
+                    f"— also asking {'/'.join(fallback)}"
+                )
+                pending[_hedge_pool.submit(run, fallback)] = fallback
+
+        # Nothing valid: hand back a raw answer for the caller's error handling, else the primary's error
+        for target in (primary, fallback):
+            if isinstance(outcomes.get(target), str):
+                return target, outcomes[target]
+        raise outcomes[primary]
+
+    def complete(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        priority: str = BULK,
+        purpose: str = "",
+        cache_ttl: float = 0,
+        refresh: bool = False,
+        validate: Optional[Callable[[str], bool]] = None,
+        fallback: Optional[tuple[str, str]] = None,
+        with_source: bool = False,
+        **kwargs,
+    ):
+        """
+        chat() reduced to the reply text, answered from the response cache when cache_ttl > 0.
+        `refresh` skips the lookup and replaces the stored answer. A reply is only stored
+        when `validate(text)` passes, so an answer the caller cannot parse is not served again.
+        With a `fallback` (provider, model) the call is hedged (see _hedged); a fallback answer
+        is cached under the primary's key, since it answers the same request.
+        Returns the text, or with `with_source` (text, (provider, model)) naming who answered:
+        the fallback when the hedge won, the stored answer's model on a cache hit.
+        """
+        use_cache = cache_ttl > 0 and llm_cache.enabled
+        if use_cache:
+            temperature = kwargs.get("temperature")
+            options = {k: v for k, v in kwargs.items() if k != "temperature"}
+            key = cache_key(provider, model, messages, temperature, max_tokens, options)
+            if not refresh:
+                cached = llm_cache.lookup(key, purpose)
+                if cached is not None:
+                    text, *answered_by = cached
+                    return (text, tuple(answered_by)) if with_source else text
+        answered_by = (provider, model)
+        if fallback and settings.LLM_HEDGING_ENABLED and self.available(fallback[0]):
+            answered_by, text = self._hedged(
+                (provider, model), fallback, messages, max_tokens, priority, validate, purpose, **kwargs
+            )
+        else:
+            text = response_text(provider, self.chat(provider, model, messages, max_tokens, priority=priority, **kwargs))
+        if use_cache and (validate is None or validate(text)):
+            llm_cache.store(
+                key, text, cache_ttl, provider=answered_by[0], model=answered_by[1], purpose=purpose,
+                messages=messages, temperature=temperature, max_tokens=max_tokens, refresh=refresh,
+            )
+        return (text, answered_by) if with_source else text
+
+    def complete_stream(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        priority: str = BULK,
+        purpose: str = "",
+        cache_ttl: float = 0,
+        refresh: bool = False,
+        validate: Optional[Callable[[str], bool]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        complete() as a generator of text deltas. It shares complete()'s cache entries: a hit
+        is yielded as one piece, and a streamed answer that passes `validate` is stored once
+        the stream has ended (not when the consumer stopped early).
+        """
+        use_cache = cache_ttl > 0 and llm_cache.enabled
+        if use_cache:
+            temperature = kwargs.get("temperature")
+            options = {k: v for k, v in kwargs.items() if k != "temperature"}
+            key = cache_key(provider, model, messages, temperature, max_tokens, options)
+            if not refresh:
+                cached = llm_cache.lookup(key, purpose)
+                if cached is not None:
+                    yield cached[0]
+                    return
+        pieces = []
+        for delta in self.chat_stream(provider, model, messages, max_tokens, priority=priority, **kwargs):
+            pieces.append(delta)
+            yield delta
+        text = "".join(pieces)
+        if use_cache and (validate is None or validate(text)):
+            llm_cache.store(
+                key, text, cache_ttl, provider=provider, model=model, purpose=purpose,
+                messages=messages, temperature=temperature, max_tokens=max_tokens, refresh=refresh,
+            )
+
+    def status(self) -> dict:
+        with self._lock:
+            limiters = list(self._limiters.values())
+            hedging = dict(self.hedging)
+        return {
+            "models": [limiter.status() for limiter in limiters],
+            "hedging": {**hedging, "enabled": settings.LLM_HEDGING_ENABLED and self.available(HEDGE_FALLBACK[0])},
+        }
+
+
+llm_gateway = LLMGateway()
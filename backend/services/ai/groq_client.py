@@ -19,17 +19,14 @@ Tier 4 — OpenAI / DALL-E  (PAID — use only for image generation)
   → Use for: mockup generation, design concept images only
 
 Rule: always try Tier 1 first. Escalate only if quality insufficient.
+Every call goes through llm_gateway (services/ai/gateway.py), which holds the shared
+per-model budgets — never create a provider client in a service module.
 ======================================================
 """
 import json
 from typing import Optional
-from groq import Groq
-from openai import OpenAI
 from config import settings
-
-
-client = Groq(api_key=settings.AI_API_KEY)
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY) if getattr(settings, "OPENAI_API_KEY", None) else None
+from services.ai.gateway import BULK, llm_gateway
 
 # Tier 1: fast+free for bulk scoring
 GROQ_FAST_MODEL = "llama-3.1-8b-instant"
@@ -59,36 +56,122 @@ Scoring criteria:
 Keyword: "{keyword}"
 """
 
+BATCH_SCORE_PROMPT = """You are a Print-on-Demand (POD) trend analyst.
+
+Given a list of trending keywords or phrases, evaluate EACH one for POD product potential.
+
+Return ONLY a valid JSON array (no markdown, no explanation) with exactly one object per keyword,
+in this exact format:
+[
+  {{
+    "keyword": "<the keyword exactly as given>",
+    "score": <integer 0-10>,
+    "pod_viability": <float 0-10>,
+    "competition_level": "<low|medium|high>",
+    "ip_safe": <true|false>,
+    "product_suggestions": ["<product1>", "<product2>", "<product3>"],
+    "reasoning": "<one sentence explaining the score>"
+  }}
+]
+
+Scoring criteria:
+- 8-10: High demand, unique phrase, low competition, clearly IP safe
+- 5-7: Decent demand, moderate competition, likely IP safe
+- 2-4: Low demand OR high competition OR IP concerns
+- 0-1: No POD value OR clear IP violation (brand names, copyrighted phrases)
+
+Keywords: {keywords}
+"""
+
+SCORE_MAX_TOKENS = 300
+# Completion budget per keyword in a batch (one object ≈ 80-100 tokens)
+BATCH_ITEM_MAX_TOKENS = 120
+
+
+def validate_score(item) -> Optional[dict]:
+    """
+    Validate and normalize one score object from the model.
+    Returns a clean dict, or None if the item is malformed.
+    """
+    if not isinstance(item, dict):
+        return None
+    try:
+        score = int(round(float(item["score"])))
+        pod_viability = float(item.get("pod_viability", score))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not 0 <= score <= 10 or not 0 <= pod_viability <= 10:
+        return None
+
+    competition = str(item.get("competition_level", "")).strip().lower()
+    if competition not in ("low", "medium", "high"):
+        return None
+
+    ip_safe = item.get("ip_safe")
+    if isinstance(ip_safe, str):
+        ip_safe = ip_safe.strip().lower() == "true"
+    if not isinstance(ip_safe, bool):
+        return None
+
+    suggestions = item.get("product_suggestions") or []
+    if not isinstance(suggestions, list):
+        return None
+
+    return {
+        "score": score,
+        "pod_viability": pod_viability,
+        "competition_level": competition,
+        "ip_safe": ip_safe,
+        "product_suggestions": [str(p) for p in suggestions if p],
+        "reasoning": str(item.get("reasoning") or ""),
+    }
+
+
+def _extract_json_array(raw: str) -> list:
+    """Pull the JSON array out of a model response (tolerates code fences / leading prose)."""
+    start = raw.find("[")
+    end = raw.rfind("]") + 1
+    if start == -1 or end <= start:
+        raise ValueError("no JSON array in response")
+    data = json.loads(raw[start:end])
+    if not isinstance(data, list):
+        raise ValueError("response is not a JSON array")
+    return data
+
 
 def score_trend(keyword: str) -> Optional[dict]:
     """Score a single trend keyword using Groq with fallback to OpenAI."""
     try:
-        response = client.chat.completions.create(
-            model=GROQ_FAST_MODEL,
-            messages=[
-                {"role": "user", "content": SCORE_PROMPT.format(keyword=keyword)}
-            ],
+        response = llm_gateway.chat(
+            "groq",
+            GROQ_FAST_MODEL,
+            [{"role": "user", "content": SCORE_PROMPT.format(keyword=keyword)}],
+            max_tokens=SCORE_MAX_TOKENS,
+            priority=BULK,
             temperature=0.3,
-            max_tokens=300,
         )
         raw = response.choices[0].message.content.strip()
-        result = json.loads(raw)
+        result = validate_score(json.loads(raw))
+        if result is None:
+            raise ValueError(f"malformed score object: {raw[:100]}")
         result["model_used"] = "Groq (llama-3.1-8b)"
         return result
     except Exception as e:
         print(f"[Groq] Failed to score '{keyword}', trying fallback: {e}")
-        if openai_client:
+        if settings.OPENAI_API_KEY:
             try:
-                response = openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "user", "content": SCORE_PROMPT.format(keyword=keyword)}
-                    ],
+                response = llm_gateway.chat(
+                    "openai",
+                    "gpt-3.5-turbo",
+                    [{"role": "user", "content": SCORE_PROMPT.format(keyword=keyword)}],
+                    max_tokens=SCORE_MAX_TOKENS,
+                    priority=BULK,
                     temperature=0.3,
-                    max_tokens=300,
                 )
                 raw = response.choices[0].message.content.strip()
-                result = json.loads(raw)
+                result = validate_score(json.loads(raw))
+                if result is None:
+                    raise ValueError(f"malformed score object: {raw[:100]}")
                 result["model_used"] = "OpenAI (gpt-3.5-turbo)"
                 return result
             except Exception as e2:
@@ -96,12 +179,52 @@ def score_trend(keyword: str) -> Optional[dict]:
         return None
 
 
-def score_trends_batch(keywords: list[str]) -> list[dict]:
-    """Score a list of keywords, returning results with the keyword included."""
+def score_trends_batch(keywords: list[str], retry_malformed: bool = True) -> list[dict]:
+    """
+    Score several keywords in ONE Groq request, returning results with the keyword included.
+
+    The model answers with a JSON array keyed by keyword; each element is validated on its own.
+    Missing or malformed items are re-scored individually with score_trend
+    (pass retry_malformed=False to leave that to the caller — they are simply omitted).
+    """
+    if not keywords:
+        return []
+
+    by_keyword = {}
+    try:
+        response = llm_gateway.chat(
+            "groq",
+            GROQ_FAST_MODEL,
+            [{"role": "user", "content": BATCH_SCORE_PROMPT.format(keywords=json.dumps(keywords))}],
+            max_tokens=BATCH_ITEM_MAX_TOKENS * len(keywords),
+            priority=BULK,
+            temperature=0.3,
+        )
+        raw = response.choices[0].message.content.strip()
+        for item in _extract_json_array(raw):
+            if isinstance(item, dict) and item.get("keyword"):
+                by_keyword[str(item["keyword"]).strip().lower()] = item
+    except Exception as e:
+        print(f"[Groq] Batch scoring failed for {len(keywords)} keywords: {e}")
+
     results = []
+    malformed = []
     for keyword in keywords:
-        result = score_trend(keyword)
-        if result:
-            result["keyword"] = keyword
-            results.append(result)
+        result = validate_score(by_keyword.get(keyword.strip().lower()))
+        if result is None:
+            malformed.append(keyword)
+            continue
+        result["keyword"] = keyword
+        result["model_used"] = "Groq (llama-3.1-8b, batch)"
+        results.append(result)
+
+    if malformed:
+        print(f"[Groq] {len(malformed)}/{len(keywords)} batch items missing or malformed")
+        if retry_malformed:
+            for keyword in malformed:
+                result = score_trend(keyword)
+                if result:
+                    result["keyword"] = keyword
+                    results.append(result)
+
     return results
@@ -0,0 +1,198 @@
+"""
+Persistent LLM response cache (the llm_cache table).
+
+A completion is a pure function of its request, so call sites that a user repeats
+(re-opening a niche in the Explorer, regenerating a brief) are answered from Postgres.
+Entries are keyed by a SHA-256 of (provider, model, prompt hash, temperature, max_tokens,
+other call options). Each call site passes its own TTL. `refresh=True` skips the lookup
+and overwrites the entry with a fresh answer. The table is capped at LLM_CACHE_MAX_MB,
+and the least recently used entries go first (expired ones before anything else).
+
+Each operation opens its own session: lookups happen inside gateway calls that run in
+executor threads, outside any request session. A cache error is logged and the call goes
+to the provider uncached.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config import settings
+from db.database import SessionLocal
+from db.models import LLMCacheEntry
+
+# Eviction trims the table to this share of the cap, so the next few stores delete nothing
+EVICT_TO = 0.9
+
+
+def prompt_hash(messages: list[dict]) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def cache_key(provider: str, model: str, messages: list[dict], temperature: Optional[float], max_tokens: int,
+              options: Optional[dict] = None) -> str:
+    raw = json.dumps(
+        [provider, model, prompt_hash(messages), temperature, max_tokens, options or {}],
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Usage (inside LLMGateway.complete):
+        key = cache_key(provider, model, messages, temperature, max_tokens, options)
+        hit = llm_cache.lookup(key, purpose)  # (text, provider, model) or None
+        if hit is None:
+            text = <call the provider>
+            llm_cache.store(key, text, ttl, provider=..., model=..., purpose=..., ...)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        self.by_purpose: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.LLM_CACHE_ENABLED
+
+    def _bump(self, counter: str, n: int = 1) -> None:
+        # Lookups and stores run on many gateway worker threads at once
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _count(self, purpose: str, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            counts = self.by_purpose.setdefault(purpose, {"hits": 0, "misses": 0, "refreshes": 0})
+            counts[outcome] += 1
+
+    def lookup(self, key: str, purpose: str) -> Optional[tuple[str, str, str]]:
+        """(response, provider, model) of the stored answer if present and unexpired (and marks it recently used)."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            row = db.execute(
+                update(LLMCacheEntry)
+                .where(LLMCacheEntry.key == key, LLMCacheEntry.expires_at > now)
+                .values(hits=LLMCacheEntry.hits + 1, last_used_at=now)
+                .returning(LLMCacheEntry.response, LLMCacheEntry.provider, LLMCacheEntry.model)
+            ).first()
+            db.commit()
+        except Exception as e:
+            self._bump("errors")
+            print(f"[LLM Cache] Lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+        self._count(purpose, "hits" if row else "misses")
+        return tuple(row) if row else None
+
+    def store(self, key: str, response: str, ttl: float, provider: str, model: str, purpose: str,
+              messages: list[dict], temperature: Optional[float], max_tokens: int, refresh: bool = False) -> None:
+        """Insert or replace an entry, then evict if the table is over its cap."""
+        if refresh:
+            self._count(purpose, "refreshes")
+        now = datetime.utcnow()
+        values = {
+            "key": key,
+            "provider": provider,
+            "model": model,
+            "purpose": purpose,
+            "prompt_hash": prompt_hash(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response": response,
+            "size_bytes": len(response.encode()),
+            "hits": 0,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+            "last_used_at": now,
+        }
+        db = SessionLocal()
+        try:
+            stmt = pg_insert(LLMCacheEntry).values(**values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[LLMCacheEntry.key],
+                set_={k: stmt.excluded[k] for k in values if k != "key"},
+            ))
+            db.commit()
+            self._bump("stores")
+            self._evict(db)
+        except Exception as e:
+            db.rollback()
+            self._bump("errors")
+            print(f"[LLM Cache] Store failed: {e}")
+        finally:
+            db.close()
+
+    def _evict(self, db) -> None:
+        now = datetime.utcnow()
+        expired = db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now)).rowcount
+        total = db.scalar(select(func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0)))
+        removed = []
+        if total > self.max_bytes:
+            excess = total - self.max_bytes * EVICT_TO
+            rows = db.execute(
+                select(LLMCacheEntry.key, LLMCacheEntry.size_bytes).order_by(LLMCacheEntry.last_used_at)
+            )
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                removed.append(key)
+                excess -= size
+            db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(removed)))
+        db.commit()
+        self._bump("evictions", expired + len(removed))
+
+    def clear(self, purpose: Optional[str] = None) -> int:
+        """Drop every entry (or one call site's); returns how many were removed."""
+        db = SessionLocal()
+        try:
+            stmt = delete(LLMCacheEntry)
+            if purpose:
+                stmt = stmt.where(LLMCacheEntry.purpose == purpose)
+            removed = db.execute(stmt).rowcount
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def status(self) -> dict:
+        db = SessionLocal()
+        try:
+            entries, size = db.execute(
+                select(func.count(), func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0)).select_from(LLMCacheEntry)
+            ).one()
+        except Exception as e:
+            print(f"[LLM Cache] Status query failed: {e}")
+            entries, size = None, None
+        finally:
+            db.close()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "refreshes": self.refreshes,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "by_purpose": {p: dict(c) for p, c in self.by_purpose.items()},
+        }
+
+
+llm_cache = LLMCache(max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024)
@@ -8,14 +8,14 @@ LLM USAGE:
 - Polish (premium mode): Claude claude-3-haiku (Tier 3 — paid, sparingly)
 """
 import json
-from groq import Groq
-from config import settings
-
-client = Groq(api_key=settings.AI_API_KEY)
+from services.ai.gateway import BULK, HEDGE_FALLBACK, INTERACTIVE, llm_gateway
 
 FAST_MODEL = "llama-3.1-8b-instant"
 SMART_MODEL = "llama-3.3-70b-versatile"
 
+# SEO for an unchanged title + description is reused (the product text is part of the cache key)
+SEO_CACHE_TTL = 7 * 24 * 3600
+
 
 # V2 PROMPT: More structured, platform-aware, and enforces POD best practices.
 SHOPIFY_SEO_PROMPT = """You are an elite e-commerce SEO specialist specializing in Print-on-Demand (POD).
@@ -54,15 +54,38 @@ Existing Description: "{description}"
 """
 
 
+def _parse_seo(raw: str) -> dict:
+    """The model's JSON answer (markdown code fences stripped)."""
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.split("```")[1]
+        if raw.startswith("json"):
+            raw = raw[4:]
+    return json.loads(raw.strip())
+
+
+def _parses(raw: str) -> bool:
+    try:
+        _parse_seo(raw)
+        return True
+    except (ValueError, IndexError):
+        return False
+
+
 def generate_seo(
     title: str,
     description: str = "",
     platform: str = "shopify",
     use_smart_model: bool = False,
+    priority: str = INTERACTIVE,
+    refresh: bool = False,
 ) -> dict:
     """
     Generate SEO content for a product.
     By default uses Tier 1 (free, fast). Pass use_smart_model=True for Tier 2.
+    A single preview is interactive (and hedged to OpenAI when Groq is slow); bulk_generate_seo
+    queues its calls behind interactive ones.
+    Answers come from the LLM response cache unless refresh=True.
     """
     model = SMART_MODEL if use_smart_model else FAST_MODEL
 
@@ -79,23 +102,25 @@ def generate_seo(
         context_instr=context_instr
     )
 
+    raw = ""
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
+        raw, (_, model_used) = llm_gateway.complete(
+            "groq",
+            model,
+            [{"role": "user", "content": prompt}],
             max_tokens=1200,
+            priority=priority,
+            purpose="seo",
+            cache_ttl=SEO_CACHE_TTL,
+            refresh=refresh,
+            validate=_parses,
+            fallback=HEDGE_FALLBACK if priority == INTERACTIVE else None,
+            temperature=0.5,
+            with_source=True,
         )
-        raw = response.choices[0].message.content.strip()
-
-        # Strip markdown code fences if model adds them
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-
-        result = json.loads(raw.strip())
-        result["model_used"] = model
+        result = _parse_seo(raw)
+        # The hedge's fallback may have answered, now or when the cached answer was stored
+        result["model_used"] = model_used
         return result
 
     except json.JSONDecodeError as e:
@@ -121,7 +146,7 @@ def bulk_generate_seo(
         description = product.get("body_html", "")
 
         print(f"[SEO] Generating for: {title[:60]}")
-        seo = generate_seo(title, description, platform, use_smart_model)
+        seo = generate_seo(title, description, platform, use_smart_model, priority=BULK)
 
         results.append({
             "product_id": product_id,
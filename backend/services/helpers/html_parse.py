@@ -0,0 +1,126 @@
+"""
+Pluggable HTML extraction for the scrapers that read server-rendered pages (Redbubble
+explore tags, Etsy search listings).
+
+Backends:
+    lxml     — C-backed libxml2 parser with XPath; parsing mostly runs outside the GIL
+    strainer — BeautifulSoup (html.parser) with a SoupStrainer, so only the matching
+               elements are built into a tree
+    soup     — full BeautifulSoup tree (the original behaviour; kept as a benchmark baseline)
+
+settings.HTML_PARSER picks one; "auto" uses lxml when it is installed and falls back to strainer.
+Every backend returns the same plain data, so callers never touch a parser object.
+"""
+import re
+from typing import Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from config import settings
+
+# Etsy listing cards: a <div> with a class containing this
+LISTING_CARD_CLASS = "listing-card"
+_LISTING_CARD_RE = re.compile(LISTING_CARD_CLASS)
+
+
+def _listing(title: Optional[str], price: Optional[str], url: Optional[str]) -> Optional[dict]:
+    if title is None or price is None:
+        return None
+    return {"title": title.strip(), "price": price.strip(), "url": url}
+
+
+class SoupBackend:
+    """Full-tree BeautifulSoup."""
+
+    name = "soup"
+
+    def _soup(self, html: str, strainer: Optional[SoupStrainer]) -> BeautifulSoup:
+        return BeautifulSoup(html, "html.parser")
+
+    def link_texts(self, html: str, href_contains: str) -> list[str]:
+        """Text of every <a> whose href contains `href_contains`, in page order."""
+        pattern = re.compile(re.escape(href_contains))
+        soup = self._soup(html, SoupStrainer("a", href=pattern))
+        return [link.text for link in soup.find_all("a", href=pattern)]
+
+    def listing_cards(self, html: str, limit: int) -> list[dict]:
+        """{"title", "price", "url"} of the first `limit` listing cards that have a title and price."""
+        soup = self._soup(html, SoupStrainer("div", class_=_LISTING_CARD_RE))
+        listings = []
+        for item in soup.find_all("div", class_=_LISTING_CARD_RE)[:limit]:
+            title = item.find("h3") or item.find("h2")
+            price = item.find("span", class_="currency-value")
+            link = item.find("a")
+            listing = _listing(
+                title.text if title else None,
+                price.text if price else None,
+                link.get("href") if link else None,
+            )
+            if listing:
+                listings.append(listing)
+        return listings
+
+
+class StrainerBackend(SoupBackend):
+    """BeautifulSoup that only builds the elements the extraction looks at."""
+
+    name = "strainer"
+
+    def _soup(self, html: str, strainer: Optional[SoupStrainer]) -> BeautifulSoup:
+        return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+
+class LxmlBackend:
+    """libxml2 via lxml.html, queried with XPath."""
+
+    name = "lxml"
+
+    # Same match as BeautifulSoup's class_=re.compile("listing-card"): any class containing it
+    _CARDS = f"//div[contains(@class, '{LISTING_CARD_CLASS}')]"
+    _PRICE = ".//span[contains(concat(' ', normalize-space(@class), ' '), ' currency-value ')]"
+
+    def __init__(self):
+        import lxml.html
+        self._html = lxml.html
+
+    def _tree(self, html: str):
+        # lxml rejects str input that carries an XML encoding declaration
+        return self._html.fromstring(html.encode("utf-8"), parser=self._html.HTMLParser(encoding="utf-8"))
+
+    def link_texts(self, html: str, href_contains: str) -> list[str]:
+        tree = self._tree(html)
+        return [a.text_content() for a in tree.xpath("//a[contains(@href, $needle)]", needle=href_contains)]
+
+    def listing_cards(self, html: str, limit: int) -> list[dict]:
+        tree = self._tree(html)
+        listings = []
+        for item in tree.xpath(self._CARDS)[:limit]:
+            title = item.xpath(".//h3") or item.xpath(".//h2")
+            price = item.xpath(self._PRICE)
+            link = item.xpath(".//a")
+            listing = _listing(
+                title[0].text_content() if title else None,
+                price[0].text_content() if price else None,
+                link[0].get("href") if link else None,
+            )
+            if listing:
+                listings.append(listing)
+        return listings
+
+
+BACKENDS = {"lxml": LxmlBackend, "strainer": StrainerBackend, "soup": SoupBackend}
+_instances: dict = {}
+
+
+def get_backend(name: Optional[str] = None):
+    """The configured backend (settings.HTML_PARSER) or the one named, falling back to strainer without lxml."""
+    name = name or settings.HTML_PARSER
+    if name == "auto":
+        name = "lxml"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser {name!r}; choose from auto, {', '.join(BACKENDS)}")
+    if name not in _instances:
+        try:
+            _instances[name] = BACKENDS[name]()
+        except ImportError:
+            print(f"[HTML] {name} backend unavailable (lxml not installed) — using strainer")
+            _instances[name] = StrainerBackend()
+    return _instances[name]
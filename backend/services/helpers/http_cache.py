@@ -0,0 +1,244 @@
+"""
+On-disk response cache for the shared scraper HTTP layer (services/helpers/http_pool.py).
+
+Entries are addressed by a SHA-256 of the request (method, normalized URL, and headers)
+and stored as two files, <key>.json (status, headers, validators, stored_at) and
+<key>.body. A fresh entry is served without touching the network. A stale one is
+revalidated with If-None-Match / If-Modified-Since, and a 304 answer just renews it.
+The directory is capped at a byte budget, and the least recently used entries go first.
+
+Modes (settings.HTTP_CACHE_MODE):
+    normal — serve fresh entries, revalidate stale ones, and store 200s (ttl > 0 only)
+    record — always hit the network and store every 200, whatever the TTL
+    replay — never hit the network: serve any stored entry, and a miss is a 504
+    off    — no caching
+
+Reads and writes are blocking file I/O; HttpPool runs them in the default executor, so
+the index is guarded by a lock.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import httpx
+from config import settings
+
+MODES = ("normal", "record", "replay", "off")
+
+# Per-session or per-revalidation values that must not split the cache
+VOLATILE_HEADERS = {"cookie", "x-csrftoken", "if-none-match", "if-modified-since", "cache-control", "pragma"}
+
+# The body is stored decoded, so the framing headers of the original response no longer apply
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "http_cache")
+
+
+def normalize_url(url: str, params: Optional[dict] = None) -> str:
+    """Lowercase scheme/host, drop the fragment and default ports, and sort the query (params merged in)."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items() if v is not None]
+    netloc = (parts.hostname or "").lower()
+    if parts.port and not ((parts.scheme == "http" and parts.port == 80) or (parts.scheme == "https" and parts.port == 443)):
+        netloc += f":{parts.port}"
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+def cache_key(method: str, url: str, headers: Optional[dict] = None, params: Optional[dict] = None,
+              variant: str = "") -> str:
+    """`variant` separates entries that hold something other than the full body (e.g. a streamed prefix)."""
+    stable = sorted(
+        (k.lower(), str(v)) for k, v in (headers or {}).items() if k.lower() not in VOLATILE_HEADERS
+    )
+    raw = json.dumps([method.upper(), normalize_url(url, params), stable, variant], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class HttpCache:
+    """
+    Usage (inside HttpPool.request):
+        entry = http_cache.lookup(cache_key("GET", url, headers))
+        if entry and entry.fresh(ttl):
+            return entry.response(request, "HIT")
+    """
+
+    def __init__(self, directory: str, max_bytes: int, mode: str = "normal"):
+        if mode not in MODES:
+            raise ValueError(f"HTTP cache mode must be one of {MODES}, got {mode!r}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._index: Optional[dict[str, list]] = None  # key -> [size_bytes, last_used]
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def _load_index(self) -> dict[str, list]:
+        """Scan the directory once per process; the metadata file's mtime is the entry's last use."""
+        with self._lock:
+            if self._index is None:
+                index = {}
+                if os.path.isdir(self.directory):
+                    for root, _, files in os.walk(self.directory):
+                        for name in files:
+                            if not name.endswith(".json"):
+                                continue
+                            key = name[:-5]
+                            meta_path, body_path = self._paths(key)
+                            try:
+                                size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+                                index[key] = [size, os.path.getmtime(meta_path)]
+                            except OSError:
+                                continue
+                self._index = index
+            return self._index
+
+    def lookup(self, key: str) -> Optional["CacheEntry"]:
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        self.touch(key)
+        return CacheEntry(key, meta, body)
+
+    def touch(self, key: str) -> None:
+        now = time.time()
+        index = self._load_index()
+        with self._lock:
+            if key in index:
+                index[key][1] = now
+        try:
+            os.utime(self._paths(key)[0], (now, now))
+        except OSError:
+            pass
+
+    def store(self, key: str, url: str, response: httpx.Response) -> None:
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": [
+                (k, v) for k, v in response.headers.multi_items() if k.lower() not in DROPPED_RESPONSE_HEADERS
+            ],
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "stored_at": time.time(),
+        }
+        self._write(key, meta, response.content)
+
+    def renew(self, entry: "CacheEntry") -> None:
+        """A 304 confirmed the stored body — restart its TTL."""
+        entry.meta["stored_at"] = time.time()
+        self._write(entry.key, entry.meta, entry.body)
+
+    def _write(self, key: str, meta: dict, body: bytes) -> None:
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        encoded = json.dumps(meta).encode()
+        try:
+            # Body first, metadata last: a crash in between leaves an entry lookup() ignores
+            for path, data in ((body_path, body), (meta_path, encoded)):
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+        except OSError as e:
+            print(f"[HTTP Cache] Could not write {key[:12]}: {e}")
+            return
+        with self._lock:
+            self._load_index()[key] = [len(encoded) + len(body), time.time()]
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._load_index().pop(key, None)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries down to the cap (caller holds the lock)."""
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            self._remove(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> int:
+        with self._lock:
+            keys = list(self._load_index())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def status(self) -> dict:
+        with self._lock:
+            index = self._load_index()
+            entries, size = len(index), sum(size for size, _ in index.values())
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+
+class CacheEntry:
+    def __init__(self, key: str, meta: dict, body: bytes):
+        self.key = key
+        self.meta = meta
+        self.body = body
+
+    def age(self) -> float:
+        return time.time() - self.meta.get("stored_at", 0)
+
+    def fresh(self, ttl: float) -> bool:
+        return ttl > 0 and self.age() < ttl
+
+    def validators(self) -> dict:
+        """Conditional-GET headers for revalidating this entry."""
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+    def response(self, request: httpx.Request, source: str) -> httpx.Response:
+        headers = httpx.Headers(self.meta.get("headers", []))
+        headers["X-Cache"] = source
+        return httpx.Response(self.meta["status"], headers=headers, content=self.body, request=request)
+
+
+http_cache = HttpCache(
+    directory=settings.HTTP_CACHE_DIR or DEFAULT_CACHE_DIR,
+    max_bytes=settings.HTTP_CACHE_MAX_MB * 1024 * 1024,
+    mode=settings.HTTP_CACHE_MODE,
+)
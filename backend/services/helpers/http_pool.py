@@ -0,0 +1,260 @@
+"""
+Shared async HTTP layer for scrapers and research fetchers.
+
+One pooled httpx.AsyncClient (keep-alive connections, optional HTTP/2) instead of a new
+client per call, so repeat requests to a host skip the TCP/TLS handshake. Each host
+gets its own default headers and a concurrency limit, so a source can fire all its
+regions/seeds at once without hammering the site.
+
+GETs go through the on-disk response cache (services/helpers/http_cache.py) when the host
+or the call sets a TTL, or when the cache is recording/replaying.
+"""
+import asyncio
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+import httpx
+from config import settings
+from services.helpers.http_cache import DROPPED_RESPONSE_HEADERS, CacheEntry, HttpCache, cache_key, http_cache
+
+
+async def _close_on_shutdown(client: httpx.AsyncClient):
+    """
+    Parked on the client's loop. Loop shutdown (asyncio.run) finalizes pending async
+    generators, which closes the client there: its connections can't be closed from
+    another loop once this one is gone.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+class HttpPool:
+    """
+    Usage:
+        http_pool.configure_host("ads.tiktok.com", headers=HEADERS, concurrency=5)
+        http_pool.configure_host("trends.pinterest.com", cache_ttl=6 * 3600)
+        response = await http_pool.get("https://ads.tiktok.com/...", timeout=30)
+        response = await http_pool.get(search_url, cache_ttl=3600)  # per-call TTL
+
+    The client and semaphores belong to the event loop that first used them; a new loop
+    (e.g. a script's asyncio.run) gets fresh ones. Each client is closed on its own loop,
+    when that loop shuts down or from the next one if it is still running elsewhere.
+    """
+
+    def __init__(self, max_connections: int, per_host_concurrency: int, http2: bool = False,
+                 cache: Optional[HttpCache] = None):
+        self.max_connections = max_connections
+        self.per_host_concurrency = per_host_concurrency
+        self.http2 = http2
+        self.cache = cache
+        self._host_headers: dict[str, dict] = {}
+        self._host_limits: dict[str, int] = {}
+        self._host_ttls: dict[str, float] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closer = None
+
+    def configure_host(self, host: str, headers: Optional[dict] = None, concurrency: Optional[int] = None,
+                       cache_ttl: Optional[float] = None) -> None:
+        """Default headers, max in-flight requests and response-cache TTL (seconds) for one host."""
+        if headers:
+            self._host_headers.setdefault(host, {}).update(headers)
+        if concurrency:
+            self._host_limits[host] = concurrency
+            self._semaphores.pop(host, None)
+        if cache_ttl is not None:
+            self._host_ttls[host] = cache_ttl
+
+    def _http2_available(self) -> bool:
+        if not self.http2:
+            return False
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            print("[HTTP] HTTP/2 requested but the h2 package is missing — using HTTP/1.1")
+            self.http2 = False
+            return False
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            stale = self._client
+            if stale is not None and not stale.is_closed and self._loop.is_running():
+                # Its loop lives on in another thread: close it there
+                asyncio.run_coroutine_threadsafe(stale.aclose(), self._loop)
+            self._client = httpx.AsyncClient(
+                http2=self._http2_available(),
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._loop = loop
+            self._semaphores = {}
+            # Held here: the loop only keeps a weak reference to pending async generators
+            self._closer = _close_on_shutdown(self._client)
+            asyncio.ensure_future(self._closer.__anext__())
+        return self._client
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._host_limits.get(host, self.per_host_concurrency))
+        return self._semaphores[host]
+
+    def _cache_for(self, method: str, ttl: float) -> Optional[HttpCache]:
+        cache = self.cache
+        if method.upper() != "GET" or cache is None or not cache.enabled or (ttl <= 0 and cache.mode == "normal"):
+            return None
+        return cache
+
+    @staticmethod
+    async def _cached(cache: HttpCache, key: str, ttl: float, request: httpx.Request) -> tuple[Optional[httpx.Response], Optional[CacheEntry]]:
+        """
+        A response served without the network (hit, replay or replay miss), else the stale entry
+        to revalidate. Entries can be hundreds of KB, so the file reads run in the default executor.
+        """
+        entry = None
+        if cache.mode != "record":
+            entry = await asyncio.get_running_loop().run_in_executor(None, cache.lookup, key)
+        if cache.mode == "replay":
+            if entry is None:
+                cache.misses += 1
+                return httpx.Response(504, headers={"X-Cache": "MISS"}, text="Not in the replay cache", request=request), None
+            cache.hits += 1
+            return entry.response(request, "REPLAY"), entry
+        if entry is not None and entry.fresh(ttl):
+            cache.hits += 1
+            return entry.response(request, "HIT"), entry
+        return None, entry
+
+    @staticmethod
+    async def _settle(cache: HttpCache, key: str, entry: Optional[CacheEntry], response: httpx.Response,
+                      request: httpx.Request) -> httpx.Response:
+        """Renew the entry on a 304, store a 200 (file writes in the default executor)."""
+        loop = asyncio.get_running_loop()
+        if response.status_code == 304 and entry is not None:
+            cache.revalidated += 1
+            await loop.run_in_executor(None, cache.renew, entry)
+            return entry.response(request, "REVALIDATED")
+        cache.misses += 1
+        if response.status_code == 200:
+            await loop.run_in_executor(None, cache.store, key, str(response.url), response)
+        return response
+
+    async def request(self, method: str, url: str, headers: Optional[dict] = None,
+                      cache_ttl: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request with the host's default headers, waiting for a free per-host slot.
+        Cached responses carry an X-Cache header (HIT, REVALIDATED or REPLAY).
+        """
+        client = self.client()
+        host = urlsplit(url).hostname or ""
+        merged = {**self._host_headers.get(host, {}), **(headers or {})}
+        ttl = self._host_ttls.get(host, 0) if cache_ttl is None else cache_ttl
+        cache = self._cache_for(method, ttl)
+        if cache is None:
+            async with self._semaphore(host):
+                return await client.request(method, url, headers=merged, **kwargs)
+
+        key = cache_key(method, url, merged, kwargs.get("params"))
+        request = client.build_request(method, url, headers=merged, params=kwargs.get("params"))
+        cached, entry = await self._cached(cache, key, ttl, request)
+        if cached is not None:
+            return cached
+        conditional = entry.validators() if entry is not None else {}
+        async with self._semaphore(host):
+            response = await client.request(method, url, headers={**merged, **conditional}, **kwargs)
+        return await self._settle(cache, key, entry, response, request)
+
+    async def get_prefix(self, url: str, until: Callable[[bytes], bool], headers: Optional[dict] = None,
+                         cache_ttl: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        GET that streams the body into `until(chunk)` and closes the connection as soon as it
+        returns True, so the rest of a large page is never downloaded. `until` sees the same
+        bytes whether they come from the network or the cache. The response's content is
+        the prefix that was read; it is cached as such, apart from full-page entries.
+        Non-200 bodies are not read.
+        """
+        client = self.client()
+        host = urlsplit(url).hostname or ""
+        merged = {**self._host_headers.get(host, {}), **(headers or {})}
+        ttl = self._host_ttls.get(host, 0) if cache_ttl is None else cache_ttl
+        cache = self._cache_for("GET", ttl)
+        request = client.build_request("GET", url, headers=merged, params=kwargs.get("params"))
+        key = cache_key("GET", url, merged, kwargs.get("params"), variant="prefix")
+        entry = None
+        if cache is not None:
+            cached, entry = await self._cached(cache, key, ttl, request)
+            if cached is not None:
+                if cached.status_code == 200:
+                    until(cached.content)
+                return cached
+
+        conditional = entry.validators() if entry is not None else {}
+        prefix = bytearray()
+        async with self._semaphore(host):
+            async with client.stream("GET", url, headers={**merged, **conditional}, **kwargs) as streamed:
+                if streamed.status_code == 200:
+                    async for chunk in streamed.aiter_bytes():
+                        prefix += chunk
+                        if until(chunk):
+                            break
+                response_headers = [
+                    (k, v) for k, v in streamed.headers.multi_items() if k.lower() not in DROPPED_RESPONSE_HEADERS
+                ]
+                response = httpx.Response(
+                    streamed.status_code, headers=response_headers, content=bytes(prefix), request=streamed.request
+                )
+        if cache is None:
+            return response
+        response = await self._settle(cache, key, entry, response, request)
+        if response.headers.get("X-Cache") == "REVALIDATED":
+            until(response.content)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    @staticmethod
+    def _cookie_applies(cookie_domain: str, host: str) -> bool:
+        domain = cookie_domain.lstrip(".")
+        return host == domain or host.endswith("." + domain)
+
+    def cookie(self, name: str, host: str) -> Optional[str]:
+        """Value of a cookie the shared jar holds for `host` (including parent-domain cookies)."""
+        for c in self.client().cookies.jar:
+            if c.name == name and self._cookie_applies(c.domain, host):
+                return c.value
+        return None
+
+    def export_cookies(self, host: str) -> list[dict]:
+        """The cookies sent to `host`, as plain data (e.g. to persist a logged-in session)."""
+        return [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expires": c.expires}
+            for c in self.client().cookies.jar
+            if self._cookie_applies(c.domain, host)
+        ]
+
+    def import_cookies(self, cookies: list[dict]) -> None:
+        """Put exported cookies back into the shared jar."""
+        jar = self.client().cookies
+        for c in cookies:
+            jar.set(c["name"], c["value"], domain=c["domain"], path=c.get("path") or "/")
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._closer = None
+
+
+http_pool = HttpPool(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    per_host_concurrency=settings.HTTP_PER_HOST_CONCURRENCY,
+    http2=settings.HTTP2_ENABLED,
+    cache=http_cache,
+)
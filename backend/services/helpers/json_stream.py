@@ -0,0 +1,113 @@
+"""
+Incremental parser for a JSON array or object that arrives in pieces (LLM token streams).
+
+Feed it text as it comes; feed() returns what completed in that piece:
+    array  — each element, the moment its closing brace/bracket arrives
+             (scalars when the following ',' or ']' does)
+    object — each top-level (key, value) pair, as soon as its value is complete
+
+Anything before the opening bracket (prose, a ```json fence) is skipped, the same way the
+non-streaming callers look for the first '[' / '{'. A malformed element is counted in
+`errors` and skipped, and parsing goes on with the next one.
+"""
+import json
+from typing import Any
+
+OPENERS = {"array": "[", "object": "{"}
+
+
+class JsonStreamParser:
+    """
+    Usage:
+        parser = JsonStreamParser("array")
+        for delta in token_stream:
+            for design in parser.feed(delta):
+                send(design)
+        parser.done  # True once the closing ']' arrived
+    """
+
+    def __init__(self, kind: str = "array"):
+        if kind not in OPENERS:
+            raise ValueError(f"Unknown JSON kind {kind!r}; choose from {', '.join(OPENERS)}")
+        self.kind = kind
+        self.items: list[Any] = []
+        self.errors = 0
+        self.done = False
+        self._buf = ""
+        self._pos = 0  # next character to scan
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None  # where the element / member being read began
+
+    def feed(self, text: str) -> list[Any]:
+        if self.done or not text:
+            return []
+        self._buf += text
+        if not self._started:
+            start = self._buf.find(OPENERS[self.kind], self._pos)
+            if start < 0:
+                self._pos = len(self._buf)
+                return []
+            self._started = True
+            self._depth = 1
+            self._pos = start + 1
+            self._item_start = self._pos
+        completed = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    # End of the whole document: flush a trailing scalar element / member
+                    self._complete(self._item_start, i, completed)
+                    self.done = True
+                    i += 1
+                    break
+                if self._depth == 1:
+                    # A nested object/array just closed: that is a whole element (or member value)
+                    self._complete(self._item_start, i + 1, completed)
+                    self._item_start = None
+            elif ch == "," and self._depth == 1:
+                if self._item_start is not None:
+                    self._complete(self._item_start, i, completed)
+                self._item_start = i + 1
+            i += 1
+        self._pos = i
+        # Keep the buffer short: nothing before the current element is needed again
+        keep = self._pos if self._item_start is None else self._item_start
+        if keep > 4096:
+            self._buf = self._buf[keep:]
+            self._pos -= keep
+            if self._item_start is not None:
+                self._item_start -= keep
+        self.items.extend(completed)
+        return completed
+
+    def _complete(self, start, end, completed: list) -> None:
+        if start is None:
+            return
+        raw = self._buf[start:end].strip()
+        if not raw:
+            return
+        try:
+            if self.kind == "array":
+                completed.append(json.loads(raw))
+            else:
+                completed.append(next(iter(json.loads("{" + raw + "}").items())))
+        except (ValueError, StopIteration):
+            self.errors += 1
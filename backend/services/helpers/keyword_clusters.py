@@ -0,0 +1,91 @@
+"""
+Near-duplicate keyword clustering with MinHash + LSH.
+
+Keywords are compared on their niche words plus character 4-grams of the run-together
+niche (so "cottage core" and "cottagecore" overlap). Product/filler words like
+"gift" or "shirt" are ignored, so "cat mom life gifts" lands with "cat mom life".
+"""
+import random
+import zlib
+from typing import Optional
+from services.helpers.keywords import niche_words
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: keys with ~0.6 similarity collide in a band ~90% of the time
+SIMILARITY_THRESHOLD = 0.6
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(key: str) -> set[str]:
+    """Word and character 4-gram features of a canonical key."""
+    words = niche_words(key)
+    compact = "".join(words)
+    features = {f"w:{w}" for w in words}
+    features.update(compact[i:i + 4] for i in range(max(len(compact) - 3, 1)))
+    return features
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(features: set[str]) -> list[int]:
+    hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+class KeywordClusters:
+    """
+    Incremental clustering: each added key joins the cluster of its most similar
+    earlier key (verified by exact Jaccard), or starts a new one. The first key of a
+    cluster stays its representative, so add keys best-first when that matters.
+
+    Usage:
+        clusters = KeywordClusters()
+        clusters.add("cat mom life")       # "cat mom life"
+        clusters.add("cat mom life gift")  # "cat mom life"
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._rep: dict[str, str] = {}
+        self._features: dict[str, set[str]] = {}
+        self._buckets: dict[tuple, list[str]] = {}
+        self.members: dict[str, list[str]] = {}
+
+    def representative(self, key: str) -> Optional[str]:
+        return self._rep.get(key)
+
+    def add(self, key: str) -> str:
+        """Add a canonical key and return the representative of its cluster."""
+        if key in self._rep:
+            return self._rep[key]
+
+        features = shingles(key)
+        signature = minhash(features)
+        rows = NUM_PERM // BANDS
+        bands = [(i, tuple(signature[i * rows:(i + 1) * rows])) for i in range(BANDS)]
+
+        best, best_sim = None, self.threshold
+        checked = set()
+        for band in bands:
+            for other in self._buckets.get(band, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                sim = jaccard(features, self._features[other])
+                if sim >= best_sim:
+                    best, best_sim = other, sim
+
+        rep = self._rep[best] if best else key
+        self._rep[key] = rep
+        self._features[key] = features
+        self.members.setdefault(rep, []).append(key)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(key)
+        return rep
@@ -0,0 +1,189 @@
+"""
+Keyword normalization shared by the scrapers, the trend pipeline and the DB.
+The canonical form is what the unique index on trends.keyword_normalized is built on.
+"""
+import math
+import os
+import re
+import string
+from functools import lru_cache
+from typing import Iterable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_APOSTROPHES = re.compile(r"['’`]")
+
+WORDS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "segment_words.txt")
+
+# Dropped from canonical keys — "gifts for a cat mom" and "cat mom gifts" are one trend
+STOPWORDS = {"a", "an", "the", "of", "for", "and", "&", "with", "to", "in", "on", "at", "by"}
+
+# Product / filler words: part of the keyword, but they don't tell two niches apart
+GENERIC_WORDS = {
+    "gift", "idea", "shirt", "tshirt", "t-shirt", "tee", "hoodie", "sweatshirt", "mug",
+    "sticker", "poster", "print", "design", "quote", "saying", "funny", "cute", "aesthetic",
+    "my", "your", "is", "it", "i", "me", "you", "we", "our",
+}
+
+# Tokens shorter than this are never split into words
+MIN_SEGMENT_LEN = 6
+
+# Words ending in "s" that are not plurals (or have no singular worth folding to)
+NON_PLURALS = {
+    "christmas", "texas", "kansas", "arkansas", "atlas", "canvas", "news", "series", "species",
+    "always", "perhaps", "chaos", "physics", "mathematics", "gymnastics", "athletics", "politics",
+    "economics", "lens", "yes", "thanks", "pajamas", "overalls",
+}
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Normalize a keyword for identity checks: case-folded, trimmed, single-spaced.
+
+    Example:
+        normalize_keyword("  Cat Mom   Life ")  # "cat mom life"
+    """
+    return _WHITESPACE.sub(" ", (keyword or "").casefold()).strip()
+
+
+def singularize(word: str) -> str:
+    """
+    Rule-based plural → singular, good enough to fold "gifts"/"gift" and "puppies"/"puppy".
+
+    Example:
+        singularize("boxes")  # "box"
+        singularize("christmas")  # "christmas"
+    """
+    if len(word) <= 3 or not word.isalpha() or word in NON_PLURALS:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+class WordSegmenter:
+    """
+    Splits run-together hashtags ("catmomlife") into words with a dynamic program over
+    a frequency-ranked word list: each word costs log(rank), so common words win.
+    Only splits where every piece is a known word are accepted.
+
+    Usage:
+        segmenter = WordSegmenter.default().copy()
+        segmenter.learn(["stoic mindset"])  # vocabulary seen in this run
+        segmenter.split("stoicmindset")  # ["stoic", "mindset"]
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._cost: dict[str, float] = {}
+        for word in words:
+            if word not in self._cost:
+                self._cost[word] = math.log((len(self._cost) + 1) * 2)
+        self._learned_cost = math.log((len(self._cost) + 1) * 2)
+        self._max_len = max((len(w) for w in self._cost), default=1)
+
+    @classmethod
+    def default(cls) -> "WordSegmenter":
+        return _default_segmenter()
+
+    def copy(self) -> "WordSegmenter":
+        clone = WordSegmenter([])
+        clone._cost = dict(self._cost)
+        clone._learned_cost = self._learned_cost
+        clone._max_len = self._max_len
+        return clone
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._cost
+
+    def learn(self, keywords: Iterable[str]) -> None:
+        """Add the words of multi-word keywords (they show where the word breaks are)."""
+        for keyword in keywords:
+            words = normalize_keyword(keyword).split()
+            if len(words) < 2:
+                continue
+            for word in words:
+                word = word.strip(string.punctuation)
+                if word.isalpha() and len(word) > 1 and word not in self._cost:
+                    self._cost[word] = self._learned_cost
+                    self._max_len = max(self._max_len, len(word))
+
+    def split(self, token: str) -> Optional[list[str]]:
+        """Cheapest split of `token` into known words, or None if there isn't one."""
+        n = len(token)
+        best: list[tuple[float, int]] = [(0.0, 0)] + [(math.inf, 0)] * n
+        for end in range(1, n + 1):
+            for start in range(max(0, end - self._max_len), end):
+                cost = self._cost.get(token[start:end])
+                if cost is not None and best[start][0] + cost < best[end][0]:
+                    best[end] = (best[start][0] + cost, start)
+        if best[n][0] == math.inf:
+            return None
+        words = []
+        end = n
+        while end > 0:
+            start = best[end][1]
+            words.append(token[start:end])
+            end = start
+        return words[::-1]
+
+
+@lru_cache(maxsize=1)
+def _default_segmenter() -> WordSegmenter:
+    with open(WORDS_PATH, encoding="utf-8") as f:
+        words = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return WordSegmenter(words)
+
+
+def niche_words(key: str) -> list[str]:
+    """
+    The words of a canonical key that identify the niche (product/filler words removed).
+
+    Example:
+        niche_words("funny cat mom gift")  # ["cat", "mom"]
+    """
+    words = key.split()
+    return [w for w in words if w not in GENERIC_WORDS and w not in STOPWORDS] or words
+
+
+def _words(keyword: str, segmenter: WordSegmenter) -> list[str]:
+    """Normalized words of a keyword, with run-together hashtags split apart."""
+    key = normalize_keyword(_APOSTROPHES.sub("", keyword or "")).replace("#", " ")
+    words = []
+    for token in key.split():
+        token = token.strip(string.punctuation)
+        if not token:
+            continue
+        pieces = None
+        if len(token) >= MIN_SEGMENT_LEN and token.isalpha() and token not in segmenter:
+            pieces = segmenter.split(token)
+        words.extend(pieces or [token])
+    return words
+
+
+def segment_keyword(keyword: str, segmenter: Optional[WordSegmenter] = None) -> str:
+    """
+    Readable form of a keyword: normalized and hashtags split into words, but every word
+    kept as written. This is what gets scored and shown; canonical_key() is its identity.
+
+    Example:
+        segment_keyword("#ChristmasVibes")  # "christmas vibes"
+        segment_keyword("mothersday")  # "mothers day"
+    """
+    return " ".join(_words(keyword, segmenter or WordSegmenter.default())) or normalize_keyword(keyword)
+
+
+def canonical_key(keyword: str, segmenter: Optional[WordSegmenter] = None) -> str:
+    """
+    Canonical identity of a keyword: normalized, hashtags split into words,
+    stopwords dropped and plurals folded. Variants of one trend share a key.
+
+    Example:
+        canonical_key("#CatMomLife")  # "cat mom life"
+        canonical_key("Gifts for Cat Moms")  # "gift cat mom"
+    """
+    words = _words(keyword, segmenter or WordSegmenter.default())
+    key = " ".join(singularize(w) for w in words if w not in STOPWORDS)
+    return key or normalize_keyword(keyword)
@@ -0,0 +1,168 @@
+"""
+Streaming extractor for the JSON that Next.js pages embed in <script id="__NEXT_DATA__">.
+
+The page is read chunk by chunk through http_pool.get_prefix(). The connection closes as
+soon as the script tag ends, so the rest of the HTML is never downloaded. Only the
+sub-tree at the requested path gets built into Python objects: json_at_path() steps over
+sibling values with a C-level regex scan instead of parsing them.
+"""
+import json
+import re
+from typing import Any, Iterable, Optional, Sequence, Union
+from services.helpers.http_pool import http_pool
+
+OPEN_MARKER = b'<script id="__NEXT_DATA__"'
+CLOSE_MARKER = b"</script>"
+
+JsonPath = Sequence[Union[str, int]]
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Consumes strings and plain characters inside the regex engine and stops at the next bracket
+_NEXT_BRACKET = re.compile(r'(?:"[^"\\]*(?:\\.[^"\\]*)*"|[^"{}\[\]]+)*([{}\[\]])', re.DOTALL)
+_SCALAR = re.compile(r"[^,\]}\s]+")
+
+
+class NextDataNotFound(Exception):
+    """The page has no __NEXT_DATA__ script tag."""
+
+
+class NextDataScanner:
+    """
+    Feed it body chunks; feed() returns True once the script tag has closed and `payload`
+    holds its text. While searching, only a marker-sized tail of the page is kept.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._state = "search"  # search -> tag -> body -> done
+        self._scanned = 0  # bytes of the body already searched for the closing tag
+        self.bytes_read = 0
+        self.payload: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done:
+            return True
+        self.bytes_read += len(chunk)
+        self._buf += chunk
+        if self._state == "search":
+            i = self._buf.find(OPEN_MARKER)
+            if i < 0:
+                # Keep a tail in case the marker straddles two chunks
+                del self._buf[:max(0, len(self._buf) - len(OPEN_MARKER) + 1)]
+                return False
+            del self._buf[:i + len(OPEN_MARKER)]
+            self._state = "tag"
+        if self._state == "tag":
+            j = self._buf.find(b">")
+            if j < 0:
+                return False
+            del self._buf[:j + 1]
+            self._state = "body"
+        end = self._buf.find(CLOSE_MARKER, max(0, self._scanned - len(CLOSE_MARKER) + 1))
+        if end < 0:
+            self._scanned = len(self._buf)
+            return False
+        self.payload = self._buf[:end].decode("utf-8")
+        self._buf = bytearray()
+        self._state = "done"
+        return True
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Index just past the JSON value starting at `pos`, without building it."""
+    ch = text[pos]
+    if ch == '"':
+        return _STRING.match(text, pos).end()
+    if ch in "{[":
+        depth = 0
+        for m in _NEXT_BRACKET.finditer(text, pos):
+            if m.group(1) in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return m.end()
+        raise ValueError("Unterminated JSON value")
+    return _SCALAR.match(text, pos).end()
+
+
+def _find_key(text: str, pos: int, key: str) -> Optional[int]:
+    """`pos` is at '{'; position of the value under `key`, or None."""
+    pos = _skip_ws(text, pos + 1)
+    while text[pos] != "}":
+        m = _STRING.match(text, pos)
+        raw = m.group()
+        name = json.loads(raw) if "\\" in raw else raw[1:-1]
+        pos = _skip_ws(text, m.end()) + 1  # past ':'
+        pos = _skip_ws(text, pos)
+        if name == key:
+            return pos
+        pos = _skip_ws(text, _skip_value(text, pos))
+        if text[pos] == ",":
+            pos = _skip_ws(text, pos + 1)
+    return None
+
+
+def _find_index(text: str, pos: int, index: int) -> Optional[int]:
+    """`pos` is at '['; position of element `index`, or None."""
+    pos = _skip_ws(text, pos + 1)
+    i = 0
+    while text[pos] != "]":
+        if i == index:
+            return pos
+        pos = _skip_ws(text, _skip_value(text, pos))
+        if text[pos] == ",":
+            pos = _skip_ws(text, pos + 1)
+        i += 1
+    return None
+
+
+def json_at_path(text: str, path: JsonPath, default: Any = None) -> Any:
+    """
+    Parse only the value at `path` (object keys and list indices) of the JSON document
+    in `text`. Returns `default` when the path is missing.
+
+        json_at_path(payload, ("props", "pageProps", "results"))
+    """
+    pos = _skip_ws(text, 0)
+    for step in path:
+        if isinstance(step, int) and text[pos] == "[":
+            found = _find_index(text, pos, step)
+        elif isinstance(step, str) and text[pos] == "{":
+            found = _find_key(text, pos, step)
+        else:
+            return default
+        if found is None:
+            return default
+        pos = found
+    return _decoder.raw_decode(text, pos)[0]
+
+
+async def fetch_next_data(url: str, paths: Iterable[JsonPath], **kwargs) -> Any:
+    """
+    Stream `url` until its __NEXT_DATA__ tag closes and return the value at the first of
+    `paths` that holds a non-empty value (None if none does). kwargs go to
+    http_pool.get_prefix (headers, timeout, cache_ttl).
+
+    Raises httpx.HTTPStatusError for non-200 pages and NextDataNotFound when the tag is missing.
+    """
+    scanner = NextDataScanner()
+    response = await http_pool.get_prefix(url, scanner.feed, **kwargs)
+    response.raise_for_status()
+    if not scanner.done:
+        raise NextDataNotFound(f"No __NEXT_DATA__ in {url} ({scanner.bytes_read} bytes read)")
+    for path in paths:
+        value = json_at_path(scanner.payload, path)
+        if value:
+            return value
+    return None
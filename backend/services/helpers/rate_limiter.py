@@ -0,0 +1,261 @@
+"""
+Rate limiting.
+TokenBucket keeps LLM calls under a provider's tokens- and requests-per-minute budget (Groq free tier: ~6000 TPM);
+AdaptivePacer learns a safe request rate for scrapers with no published limit (Google Trends);
+CircuitBreaker skips a scraper source that keeps failing until a cooldown has passed.
+"""
+import asyncio
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at
+    `capacity / period` tokens per second.
+
+    Thread-safe, so the same bucket can be shared by executor threads
+    (blocking `acquire`) and the event loop (`acquire_async`).
+
+    Usage:
+        bucket = TokenBucket(capacity=6000, period=60)
+        await bucket.acquire_async(550)   # wait until ~550 tokens are available
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float, reserve: float = 0.0) -> float:
+        """
+        Take `amount` tokens if available, leaving at least `reserve` tokens in the bucket.
+        Returns 0 on success, otherwise the number of seconds to wait before retrying.
+        Requests larger than the bucket are clamped so they can still go through.
+        """
+        reserve = min(max(float(reserve), 0.0), self.capacity / 2)
+        amount = min(float(amount), self.capacity - reserve)
+        with self._lock:
+            self._refill()
+            if self._tokens - reserve >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount + reserve - self._tokens) / self.rate
+
+    def acquire(self, amount: float) -> None:
+        """Block the calling thread until `amount` tokens are taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float) -> None:
+        """Wait (without blocking the event loop) until `amount` tokens are taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def refund(self, amount: float) -> None:
+        """Give back tokens that were reserved but not actually used."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + max(float(amount), 0.0))
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class AdaptivePacer:
+    """
+    AIMD pacing for a scraper that gets no published rate limit: the delay between
+    requests shrinks by `step` seconds after every success and is multiplied by `factor`
+    on every throttle (429), bounded by [min_delay, max_delay]. Requests are spaced
+    `delay` apart (±jitter) across all threads sharing the pacer.
+
+    The learned delay is plain data (state/restore), so it can be kept between runs.
+
+    Usage:
+        pacer = AdaptivePacer("google_trends", initial_delay=3.0)
+        pacer.wait()
+        try:
+            fetch()
+            pacer.success()
+        except TooManyRequestsError:
+            pacer.throttled()   # retry after the longer delay
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_delay: float = 3.0,
+        min_delay: float = 0.5,
+        max_delay: float = 120.0,
+        step: float = 0.25,
+        factor: float = 2.0,
+        jitter: float = 0.2,
+    ):
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.step = step
+        self.factor = factor
+        self.jitter = jitter
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.successes = 0
+        self.throttles = 0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve_slot(self) -> float:
+        """Claim the next request slot; returns seconds to sleep until it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            spacing = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next_at = slot + spacing
+            return slot - now
+
+    def wait(self) -> None:
+        """Block the calling thread until this request's turn."""
+        wait = self._reserve_slot()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def wait_async(self) -> None:
+        wait = self._reserve_slot()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def success(self) -> None:
+        """Additive decrease of the delay."""
+        with self._lock:
+            self.successes += 1
+            self.delay = max(self.min_delay, self.delay - self.step)
+
+    def throttled(self) -> float:
+        """Multiplicative increase of the delay; the next request waits it out. Returns the new delay."""
+        with self._lock:
+            self.throttles += 1
+            self.delay = min(self.max_delay, self.delay * self.factor)
+            self._next_at = max(self._next_at, time.monotonic() + self.delay)
+            return self.delay
+
+    @property
+    def rate_per_minute(self) -> float:
+        return 60.0 / self.delay
+
+    def state(self) -> dict:
+        return {"delay": self.delay, "successes": self.successes, "throttles": self.throttles}
+
+    def restore(self, state: dict) -> None:
+        """Resume from a saved state(); counters carry on from where they were."""
+        with self._lock:
+            if state.get("delay") is not None:
+                self.delay = min(max(float(state["delay"]), self.min_delay), self.max_delay)
+            self.successes = int(state.get("successes", self.successes))
+            self.throttles = int(state.get("throttles", self.throttles))
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "delay_seconds": round(self.delay, 3),
+            "rate_per_minute": round(self.rate_per_minute, 2),
+            "min_delay_seconds": self.min_delay,
+            "max_delay_seconds": self.max_delay,
+            "successes": self.successes,
+            "throttles": self.throttles,
+        }
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing. After `failure_threshold` failures
+    in a row the breaker opens for `cooldown` seconds. Once that ends, one trial call is
+    let through (half-open): a success closes the breaker, and a failure reopens it with
+    the cooldown doubled, up to `max_cooldown`.
+
+    Times are wall-clock, so the state (state/restore) stays valid across restarts.
+
+    Usage:
+        if breaker.allow():
+            try:
+                fetch()
+                breaker.success()
+            except Exception:
+                breaker.failure()
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 1800.0, max_cooldown: float = 6 * 3600.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state_name(self) -> str:
+        if self.opened_until == 0.0:
+            return "closed"
+        return "open" if time.time() < self.opened_until else "half_open"
+
+    def allow(self) -> bool:
+        return self.state_name != "open"
+
+    def success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_until = 0.0
+            self.cooldown = self.base_cooldown
+
+    def failure(self) -> None:
+        with self._lock:
+            half_open = self.opened_until != 0.0
+            self.consecutive_failures += 1
+            if half_open:
+                # The trial call failed — back off longer
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            if half_open or self.consecutive_failures >= self.failure_threshold:
+                self.opened_until = time.time() + self.cooldown
+                self.trips += 1
+
+    def state(self) -> dict:
+        return {
+            "consecutive_failures": self.consecutive_failures,
+            "opened_until": self.opened_until,
+            "cooldown": self.cooldown,
+            "trips": self.trips,
+        }
+
+    def restore(self, state: dict) -> None:
+        with self._lock:
+            self.consecutive_failures = int(state.get("consecutive_failures", 0))
+            self.opened_until = float(state.get("opened_until", 0.0))
+            self.cooldown = min(float(state.get("cooldown", self.base_cooldown)), self.max_cooldown)
+            self.trips = int(state.get("trips", 0))
+
+    def status(self) -> dict:
+        return {
+            "state": self.state_name,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_seconds": round(max(0.0, self.opened_until - time.time())),
+            "cooldown_seconds": self.cooldown,
+            "trips": self.trips,
+        }
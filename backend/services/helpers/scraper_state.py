@@ -0,0 +1,70 @@
+"""
+Scraper state — JSON values kept between runs in the scraper_state table.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from db.database import SessionLocal
+from db.models import ScraperState
+from services.helpers.rate_limiter import AdaptivePacer
+
+
+def get_state(db: Session, key: str) -> Optional[dict]:
+    row = db.get(ScraperState, key)
+    return row.value if row else None
+
+
+def set_state(db: Session, key: str, value: dict) -> None:
+    """Insert or replace a state value (caller commits)."""
+    now = datetime.utcnow()
+    stmt = pg_insert(ScraperState).values(key=key, value=value, updated_at=now)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[ScraperState.key],
+        set_={"value": stmt.excluded.value, "updated_at": now},
+    ))
+
+
+def read_state(key: str) -> Optional[dict]:
+    """get_state with its own session, for scrapers that run outside any request or pipeline session."""
+    db = SessionLocal()
+    try:
+        return get_state(db, key)
+    finally:
+        db.close()
+
+
+def write_state(key: str, value: dict) -> None:
+    """set_state with its own session, committed."""
+    db = SessionLocal()
+    try:
+        set_state(db, key, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+class ScrapeResult(list):
+    """
+    A source's keywords plus how many it left out because they had not changed since
+    the last run (see services/scrapers/pinterest_trends.py). An empty result with
+    `unchanged` set is a healthy source with nothing new, not a failure.
+    `state` holds scraper_state values ({key: value}) to write only once the caller has
+    stored the keywords, so a run that fails first leaves the previous values in place.
+    """
+
+    def __init__(self, items=(), unchanged: int = 0, state: Optional[dict] = None):
+        super().__init__(items)
+        self.unchanged = unchanged
+        self.state = state or {}
+
+
+def load_pacer(db: Session, pacer: AdaptivePacer) -> None:
+    """Start a pacer at the rate an earlier run learned, if any."""
+    state = get_state(db, f"pacer:{pacer.name}")
+    if state:
+        pacer.restore(state)
+
+
+def save_pacer(db: Session, pacer: AdaptivePacer) -> None:
+    set_state(db, f"pacer:{pacer.name}", pacer.state())
@@ -0,0 +1,109 @@
+"""
+Spend budgets — daily and monthly USD caps on paid LLM calls, backed by the api_spend ledger.
+
+Callers reserve a worst-case estimate before a call so concurrent calls can't overshoot
+the cap together, then record the real token cost, which replaces the reservation.
+"""
+import itertools
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from db.models import ApiSpend
+
+
+class SpendBudget:
+    """
+    Usage:
+        budget = SpendBudget("deep_analysis", "anthropic", daily_limit=0.5, monthly_limit=5)
+        reservation = budget.reserve(db, estimate)
+        if reservation is None:
+            ...  # over budget, try again next run
+        result = call_llm()
+        budget.record(db, reservation, model=..., usage=result["usage"], cost=result["cost"])
+        db.commit()
+    """
+
+    def __init__(self, purpose: str, provider: str, daily_limit: float, monthly_limit: float):
+        self.purpose = purpose
+        self.provider = provider
+        self.daily_limit = daily_limit
+        self.monthly_limit = monthly_limit
+        self._reserved: dict[int, float] = {}
+        self._ids = itertools.count(1)
+
+    def spent(self, db: Session) -> dict:
+        """Recorded spend for today and this calendar month (UTC)."""
+        now = datetime.utcnow()
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = day_start.replace(day=1)
+        today, month = (
+            db.query(
+                func.coalesce(func.sum(case((ApiSpend.created_at >= day_start, ApiSpend.cost_usd), else_=0.0)), 0.0),
+                func.coalesce(func.sum(ApiSpend.cost_usd), 0.0),
+            )
+            .filter(ApiSpend.purpose == self.purpose)
+            .filter(ApiSpend.created_at >= month_start)
+            .one()
+        )
+        return {"today": float(today), "month": float(month)}
+
+    @property
+    def reserved(self) -> float:
+        return sum(self._reserved.values())
+
+    def remaining(self, db: Session) -> float:
+        """USD that can still be committed, net of in-flight reservations."""
+        spent = self.spent(db)
+        headroom = min(self.daily_limit - spent["today"], self.monthly_limit - spent["month"])
+        return headroom - self.reserved
+
+    def reserve(self, db: Session, amount: float) -> Optional[int]:
+        """Hold `amount` against the budget. Returns a reservation ID, or None if it doesn't fit."""
+        if amount > self.remaining(db):
+            return None
+        reservation = next(self._ids)
+        self._reserved[reservation] = amount
+        return reservation
+
+    def release(self, reservation: int) -> None:
+        self._reserved.pop(reservation, None)
+
+    def record(
+        self,
+        db: Session,
+        reservation: Optional[int],
+        model: str,
+        usage: dict,
+        cost: float,
+        trend_id: Optional[int] = None,
+        run_id: Optional[str] = None,
+    ) -> ApiSpend:
+        """Add the call's real cost to the ledger (caller commits) and drop its reservation."""
+        if reservation is not None:
+            self.release(reservation)
+        entry = ApiSpend(
+            provider=self.provider,
+            model=model,
+            purpose=self.purpose,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cost_usd=cost,
+            trend_id=trend_id,
+            run_id=run_id,
+            created_at=datetime.utcnow(),
+        )
+        db.add(entry)
+        return entry
+
+    def status(self, db: Session) -> dict:
+        spent = self.spent(db)
+        return {
+            "purpose": self.purpose,
+            "daily_limit_usd": self.daily_limit,
+            "monthly_limit_usd": self.monthly_limit,
+            "spent_today_usd": round(spent["today"], 6),
+            "spent_this_month_usd": round(spent["month"], 6),
+            "reserved_usd": round(self.reserved, 6),
+            "remaining_usd": round(max(self.remaining(db), 0.0), 6),
+        }
@@ -4,6 +4,12 @@ Automatically tags trends with seasonality, holidays, and urgency levels.
 """
 from datetime import datetime
 
+# Seen in at least this many distinct seasons (trend_snapshots) → evergreen
+EVERGREEN_MIN_SEASONS = 3
+
+# Average interest a rising trend needs to be urgent
+URGENT_MIN_INTEREST = 60
+
 HOLIDAY_KEYWORDS = {
     "valentine": ["valentine", "love day", "couple goals", "relationship"],
     "mothers_day": ["mom", "mother", "mama", "mommy"],
@@ -19,7 +25,7 @@ HOLIDAY_KEYWORDS = {
 }
 
 
-def detect_temporal_tags(keyword: str, scraped_date: datetime, scrape_count: int = 1) -> list[str]:
+def detect_temporal_tags(keyword: str, scraped_date: datetime, season_count: int = 1) -> list[str]:
     """
     Auto-detect temporal context for a keyword.
     Returns list of tags like: ["Q1", "valentine", "winter", "evergreen"]
@@ -47,8 +53,8 @@ def detect_temporal_tags(keyword: str, scraped_date: datetime, scrape_count: int
     quarter = (month - 1) // 3 + 1
     tags.append(f"Q{quarter}")
 
-    # Evergreen detection (if seen multiple times across different seasons)
-    if scrape_count >= 3:
+    # Evergreen detection (seen across several different seasons)
+    if season_count >= EVERGREEN_MIN_SEASONS:
         tags.append("evergreen")
 
     return tags
@@ -60,7 +66,7 @@ def detect_urgency(temporal_tags: list[str], avg_interest: int, trend_direction:
     Returns: "urgent", "plan_ahead", "evergreen", "standard"
     """
     # High interest + rising = urgent
-    if avg_interest >= 60 and trend_direction == "rising":
+    if avg_interest >= URGENT_MIN_INTEREST and trend_direction == "rising":
         return "urgent"
 
     # Holiday coming up in 1-2 months = plan ahead
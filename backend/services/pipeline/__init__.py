@@ -0,0 +1 @@
+"""Trend pipeline — streaming scrape → filter → cache-check → score → analyze stages."""
@@ -0,0 +1,58 @@
+"""
+Deep-analysis stage — Claude gating rules and spend budget for high-value trends.
+"""
+from datetime import datetime
+from sqlalchemy.orm import Session
+from config import settings
+from db.models import Trend
+from services.helpers.spend import SpendBudget
+
+# Shared by every run in this process; the caps themselves live in the api_spend ledger
+analysis_budget = SpendBudget(
+    purpose="deep_analysis",
+    provider="anthropic",
+    daily_limit=settings.ANALYSIS_DAILY_BUDGET_USD,
+    monthly_limit=settings.ANALYSIS_MONTHLY_BUDGET_USD,
+)
+
+
+def should_deep_analyze(trend: Trend) -> bool:
+    """
+    Determine if a trend should get Claude deep analysis.
+    More restrictive than before to save costs.
+    """
+    # Must have high score
+    if not trend.score_groq or trend.score_groq < 7:
+        return False
+
+    # Skip if interest is too low (even if score is high)
+    if trend.avg_interest is not None and trend.avg_interest < 40:
+        print(f"[Claude] ✗ Skipping '{trend.keyword}' - low interest ({trend.avg_interest})")
+        return False
+
+    # Already analyzed? Only re-analyze if:
+    # 1. Never analyzed, OR
+    # 2. More than 30 days since last analysis AND still high interest
+    if trend.deep_analysis and trend.last_analyzed_at:
+        days_since = (datetime.utcnow() - trend.last_analyzed_at).days
+
+        # Only re-analyze if it's been 30+ days AND interest is still high
+        if days_since < 30:
+            print(f"[Claude] ✓ Skipping '{trend.keyword}' - analyzed {days_since}d ago")
+            return False
+
+        if trend.avg_interest is not None and trend.avg_interest < 50:
+            print(f"[Claude] ✗ Skipping '{trend.keyword}' - interest dropped to {trend.avg_interest}")
+            return False
+
+    return True
+
+
+def load_analysis_queue(db: Session) -> list[Trend]:
+    """Trends an earlier run deferred (over budget or failed), oldest first."""
+    return (
+        db.query(Trend)
+        .filter(Trend.analysis_queued_at.isnot(None))
+        .order_by(Trend.analysis_queued_at)
+        .all()
+    )
@@ -0,0 +1,178 @@
+"""
+Cache-check stage — smart caching rules and the bulk keyword upsert.
+"""
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from db.models import Trend
+from services.helpers.keywords import canonical_key, normalize_keyword
+from services.helpers.temporal_detector import detect_temporal_tags, detect_urgency, assign_emoji_tag
+
+
+def should_rescore(trend: Trend) -> bool:
+    """
+    Determine if a trend should be rescored based on caching rules.
+    Returns True if we should score it, False if we should skip (cache hit).
+    """
+    # Never scored? Score it
+    if trend.last_scored_at is None:
+        return True
+
+    # Scored within last 48h? Skip (cache hit)
+    hours_since_score = (datetime.utcnow() - trend.last_scored_at).total_seconds() / 3600
+    if hours_since_score < 48:
+        print(f"[Cache] ✓ Skipping '{trend.keyword}' - scored {hours_since_score:.1f}h ago")
+        return False
+
+    # High-value trend (7+) and scored within last week? Skip
+    if trend.score_groq and trend.score_groq >= 7 and hours_since_score < 168:  # 1 week
+        print(f"[Cache] ✓ Skipping high-value '{trend.keyword}' - scored recently")
+        return False
+
+    return True
+
+
+def candidate_key(kw_data: dict) -> str:
+    """The canonical key of a candidate — set by the pipeline's filter stage, derived otherwise."""
+    return kw_data.get("key") or canonical_key(kw_data.get("keyword", ""))
+
+
+def _merged_list(*lists) -> list:
+    merged = []
+    for values in lists:
+        for value in values or []:
+            if value and value not in merged:
+                merged.append(value)
+    return merged
+
+
+def _merge_candidates(kw_data_list: list[dict]) -> dict[str, dict]:
+    """
+    Collapse candidates that share a canonical key.
+    Keeps the first occurrence, but prefers one that carries Google interest metrics.
+    """
+    merged = {}
+    for kw_data in kw_data_list:
+        key = candidate_key(kw_data)
+        if not key:
+            continue
+        current = merged.get(key)
+        if current is None or (current.get("avg_interest") is None and kw_data.get("avg_interest") is not None):
+            merged[key] = kw_data
+    return merged
+
+
+def find_existing(db: Session, keys: list[str]) -> dict[str, Trend]:
+    """Existing Trend rows for a set of canonical keys, in one IN query."""
+    if not keys:
+        return {}
+    return {t.keyword_normalized: t for t in db.query(Trend).filter(Trend.keyword_normalized.in_(keys)).all()}
+
+
+def upsert_candidates(db: Session, kw_data_list: list[dict]) -> list[tuple[Trend, dict, bool]]:
+    """
+    Resolve every candidate's canonical key against the DB in one set-based query, then write
+    new and updated rows with one INSERT ... ON CONFLICT (keyword_normalized) DO UPDATE.
+    The unique index makes this safe when two runs overlap — no duplicate Trend rows.
+    Returns (trend, kw_data, is_new) for each distinct candidate, in input order.
+    """
+    candidates = _merge_candidates(kw_data_list)
+    if not candidates:
+        return []
+
+    now = datetime.utcnow()
+    existing = find_existing(db, list(candidates))
+
+    rows = []
+    for key, kw_data in candidates.items():
+        keyword = kw_data["keyword"]
+        trend = existing.get(key)
+
+        if trend:
+            # days_trending, interest_delta and momentum come from trend_snapshots
+            # (services/pipeline/momentum.py), not from this row's previous values
+            scrape_count = (trend.scrape_count or 0) + 1
+            days_trending = trend.days_trending or 0
+            season_count = trend.season_count or 1
+            avg_interest = trend.avg_interest
+            interest_peak = trend.interest_peak
+            interest_delta = trend.interest_delta
+            trend_velocity = trend.trend_velocity
+
+            # Update interest metrics if available
+            if kw_data.get("avg_interest") is not None:
+                avg_interest = kw_data["avg_interest"]
+                interest_peak = kw_data.get("interest_peak")
+                trend_velocity = kw_data.get("trend_direction", "stable")
+        else:
+            scrape_count = 1
+            days_trending = 0
+            season_count = 1
+            avg_interest = kw_data.get("avg_interest")
+            interest_peak = kw_data.get("interest_peak")
+            interest_delta = kw_data.get("interest_delta", 0)
+            trend_velocity = kw_data.get("trend_direction", "stable")
+
+        # Source attribution and variant spellings accumulate across runs
+        source = kw_data.get("source", "unknown")
+        sources = _merged_list(trend.sources if trend else None, [trend.source] if trend else None,
+                               kw_data.get("sources"), [source])
+        aliases = _merged_list(trend.aliases if trend else None, kw_data.get("aliases"), [keyword])
+        display = normalize_keyword(trend.keyword if trend else keyword)
+        aliases = [a for a in aliases if normalize_keyword(a) != display]
+
+        temporal_tags = detect_temporal_tags(keyword, now, season_count)
+        rows.append({
+            "keyword": keyword,
+            "keyword_normalized": key,
+            "source": source,
+            "sources": sources,
+            "aliases": aliases,
+            "last_scraped_at": now,
+            "scrape_count": scrape_count,
+            "days_trending": days_trending,
+            "avg_interest": avg_interest,
+            "interest_peak": interest_peak,
+            "interest_delta": interest_delta,
+            "trend_velocity": trend_velocity,
+            "temporal_tags": temporal_tags,
+            "urgency": detect_urgency(temporal_tags, avg_interest or 0, trend_velocity or "stable"),
+            "emoji_tag": (trend.emoji_tag if trend else None) or assign_emoji_tag(keyword, temporal_tags),
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    stmt = pg_insert(Trend).values(rows)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Trend.keyword_normalized],
+        set_={
+            "last_scraped_at": excluded.last_scraped_at,
+            "sources": excluded.sources,
+            "aliases": excluded.aliases,
+            # Increment in SQL so an overlapping run's scrape is counted too
+            "scrape_count": func.coalesce(Trend.scrape_count, 0) + 1,
+            "avg_interest": func.coalesce(excluded.avg_interest, Trend.avg_interest),
+            "interest_peak": func.coalesce(excluded.interest_peak, Trend.interest_peak),
+            "trend_velocity": func.coalesce(excluded.trend_velocity, Trend.trend_velocity),
+            "temporal_tags": excluded.temporal_tags,
+            "urgency": excluded.urgency,
+            "emoji_tag": func.coalesce(Trend.emoji_tag, excluded.emoji_tag),
+            "updated_at": excluded.updated_at,
+        },
+    ).returning(Trend.id)
+
+    ids = list(db.execute(stmt).scalars())
+    db.commit()
+
+    # One reload query refreshes the affected rows instead of N lazy loads later
+    trends = {
+        t.keyword_normalized: t
+        for t in db.query(Trend).filter(Trend.id.in_(ids)).populate_existing().all()
+    }
+    return [
+        (trends[key], kw_data, key not in existing)
+        for key, kw_data in candidates.items()
+        if key in trends
+    ]
@@ -0,0 +1,125 @@
+"""
+Trend momentum — append-only snapshot history and the metrics derived from it.
+
+Each run bulk-inserts one trend_snapshots row per trend it saw. Velocity, acceleration,
+days trending and multi-season recurrence are then recomputed for every trend in a
+single UPDATE driven by SQL window functions over that history, instead of patching
+each row from its previous value in Python.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from db.models import Trend, TrendSnapshot
+from services.helpers.temporal_detector import EVERGREEN_MIN_SEASONS, URGENT_MIN_INTEREST
+
+# Interest points per day before a trend is labelled rising/declining
+VELOCITY_THRESHOLD = 1.0
+
+# Snapshots closer together than this count as this far apart (keeps velocity finite)
+MIN_INTERVAL_DAYS = 1 / 24
+
+# Seasons are meteorological (DJF, MAM, JJA, SON); December belongs to the next year's winter.
+# velocity: interest change per day between consecutive snapshots that carry interest;
+# acceleration: change in velocity between the last two of those intervals.
+MOMENTUM_SQL = text("""
+WITH obs AS (
+    SELECT trend_id, captured_at, avg_interest,
+           lag(avg_interest) OVER w AS prev_interest,
+           lag(captured_at) OVER w AS prev_at
+    FROM trend_snapshots
+    WHERE avg_interest IS NOT NULL
+    WINDOW w AS (PARTITION BY trend_id ORDER BY captured_at)
+),
+vel AS (
+    SELECT trend_id, captured_at, avg_interest, prev_interest,
+           (avg_interest - prev_interest)
+               / GREATEST(EXTRACT(EPOCH FROM captured_at - prev_at) / 86400.0, :min_interval) AS velocity
+    FROM obs
+    WHERE prev_interest IS NOT NULL
+),
+latest AS (
+    SELECT * FROM (
+        SELECT trend_id, avg_interest, prev_interest, velocity,
+               velocity - lag(velocity) OVER (PARTITION BY trend_id ORDER BY captured_at) AS acceleration,
+               row_number() OVER (PARTITION BY trend_id ORDER BY captured_at DESC) AS rn,
+               CASE WHEN velocity >= :threshold THEN 'rising'
+                    WHEN velocity <= -:threshold THEN 'declining'
+                    ELSE 'stable' END AS direction
+        FROM vel
+    ) ranked
+    WHERE rn = 1
+),
+seen AS (
+    SELECT trend_id,
+           count(DISTINCT captured_at::date) AS days_seen,
+           count(DISTINCT EXTRACT(YEAR FROM captured_at + interval '1 month')::int * 10
+                          + EXTRACT(MONTH FROM captured_at)::int % 12 / 3) AS seasons
+    FROM trend_snapshots
+    GROUP BY trend_id
+),
+cur AS (
+    SELECT id,
+           COALESCE(trend_velocity, 'stable') AS direction,
+           CASE WHEN jsonb_typeof(temporal_tags::jsonb) = 'array'
+                THEN temporal_tags::jsonb ELSE '[]'::jsonb END AS tags
+    FROM trends
+)
+UPDATE trends t SET
+    days_trending = s.days_seen,
+    season_count = s.seasons,
+    interest_velocity = l.velocity,
+    interest_acceleration = l.acceleration,
+    interest_delta = CASE
+        WHEN l.prev_interest > 0 THEN (l.avg_interest - l.prev_interest) * 100.0 / l.prev_interest
+        WHEN l.trend_id IS NOT NULL THEN 0
+        ELSE t.interest_delta END,
+    trend_velocity = COALESCE(l.direction, c.direction),
+    temporal_tags = (CASE
+        WHEN s.seasons < :min_seasons THEN c.tags - 'evergreen'
+        WHEN c.tags @> '["evergreen"]' THEN c.tags
+        ELSE c.tags || '["evergreen"]' END)::json,
+    urgency = CASE
+        WHEN COALESCE(l.direction, c.direction) = 'rising' AND t.avg_interest >= :urgent_interest THEN 'urgent'
+        WHEN t.urgency = 'plan_ahead' THEN 'plan_ahead'
+        WHEN s.seasons >= :min_seasons THEN 'evergreen'
+        ELSE 'standard' END
+FROM seen s
+JOIN cur c ON c.id = s.trend_id
+LEFT JOIN latest l ON l.trend_id = s.trend_id
+WHERE t.id = s.trend_id
+""")
+
+
+def write_snapshots(db: Session, observations: list[tuple[Trend, dict]], run_id: Optional[str] = None) -> int:
+    """
+    Bulk-insert one snapshot per observed trend (caller commits). Interest comes from
+    this run's scrape only, so sources without Google metrics don't repeat stale values.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "trend_id": trend.id,
+            "run_id": run_id,
+            "captured_at": now,
+            "sources": kw_data.get("sources") or [kw_data.get("source")],
+            "avg_interest": kw_data.get("avg_interest"),
+            "interest_peak": kw_data.get("interest_peak"),
+            "score": trend.score_groq,
+        }
+        for trend, kw_data in observations
+    ]
+    if rows:
+        db.execute(insert(TrendSnapshot), rows)
+    return len(rows)
+
+
+def refresh_momentum(db: Session) -> int:
+    """Recompute momentum columns for every trend with history in one statement (caller commits)."""
+    result = db.execute(MOMENTUM_SQL, {
+        "min_interval": MIN_INTERVAL_DAYS,
+        "threshold": VELOCITY_THRESHOLD,
+        "min_seasons": EVERGREEN_MIN_SEASONS,
+        "urgent_interest": URGENT_MIN_INTEREST,
+    })
+    return result.rowcount
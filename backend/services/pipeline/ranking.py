@@ -0,0 +1,150 @@
+"""
+Ranking stage — order scoring candidates by expected value before the budget cut.
+
+The scoring budget per run is small (an LLM call per keyword), so it should go to the
+keywords most likely to score well rather than to whichever source returned first.
+The estimate is a cheap heuristic on the 0-10 score scale built from:
+  - past scores: the keyword's own last/peak score, and the peak scores of similar
+    keywords (shared words) already in the DB
+  - how many sources returned the keyword this run
+  - Google avg_interest and trend_direction, when Google returned it
+  - novelty: keywords we have never scored get a small bonus
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Optional
+from sqlalchemy.orm import Session
+from db.models import Trend
+from services.helpers.keywords import GENERIC_WORDS, STOPWORDS
+
+# Score assumed for a keyword we know nothing about (middle of the 0-10 scale)
+PRIOR_SCORE = 5.0
+
+SOURCE_BONUS = 0.75      # per additional source that returned the keyword
+NOVELTY_BONUS = 0.5      # never scored before
+DIRECTION_BONUS = {"rising": 1.0, "stable": 0.0, "declining": -1.0}
+
+
+def _tokens(key: str) -> set[str]:
+    return {w for w in key.split() if len(w) > 2 and w not in STOPWORDS and w not in GENERIC_WORDS}
+
+
+class PeakIndex:
+    """
+    Word → past peak scores of the trends containing it, loaded once per run.
+    Used to estimate how well a keyword we have never scored is likely to do.
+    """
+
+    def __init__(self, rows: list[tuple[str, float]]):
+        self._peaks: list[float] = []
+        self._by_token: dict[str, list[int]] = {}
+        for key, peak in rows:
+            idx = len(self._peaks)
+            self._peaks.append(peak)
+            for token in _tokens(key or ""):
+                self._by_token.setdefault(token, []).append(idx)
+
+    @classmethod
+    def load(cls, db: Session) -> "PeakIndex":
+        rows = (
+            db.query(Trend.keyword_normalized, Trend.peak_score)
+            .filter(Trend.peak_score.isnot(None))
+            .all()
+        )
+        return cls([(key, peak) for key, peak in rows])
+
+    def similar_peak(self, key: str) -> Optional[float]:
+        """Mean peak score of known trends sharing a word with `key`, weighted by shared words."""
+        overlap: dict[int, int] = {}
+        for token in _tokens(key):
+            for idx in self._by_token.get(token, ()):
+                overlap[idx] = overlap.get(idx, 0) + 1
+        if not overlap:
+            return None
+        total_weight = sum(overlap.values())
+        return sum(self._peaks[idx] * weight for idx, weight in overlap.items()) / total_weight
+
+
+def expected_value(key: str, kw_data: dict, existing: Optional[Trend], peaks: PeakIndex) -> float:
+    """
+    Heuristic estimate of the score a candidate would get, used only for ordering.
+
+    Example:
+        expected_value("cat mom", {"sources": ["google", "tiktok"], "avg_interest": 70,
+                       "trend_direction": "rising"}, None, peaks)
+    """
+    estimate = PRIOR_SCORE
+    similar = peaks.similar_peak(key)
+    if similar is not None:
+        estimate = (estimate + similar) / 2
+
+    if existing is not None and existing.score_groq is not None:
+        # Its own history beats anything inferred from neighbours
+        own = max(existing.score_groq, existing.peak_score or 0)
+        estimate = 0.3 * estimate + 0.7 * own
+    else:
+        estimate += NOVELTY_BONUS
+
+    sources = kw_data.get("sources") or [kw_data.get("source")]
+    estimate += SOURCE_BONUS * (len(set(sources)) - 1)
+
+    avg_interest = kw_data.get("avg_interest")
+    if avg_interest is not None:
+        estimate += (avg_interest - 50) / 25  # ±2 across Google's 0-100 range
+    estimate += DIRECTION_BONUS.get(kw_data.get("trend_direction") or "stable", 0.0)
+    return estimate
+
+
+class RankedCandidates:
+    """
+    Max-heap of scoring candidates keyed by canonical keyword.
+    Pushing a key that is already queued re-ranks it (the stale heap entry is skipped
+    on pop). `changed` is set whenever the queue gains entries or is closed, so the
+    scoring stage can sleep until there is something new to decide on.
+    """
+
+    def __init__(self):
+        self._heap: list[list] = []
+        self._entries: dict[str, list] = {}
+        self._counter = itertools.count()
+        self.changed = asyncio.Event()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def push(self, key: str, item, priority: float) -> None:
+        stale = self._entries.get(key)
+        if stale is not None:
+            stale[-1] = False
+        # Ties pop in arrival order
+        entry = [-priority, next(self._counter), key, item, True]
+        heapq.heappush(self._heap, entry)
+        self._entries[key] = entry
+        self.changed.set()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        return entry[3] if entry else None
+
+    def pop(self, n: int) -> list:
+        """Remove and return up to n items, best first."""
+        items = []
+        while self._heap and len(items) < n:
+            _, _, key, item, valid = heapq.heappop(self._heap)
+            if valid:
+                del self._entries[key]
+                items.append(item)
+        return items
+
+    def drain(self) -> list:
+        """Remove and return everything still queued (the candidates that missed the budget)."""
+        return self.pop(len(self._heap))
+
+    def close(self) -> None:
+        self.closed = True
+        self.changed.set()
@@ -0,0 +1,140 @@
+"""
+Pipeline runs — trend pipeline runs as first-class background jobs.
+
+At most one run is active at a time. A second trigger (another browser tab, the
+n8n cron) attaches to the active run instead of starting another scrape, and SSE
+clients subscribe to a run by its ID. Every run has a pipeline_runs row with its
+status, stats and per-stage timings; a run that died mid-way (stale heartbeat) is
+marked interrupted and the next run picks up the keywords it never scored.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from db.database import SessionLocal
+from db.models import PipelineRun
+from services.pipeline.trend_pipeline import TrendPipeline, HEARTBEAT_INTERVAL
+
+# A "running" row whose heartbeat is older than this belongs to a dead process
+RUN_STALE_AFTER = timedelta(seconds=HEARTBEAT_INTERVAL * 4)
+
+# Finished runs kept in memory so late SSE subscribers can still replay them
+KEEP_FINISHED_RUNS = 10
+
+
+class RunManager:
+    """Process-wide registry of pipeline runs."""
+
+    def __init__(self):
+        self._runs: dict[str, TrendPipeline] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+
+    def get(self, run_id: str) -> Optional[TrendPipeline]:
+        """Return an in-memory run (active or recently finished) by ID."""
+        return self._runs.get(run_id)
+
+    @property
+    def active(self) -> Optional[TrendPipeline]:
+        for run_id, task in self._tasks.items():
+            if not task.done():
+                return self._runs[run_id]
+        return None
+
+    async def wait(self, run_id: str) -> dict:
+        """Wait for a run to finish (without cancelling it if the waiter goes away)."""
+        task = self._tasks.get(run_id)
+        if task:
+            await asyncio.shield(task)
+        return self._runs[run_id].stats
+
+    async def start_or_attach(self, trigger: str, **pipeline_kwargs) -> tuple[Optional[TrendPipeline], str, bool]:
+        """
+        Start a new background run, or attach to the one already in progress.
+        Returns (pipeline, run_id, attached). pipeline is None when the active run
+        belongs to another worker process — it can be followed via GET /trends/runs/{id}.
+        """
+        async with self._lock:
+            active = self.active
+            if active:
+                print(f"[Runs] Attaching {trigger} trigger to active run {active.run_id}")
+                return active, active.run_id, True
+
+            db = SessionLocal()
+            try:
+                elsewhere = self._reap_stale_runs(db)
+                if elsewhere:
+                    db.close()
+                    print(f"[Runs] Run {elsewhere.id} is active in another worker")
+                    return None, elsewhere.id, True
+
+                resume_from = self._find_resumable_run(db)
+                run = PipelineRun(
+                    id=str(uuid.uuid4()),
+                    trigger=trigger,
+                    status="running",
+                    resumed_from=resume_from.id if resume_from else None,
+                    started_at=datetime.utcnow(),
+                    heartbeat_at=datetime.utcnow(),
+                    stats={},
+                    stage_timings={},
+                )
+                db.add(run)
+                db.commit()
+            except Exception:
+                db.close()
+                raise
+
+            pipeline = TrendPipeline(db, run=run, resume_from=resume_from, **pipeline_kwargs)
+            task = asyncio.ensure_future(pipeline.run())
+            task.add_done_callback(lambda t, run_id=run.id, db=db: self._on_finished(run_id, db, t))
+            self._runs[run.id] = pipeline
+            self._tasks[run.id] = task
+            print(f"[Runs] Started {trigger} run {run.id}")
+            return pipeline, run.id, False
+
+    def _reap_stale_runs(self, db) -> Optional[PipelineRun]:
+        """
+        Mark "running" rows with a stale heartbeat as interrupted.
+        Returns a still-live run owned by another process, if there is one.
+        """
+        cutoff = datetime.utcnow() - RUN_STALE_AFTER
+        live = None
+        for run in db.query(PipelineRun).filter(PipelineRun.status == "running").all():
+            if run.id in self._runs:
+                continue
+            if run.heartbeat_at and run.heartbeat_at >= cutoff:
+                live = run
+            else:
+                print(f"[Runs] Run {run.id} stopped heartbeating — marking interrupted")
+                run.status = "interrupted"
+                run.finished_at = run.heartbeat_at
+        db.commit()
+        return live
+
+    def _find_resumable_run(self, db) -> Optional[PipelineRun]:
+        """The most recent interrupted run whose backlog no later run has picked up yet."""
+        latest = (
+            db.query(PipelineRun)
+            .filter(PipelineRun.status == "interrupted")
+            .order_by(PipelineRun.started_at.desc())
+            .first()
+        )
+        if not latest:
+            return None
+        already_resumed = db.query(PipelineRun).filter(PipelineRun.resumed_from == latest.id).first()
+        return None if already_resumed else latest
+
+    def _on_finished(self, run_id: str, db, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            print(f"[Runs] Run {run_id} failed: {task.exception()}")
+        db.close()
+        del self._tasks[run_id]
+
+        # Keep only the most recent finished runs around for replay
+        finished = [rid for rid in self._runs if rid not in self._tasks]
+        for rid in finished[:-KEEP_FINISHED_RUNS]:
+            del self._runs[rid]
+
+
+run_manager = RunManager()
@@ -0,0 +1,99 @@
+"""
+Scoring stage — batched, concurrent Groq scoring at bulk priority through the LLM gateway.
+"""
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Optional
+from config import settings
+from db.models import Trend
+from services.ai.groq_client import score_trend, score_trends_batch
+
+
+def apply_score(trend: Trend, res: dict) -> None:
+    """Copy a score_trend result onto the Trend row and track its peak score."""
+    trend.score_groq = res.get("score")
+    trend.pod_viability = res.get("pod_viability")
+    trend.competition_level = res.get("competition_level")
+    trend.ip_safe = res.get("ip_safe")
+    trend.product_suggestions = res.get("product_suggestions", [])
+    trend.score_reasoning = res.get("reasoning")
+    trend.last_scored_at = datetime.utcnow()
+    trend.scoring_cost = 0.0  # Groq is free
+    trend.score_inherited_from = None
+    trend.score_similarity = None
+
+    # Track peak score
+    if not trend.peak_score or trend.score_groq and trend.score_groq > (trend.peak_score or 0):
+        trend.peak_score = trend.score_groq
+        trend.peak_date = datetime.utcnow()
+
+
+def inherit_score(trend: Trend, source: Trend, similarity: float) -> None:
+    """
+    Reuse a near-identical trend's score instead of calling the LLM.
+    The inherited score expires with the source's (same last_scored_at) and never sets a peak.
+    """
+    trend.score_groq = source.score_groq
+    trend.pod_viability = source.pod_viability
+    trend.competition_level = source.competition_level
+    trend.ip_safe = source.ip_safe
+    trend.product_suggestions = list(source.product_suggestions or [])
+    trend.score_reasoning = f"Inherited from '{source.keyword}' ({similarity:.0%} similar). {source.score_reasoning or ''}".strip()
+    trend.last_scored_at = source.last_scored_at
+    trend.scoring_cost = 0.0
+    trend.score_inherited_from = source.id
+    trend.score_similarity = round(similarity, 3)
+
+
+async def score_concurrently(
+    items: list,
+    batch_size: int = settings.SCORING_BATCH_SIZE,
+    concurrency: int = settings.SCORING_CONCURRENCY,
+    semaphore: Optional[asyncio.Semaphore] = None,
+):
+    """
+    Score (trend, kw_data) pairs in multi-keyword batches with bounded concurrency.
+    Each request waits in the LLM gateway for the model's shared token budget (behind any
+    interactive calls), so bursts stay under the TPM limit instead of tripping 429s.
+    Keywords a batch answer dropped or got malformed are retried one at a time.
+    Pass a shared `semaphore` to bound concurrency across several calls (one per source).
+    Async generator: yields (trend, kw_data, result) as each result lands (completion order).
+    """
+    loop = asyncio.get_event_loop()
+    semaphore = semaphore or asyncio.Semaphore(max(concurrency, 1))
+    batch_size = max(batch_size, 1)
+
+    # The same row can be queued twice when several sources return its keyword — score it once
+    unique = list({id(trend): (trend, kw_data) for trend, kw_data in items}.values())
+
+    async def _score_batch(batch: list):
+        keywords = [trend.keyword for trend, _ in batch]
+        async with semaphore:
+            results = await loop.run_in_executor(None, partial(score_trends_batch, keywords, retry_malformed=False))
+        return batch, {r["keyword"]: r for r in results}, True
+
+    async def _score_single(trend: Trend, kw_data: dict):
+        async with semaphore:
+            res = await loop.run_in_executor(None, score_trend, trend.keyword)
+        return [(trend, kw_data)], {trend.keyword: res}, False
+
+    pending = {
+        asyncio.ensure_future(_score_batch(unique[i:i + batch_size]))
+        for i in range(0, len(unique), batch_size)
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch, results, was_batch = task.result()
+                for trend, kw_data in batch:
+                    res = results.get(trend.keyword)
+                    if res is None and was_batch:
+                        pending.add(asyncio.ensure_future(_score_single(trend, kw_data)))
+                    else:
+                        yield trend, kw_data, res
+    finally:
+        # Client went away or the consumer stopped early — don't leave calls queued
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,90 @@
+"""
+Seed rotation for the Google Trends source.
+
+Seeds live in the trend_seeds table (editable via /trends/seeds). Each run fetches as
+many seeds as fit the run's time budget at Google's current pace, stalest and
+highest-yield first, then records how many new keywords each one surfaced. Every seed
+keeps getting staler until it is picked, so all of them are covered over time.
+"""
+from datetime import datetime
+from sqlalchemy.orm import Session
+from config import settings
+from db.database import SessionLocal
+from db.models import Trend, TrendSeed
+from services.helpers.keywords import canonical_key
+from services.scrapers.google_trends import POD_SEED_KEYWORDS, estimate_seconds_per_seed, scrape_google_trends_enhanced
+
+# Weight of the latest fetch in a seed's yield_score moving average
+YIELD_SMOOTHING = 0.5
+
+
+def ensure_default_seeds(db: Session) -> None:
+    """Fill an empty seed table with the built-in POD seeds (caller commits)."""
+    if db.query(TrendSeed.id).first() is None:
+        db.add_all(TrendSeed(keyword=keyword) for keyword in POD_SEED_KEYWORDS)
+        db.flush()
+
+
+def seed_priority(seed: TrendSeed, now: datetime) -> float:
+    """Hours since last fetched, weighted up by yield; never-fetched seeds come first."""
+    if seed.last_fetched_at is None:
+        return float("inf")
+    hours = (now - seed.last_fetched_at).total_seconds() / 3600
+    return hours * (1 + (seed.yield_score or 0))
+
+
+def pick_seeds(db: Session, time_budget: float | None = None) -> list[TrendSeed]:
+    """Enabled seeds in priority order, as many as the time budget allows at the current pace."""
+    ensure_default_seeds(db)
+    budget = settings.GOOGLE_SEED_TIME_BUDGET if time_budget is None else time_budget
+    limit = max(1, int(budget / estimate_seconds_per_seed()))
+    now = datetime.utcnow()
+    seeds = db.query(TrendSeed).filter(TrendSeed.enabled.is_(True)).all()
+    seeds.sort(key=lambda seed: seed_priority(seed, now), reverse=True)
+    return seeds[:limit]
+
+
+def record_yield(db: Session, seeds: list[TrendSeed], results: list[dict]) -> dict[str, int]:
+    """
+    Credit each seed with the keywords it surfaced that have no trend row yet (caller commits).
+    Returns {seed keyword: new keywords}.
+    """
+    keys = {r["keyword"]: canonical_key(r["keyword"]) for r in results}
+    known = {
+        key for (key,) in db.query(Trend.keyword_normalized)
+        .filter(Trend.keyword_normalized.in_(set(keys.values())))
+        .all()
+    }
+
+    found = {seed.keyword: 0 for seed in seeds}
+    for result in results:
+        if result.get("seed") in found and keys[result["keyword"]] not in known:
+            found[result["seed"]] += 1
+
+    now = datetime.utcnow()
+    for seed in seeds:
+        new = found[seed.keyword]
+        seed.last_fetched_at = now
+        seed.fetch_count = (seed.fetch_count or 0) + 1
+        seed.last_yield = new
+        seed.total_yield = (seed.total_yield or 0) + new
+        seed.yield_score = YIELD_SMOOTHING * new + (1 - YIELD_SMOOTHING) * (seed.yield_score or 0)
+    return found
+
+
+def scrape_google_seeded() -> list[dict]:
+    """Pipeline source: scrape the next seeds in rotation and record their yield."""
+    db = SessionLocal()
+    try:
+        seeds = pick_seeds(db)
+        if not seeds:
+            print("[Seeds] No enabled seeds — skipping Google Trends")
+            return []
+        print(f"[Seeds] Fetching {len(seeds)} seeds: {', '.join(s.keyword for s in seeds)}")
+        results = scrape_google_trends_enhanced([seed.keyword for seed in seeds])
+        found = record_yield(db, seeds, results)
+        db.commit()
+        print(f"[Seeds] New keywords per seed: {found}")
+        return results
+    finally:
+        db.close()
@@ -0,0 +1,149 @@
+"""
+Similarity cache — reuse a recent score for a near-identical keyword.
+
+Every recently scored trend is held as a character-trigram TF-IDF vector of its niche
+words in a NumPy matrix (no network, no model). A batch of candidates is matched
+against all of them with one matrix product; a candidate whose best match clears the
+threshold inherits that trend's score instead of costing an LLM call. Product words are
+left out, so "cat mom life gifts" reuses the score of "cat mom life".
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from config import settings
+from db.models import Trend
+from services.helpers.keywords import niche_words
+
+# Same freshness window as an exact cache hit in should_rescore
+INHERIT_MAX_AGE = timedelta(hours=48)
+
+NGRAM = 3
+
+
+def char_ngrams(key: str) -> dict[str, int]:
+    """Character trigram counts of a canonical key's niche words, padded so word edges count."""
+    padded = f" {' '.join(niche_words(key))} "
+    counts: dict[str, int] = {}
+    for i in range(len(padded) - NGRAM + 1):
+        gram = padded[i:i + NGRAM]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class ScoreIndex:
+    """
+    TF-IDF index over recently scored trends.
+
+    The vocabulary and IDF weights come from the indexed keys; a candidate's unknown
+    n-grams can't match anything but still count towards its vector norm, so they
+    lower its similarity as they should. The matrix is rebuilt lazily after add().
+
+    Usage:
+        index = ScoreIndex.load(db)
+        for trend, similarity in index.match(["cat mom life gift", "stoic mindset"]):
+            ...
+    """
+
+    def __init__(self, trends: list[Trend], threshold: Optional[float] = None):
+        self.threshold = settings.SIMILARITY_INHERIT_THRESHOLD if threshold is None else threshold
+        self._trends: list[Trend] = []
+        self._grams: list[dict[str, int]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._vocab: dict[str, int] = {}
+        self._idf: Optional[np.ndarray] = None
+        self._oov_idf = 1.0
+        for trend in trends:
+            self.add(trend)
+
+    @classmethod
+    def load(cls, db: Session) -> "ScoreIndex":
+        """Index every trend with its own (not inherited) score from the freshness window."""
+        cutoff = datetime.utcnow() - INHERIT_MAX_AGE
+        trends = (
+            db.query(Trend)
+            .filter(Trend.score_groq.isnot(None))
+            .filter(Trend.last_scored_at >= cutoff)
+            .filter(Trend.score_inherited_from.is_(None))
+            .all()
+        )
+        return cls(trends)
+
+    def __len__(self) -> int:
+        return len(self._trends)
+
+    def add(self, trend: Trend) -> None:
+        key = trend.keyword_normalized or trend.keyword.casefold()
+        self._trends.append(trend)
+        self._grams.append(char_ngrams(key))
+        self._matrix = None
+
+    def _build(self) -> None:
+        vocab: dict[str, int] = {}
+        for grams in self._grams:
+            for gram in grams:
+                vocab.setdefault(gram, len(vocab))
+
+        n = len(self._grams)
+        tf = np.zeros((n, len(vocab)), dtype=np.float32)
+        for row, grams in enumerate(self._grams):
+            for gram, count in grams.items():
+                tf[row, vocab[gram]] = count
+
+        doc_freq = np.count_nonzero(tf, axis=0)
+        self._idf = (np.log((1 + n) / (1 + doc_freq)) + 1).astype(np.float32)
+        self._oov_idf = float(np.log(1 + n) + 1)
+
+        matrix = tf * self._idf
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+        # Stored n-gram-major so a batch only gathers the rows its n-grams touch
+        self._matrix = np.ascontiguousarray(matrix.T)
+        self._vocab = vocab
+
+    def _similarities(self, keys: list[str]) -> np.ndarray:
+        """Cosine similarity of every key to every indexed trend, shape (keys, indexed)."""
+        idf = self._idf.tolist()
+        rows, cols, weights = [], [], []
+        norm_sq = np.zeros(len(keys), dtype=np.float32)
+        for row, key in enumerate(keys):
+            for gram, count in char_ngrams(key).items():
+                col = self._vocab.get(gram)
+                weight = count * (self._oov_idf if col is None else idf[col])
+                norm_sq[row] += weight * weight
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    weights.append(weight)
+        if not cols:
+            return np.zeros((len(keys), len(self._trends)), dtype=np.float32)
+
+        # Only the n-gram columns some candidate uses take part in the product
+        used, position = np.unique(np.array(cols), return_inverse=True)
+        queries = np.zeros((len(keys), len(used)), dtype=np.float32)
+        queries[np.array(rows), position] = weights
+        queries /= np.sqrt(np.maximum(norm_sq, 1e-9))[:, None]
+        return queries @ self._matrix[used]
+
+    def match(self, keys: list[str], exclude_ids: Optional[list[Optional[int]]] = None) -> list[tuple[Optional[Trend], float]]:
+        """
+        Best indexed match for each key, as (trend, cosine similarity); trend is None
+        below the threshold. `exclude_ids[i]` keeps key i from matching that row (itself).
+        """
+        if not keys or not self._trends:
+            return [(None, 0.0)] * len(keys)
+        if self._matrix is None:
+            self._build()
+
+        sims = self._similarities(keys)
+        if exclude_ids:
+            row_of = {t.id: i for i, t in enumerate(self._trends)}
+            for row, trend_id in enumerate(exclude_ids):
+                if trend_id in row_of:
+                    sims[row, row_of[trend_id]] = -1.0
+
+        best = sims.argmax(axis=1)
+        results = []
+        for row, col in enumerate(best):
+            sim = float(sims[row, col])
+            results.append((self._trends[col], sim) if sim >= self.threshold else (None, sim))
+        return results
@@ -0,0 +1,241 @@
+"""
+Scraper source registry.
+
+Every trend source declares its name, fetch function, timeout, concurrency (how many
+pipeline runs may call it at once; an overlapping run waits and then usually hits the
+HTTP cache) and cost (roughly the HTTP requests one call makes). The registry runs a
+source within min(its timeout, what is left of the run-wide deadline), tracks its
+latency and health, and skips it while its circuit breaker is open. A source that
+raises, times out or returns nothing counts as a failure; one that reports all its
+keywords unchanged since the last run (a ScrapeResult with `unchanged`) does not. Health is kept in
+scraper_state across runs and served by GET /trends/sources. State a source hands back with its
+keywords (ScrapeResult.state) is held until the run has stored them: save_pending() then.
+"""
+import asyncio
+import time
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from config import settings
+from services.helpers.rate_limiter import CircuitBreaker
+from services.helpers.scraper_state import get_state, set_state
+from services.pipeline.seeds import scrape_google_seeded
+from services.scrapers.tiktok_trends import get_all_tiktok_trends
+from services.scrapers.pinterest_trends import get_all_pinterest_trends
+from services.scrapers.redbubble_trends import scrape_redbubble_popular_tags
+from services.scrapers.etsy_insights import expand_etsy_autocomplete
+
+# Weight of the latest call in a source's latency moving average
+LATENCY_SMOOTHING = 0.3
+
+
+class Source:
+    """One trend source. Async fetch functions are awaited; sync ones run in the default executor."""
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable,
+        timeout: float,
+        concurrency: int = 1,
+        cost: int = 1,
+        failure_threshold: int = 3,
+        cooldown: float = 1800.0,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.cost = cost
+        self.breaker = CircuitBreaker(f"source:{name}", failure_threshold=failure_threshold, cooldown=cooldown)
+        self.latency_avg: Optional[float] = None
+        self.last_latency: Optional[float] = None
+        self.last_count = 0
+        self.last_unchanged = 0
+        self.last_outcome: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_run_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        # scraper_state values from the last call, written once the run completes
+        self.pending_state: dict = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; scripts running asyncio.run() get a fresh one
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def record(self, outcome: str, latency: float, count: int = 0, error: Optional[str] = None,
+               unchanged: int = 0) -> None:
+        self.runs += 1
+        self.last_unchanged = unchanged
+        self.last_outcome = outcome
+        self.last_latency = round(latency, 2)
+        self.last_count = count
+        self.last_error = error
+        self.last_run_at = time.time()
+        if self.latency_avg is None:
+            self.latency_avg = latency
+        else:
+            self.latency_avg += LATENCY_SMOOTHING * (latency - self.latency_avg)
+        if outcome in ("ok", "unchanged"):
+            self.last_success_at = self.last_run_at
+            self.breaker.success()
+        else:
+            self.failures += 1
+            self.timeouts += outcome == "timeout"
+            self.breaker.failure()
+
+    def state(self) -> dict:
+        return {
+            "breaker": self.breaker.state(),
+            "latency_avg": self.latency_avg,
+            "last_latency": self.last_latency,
+            "last_count": self.last_count,
+            "last_unchanged": self.last_unchanged,
+            "last_outcome": self.last_outcome,
+            "last_error": self.last_error,
+            "last_run_at": self.last_run_at,
+            "last_success_at": self.last_success_at,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+        }
+
+    def restore(self, state: dict) -> None:
+        self.breaker.restore(state.get("breaker", {}))
+        for field in ("latency_avg", "last_latency", "last_count", "last_unchanged", "last_outcome",
+                      "last_error", "last_run_at", "last_success_at", "runs", "failures", "timeouts"):
+            if field in state:
+                setattr(self, field, state[field])
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "timeout_seconds": self.timeout,
+            "concurrency": self.concurrency,
+            "cost": self.cost,
+            "circuit": self.breaker.status(),
+            "latency_avg_seconds": round(self.latency_avg, 2) if self.latency_avg is not None else None,
+            "last_latency_seconds": self.last_latency,
+            "last_count": self.last_count,
+            "last_unchanged": self.last_unchanged,
+            "last_outcome": self.last_outcome,
+            "last_error": self.last_error,
+            "last_run_at": self.last_run_at,
+            "last_success_at": self.last_success_at,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+        }
+
+
+class SourceRegistry:
+    """
+    Usage:
+        source_registry.load(db)
+        deadline = time.monotonic() + settings.SCRAPE_DEADLINE
+        items, outcome = await source_registry.run(source_registry.get("tiktok"), deadline)
+        source_registry.save(db)
+    """
+
+    def __init__(self):
+        self.sources: dict[str, Source] = {}
+        self._loaded = False
+
+    def register(self, source: Source) -> Source:
+        self.sources[source.name] = source
+        return source
+
+    def get(self, name: str) -> Source:
+        return self.sources[name]
+
+    def all(self) -> list[Source]:
+        return list(self.sources.values())
+
+    def load(self, db: Session) -> None:
+        """
+        Pick up health and breaker state saved by an earlier process. Only the first call
+        reads the table; after that the in-memory state is the newest (runs save it).
+        """
+        if self._loaded:
+            return
+        for source in self.sources.values():
+            state = get_state(db, f"source:{source.name}")
+            if state:
+                source.restore(state)
+        self._loaded = True
+
+    def save(self, db: Session) -> None:
+        """Persist every source's state (caller commits)."""
+        for source in self.sources.values():
+            set_state(db, f"source:{source.name}", source.state())
+
+    async def run(self, source: Source, deadline: float) -> tuple[list, str]:
+        """
+        Call one source; returns (results, outcome) with outcome one of
+        ok | unchanged | empty | error | timeout | skipped (breaker open or deadline already passed).
+        """
+        if not source.breaker.allow():
+            return [], "skipped"
+        started = time.monotonic()
+        try:
+            async with source.semaphore():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], "skipped"
+                timeout = min(source.timeout, remaining)
+                if asyncio.iscoroutinefunction(source.fetch):
+                    call = source.fetch()
+                else:
+                    # A sync fetch keeps running in its thread after a timeout; its result is dropped
+                    call = asyncio.get_running_loop().run_in_executor(None, source.fetch)
+                result = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            source.record("timeout", time.monotonic() - started, error=f"timed out after {timeout:.0f}s")
+            return [], "timeout"
+        except Exception as e:
+            print(f"[Sources] {source.name} failed: {e}")
+            source.record("error", time.monotonic() - started, error=str(e))
+            return [], "error"
+        unchanged = getattr(result, "unchanged", 0)
+        source.pending_state.update(getattr(result, "state", None) or {})
+        result = list(result or [])
+        outcome = "ok" if result else "unchanged" if unchanged else "empty"
+        source.record(outcome, time.monotonic() - started, count=len(result), unchanged=unchanged)
+        return result, outcome
+
+    def save_pending(self, db: Session) -> None:
+        """Write the state sources returned with their keywords (caller commits, after storing them)."""
+        for source in self.sources.values():
+            for key, value in source.pending_state.items():
+                set_state(db, key, value)
+            source.pending_state = {}
+
+    def discard_pending(self) -> None:
+        """Drop returned state after a failed run, so those keywords count as new next time."""
+        for source in self.sources.values():
+            source.pending_state = {}
+
+    def status(self) -> list[dict]:
+        return [source.status() for source in self.sources.values()]
+
+
+source_registry = SourceRegistry()
+
+# Google returns dicts with interest metrics; the others return plain keyword strings.
+# Google's timeout covers its seed time budget plus pacing backoff.
+source_registry.register(Source("google", scrape_google_seeded, timeout=settings.GOOGLE_SEED_TIME_BUDGET + 45, cost=20))
+source_registry.register(Source("tiktok", get_all_tiktok_trends, timeout=45, cost=5))
+source_registry.register(Source("pinterest", get_all_pinterest_trends, timeout=45, cost=6))
+source_registry.register(Source("redbubble", scrape_redbubble_popular_tags, timeout=30, cost=1))
+# Autocomplete expansion stops itself at ETSY_EXPAND_TIME_BUDGET; the timeout is the backstop
+source_registry.register(Source(
+    "etsy", expand_etsy_autocomplete, timeout=settings.ETSY_EXPAND_TIME_BUDGET + 15, cost=settings.ETSY_EXPAND_REQUEST_BUDGET
+))
@@ -0,0 +1,710 @@
+"""
+Streaming trend pipeline.
+
+scrape → blacklist → canonicalize/cluster → cache-check/rank → score → deep-analyze,
+then a snapshot of every trend seen goes into trend_snapshots for momentum. Each stage
+is a coroutine connected to the next by an asyncio.Queue (the scorer pulls from a
+queue ranked by expected value, so the per-run scoring budget goes to the likeliest
+winners). Every scraper feeds downstream the moment it returns, so fast sources (TikTok,
+Pinterest, Redbubble) are already being scored while Google Trends is still sleeping
+through its rate limits. Sources come from the registry in services/pipeline/sources.py:
+each has its own timeout and circuit breaker, and the whole scrape stage stops at
+SCRAPE_DEADLINE with whatever the finished sources returned.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from config import settings
+from db.models import Trend, PipelineRun
+from services.scrapers.google_trends import google_pacer
+from services.ai.claude_client import deep_analyze, estimate_analysis_cost
+from services.helpers.blacklist import filter_blacklisted_keywords
+from services.helpers.keywords import WordSegmenter, canonical_key, normalize_keyword, segment_keyword
+from services.helpers.keyword_clusters import KeywordClusters
+from services.helpers.scraper_state import load_pacer, save_pacer
+from services.pipeline.cache import should_rescore, candidate_key, find_existing, upsert_candidates
+from services.pipeline.ranking import PeakIndex, RankedCandidates, expected_value
+from services.pipeline.scoring import apply_score, inherit_score, score_concurrently
+from services.pipeline.similarity import ScoreIndex
+from services.pipeline.analysis import analysis_budget, load_analysis_queue, should_deep_analyze
+from services.pipeline.momentum import write_snapshots, refresh_momentum
+from services.pipeline.sources import source_registry
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+# How often a run refreshes pipeline_runs.heartbeat_at while it is alive
+HEARTBEAT_INTERVAL = 30
+
+# Stored trends scraped within this window seed the near-duplicate clusters
+CLUSTER_SEED_MAX_AGE = timedelta(days=90)
+
+
+class TrendPipeline:
+    """
+    One scrape → score → analyze run.
+
+    Any number of SSE clients can follow the run with stream(); late subscribers get the
+    events they missed replayed first. When a PipelineRun row is given, progress is
+    checkpointed to it (stats, stage timings, heartbeat) as results are committed.
+
+    Usage:
+        pipeline = TrendPipeline(db, run=run_row)
+        task = asyncio.ensure_future(pipeline.run())
+        async for event in pipeline.stream():
+            yield event
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        run: Optional[PipelineRun] = None,
+        keyword_budget: Optional[int] = None,
+        analysis_limit: Optional[int] = None,
+        resume_from: Optional[PipelineRun] = None,
+    ):
+        self.db = db
+        # Stages read rows right after another stage commits — don't expire them on every commit
+        self.db.expire_on_commit = False
+        self.run_record = run
+        # Keywords sent to the LLM per run, best-ranked first
+        self.keyword_budget = max(keyword_budget or settings.SCORING_BUDGET_PER_RUN, 1)
+        # None: analyze everything the spend budget allows; 0: only queue for later runs
+        self.analysis_limit = analysis_limit
+        self.resume_from = resume_from
+
+        self.history: list[dict] = []
+        self.finished = False
+        self._subscribers: list[asyncio.Queue] = []
+
+        self.scored_trends: list[Trend] = []
+        self.stage_timings: dict[str, dict] = {}
+        self.stats = {
+            "scraped_total": 0,
+            "resumed": 0,
+            "blocked": 0,
+            "new_keywords": 0,
+            "scored": 0,
+            "cached": 0,
+            "inherited": 0,
+            "clustered": 0,
+            "deferred": 0,
+            "analyzed": 0,
+            "analysis_queued": 0,
+            "analysis_cost": 0.0,
+            "total_api_cost": 0.0,
+            "snapshots": 0,
+            "sources_skipped": 0,
+            "sources_timed_out": 0,
+        }
+        self._sources_done = 0
+        self._sources_ranked = 0
+        self._candidates: dict[str, dict] = {}
+        self._ranked = RankedCandidates()
+        self._peaks: Optional[PeakIndex] = None
+        self._segmenter = WordSegmenter.default().copy()
+        self._clusters = KeywordClusters()
+        self._stored_keys: set[str] = set()
+        self._similar: Optional[ScoreIndex] = None
+        # trend id → (row, this run's scrape data), snapshotted at the end of the run
+        self._observed: dict[int, tuple[Trend, dict]] = {}
+        self._queued_for_scoring = 0
+        self._scoring_done = 0
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self.run_record.id if self.run_record else None
+
+    # === Events ===
+
+    def _progress(self) -> int:
+        scraped = self._sources_done / len(source_registry.sources)
+        scored = self._scoring_done / self._queued_for_scoring if self._queued_for_scoring else 0
+        return min(95, 10 + int(30 * scraped) + int(55 * scored * scraped))
+
+    def emit(self, status: str, event: str = "progress", progress: int | None = None) -> None:
+        """Record an SSE event and fan it out to everyone streaming this run."""
+        payload = {
+            "status": status,
+            "progress": self._progress() if progress is None else progress,
+        }
+        if self.run_id:
+            payload["run_id"] = self.run_id
+        message = {"event": event, "data": json.dumps(payload)}
+        self.history.append(message)
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    def _close_streams(self) -> None:
+        self.finished = True
+        for queue in self._subscribers:
+            queue.put_nowait(_DONE)
+
+    async def stream(self):
+        """Async generator over this run's SSE events (missed ones replayed first); ends with the run."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for message in self.history:
+            queue.put_nowait(message)
+        if self.finished:
+            queue.put_nowait(_DONE)
+        else:
+            self._subscribers.append(queue)
+        try:
+            while (message := await queue.get()) is not _DONE:
+                yield message
+        finally:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+
+    # === Persistence ===
+
+    def checkpoint(self, status: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Commit pending trend writes together with the run's stats, stage timings and heartbeat."""
+        if self.run_record:
+            now = datetime.utcnow()
+            self.run_record.stats = dict(self.stats)
+            self.run_record.stage_timings = {name: dict(t) for name, t in self.stage_timings.items()}
+            self.run_record.heartbeat_at = now
+            if status:
+                self.run_record.status = status
+                self.run_record.finished_at = now
+            if error:
+                self.run_record.error = error
+        self.db.commit()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.checkpoint()
+
+    async def _timed(self, name: str, stage) -> None:
+        """Run a stage coroutine, recording its wall-clock window in stage_timings."""
+        timing = self.stage_timings.setdefault(name, {})
+        timing["started_at"] = datetime.utcnow().isoformat()
+        started = time.monotonic()
+        try:
+            await stage
+        finally:
+            timing["finished_at"] = datetime.utcnow().isoformat()
+            timing["seconds"] = round(time.monotonic() - started, 2)
+
+    def _load_resume_backlog(self) -> list[tuple[Trend, dict]]:
+        """Rows an interrupted run upserted but never got to score."""
+        if not self.resume_from:
+            return []
+        since = self.resume_from.started_at
+        rows = (
+            self.db.query(Trend)
+            .filter(Trend.last_scraped_at >= since)
+            .filter((Trend.last_scored_at.is_(None)) | (Trend.last_scored_at < since))
+            .all()
+        )
+        return [(t, {"keyword": t.keyword, "source": t.source}) for t in rows if should_rescore(t)]
+
+    # === Run ===
+
+    async def run(self) -> dict:
+        """Run every stage to completion and return the run stats."""
+        print(f"[Pipeline] Starting enhanced trend scrape (run {self.run_id})...")
+        self.emit("🚀 Started scraping trends...", progress=5)
+
+        backlog = self._load_resume_backlog()
+        if backlog:
+            self.stats["resumed"] = len(backlog)
+            self._queued_for_scoring = len(backlog)
+            print(f"[Pipeline] Resuming {len(backlog)} unscored keywords from run {self.resume_from.id}")
+        self._peaks = PeakIndex.load(self.db)
+        self._similar = ScoreIndex.load(self.db)
+        self._segmenter.learn(keyword for (keyword,) in self.db.query(Trend.keyword).all())
+
+        raw_q, clean_q, analyze_q = (asyncio.Queue() for _ in range(3))
+        tasks = [
+            asyncio.ensure_future(self._timed("scrape", self._scrape_stage(raw_q))),
+            asyncio.ensure_future(self._timed("filter", self._filter_stage(raw_q, clean_q, backlog))),
+            asyncio.ensure_future(self._timed("cache_check", self._cache_stage(clean_q))),
+            asyncio.ensure_future(self._timed("score", self._score_stage(analyze_q, backlog))),
+            asyncio.ensure_future(self._timed("deep_analyze", self._analyze_stage(analyze_q))),
+        ]
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            source_registry.discard_pending()
+            if isinstance(e, asyncio.CancelledError):
+                print("[Pipeline] Run cancelled.")
+                self.checkpoint(status="cancelled")
+            else:
+                print(f"[Pipeline] Error: {e}")
+                self.db.rollback()
+                self.checkpoint(status="failed", error=str(e))
+                self.emit(f"Error: {e}", event="error", progress=100)
+            self._close_streams()
+            raise
+        finally:
+            heartbeat.cancel()
+
+        if self.stats["scraped_total"] == 0 and not backlog:
+            print("[Pipeline] No keywords returned from scrapers.")
+            source_registry.discard_pending()
+            self.checkpoint(status="failed", error="No keywords returned from scrapers")
+            self.emit("Failed to fetch keywords.", progress=100)
+        else:
+            await self._timed("momentum", self._momentum_stage())
+            scoring_cost = sum(t.scoring_cost or 0 for t in self.scored_trends)
+            self.stats["total_api_cost"] = scoring_cost + self.stats["analysis_cost"]
+            # Every keyword is stored: sources may now record what they sent (committed below)
+            source_registry.save_pending(self.db)
+            self.checkpoint(status="completed")
+            s = self.stats
+            print(f"[Pipeline] Complete! Cost: ${s['total_api_cost']:.3f}, Cached: {s['cached']}, Inherited: {s['inherited']}")
+            self.emit(
+                f"✅ Complete! Scored: {s['scored']}, Cached: {s['cached']}, Inherited: {s['inherited']}, "
+                f"Analyzed: {s['analyzed']} ({s['analysis_queued']} queued), Cost: ${s['total_api_cost']:.3f}",
+                event="complete",
+                progress=100,
+            )
+        self._close_streams()
+        return self.stats
+
+    # === Stages ===
+
+    async def _scrape_stage(self, out_q: asyncio.Queue) -> None:
+        """
+        Run every registered source concurrently; each one's keywords go downstream as soon
+        as it returns. Sources still running at the run-wide deadline are cut off and the
+        run carries on with what the others returned.
+        """
+        self.emit("Fetching from multiple sources...", progress=10)
+        deadline = time.monotonic() + settings.SCRAPE_DEADLINE
+
+        source_timings = self.stage_timings.setdefault("scrape", {}).setdefault("sources", {})
+        # Start Google at the pace the last run ended on; breakers carry over too
+        load_pacer(self.db, google_pacer)
+        source_registry.load(self.db)
+
+        async def _run_source(source) -> None:
+            result, outcome = await source_registry.run(source, deadline)
+            if outcome != "skipped":
+                source_timings[source.name] = source.last_latency
+
+            items = [r if isinstance(r, dict) else {"keyword": r, "source": source.name} for r in result]
+            self._sources_done += 1
+            self.stats["scraped_total"] += len(items)
+            label = source.name.capitalize()
+            if outcome == "skipped":
+                self.stats["sources_skipped"] += 1
+                if source.breaker.allow():
+                    reason = "run deadline reached"
+                else:
+                    reason = f"failing, retried in {source.breaker.status()['open_for_seconds'] // 60} min"
+                print(f"[Pipeline] {source.name} skipped: {reason}")
+                self.emit(f"⏸️ {label}: skipped ({reason})")
+            elif outcome == "timeout":
+                self.stats["sources_timed_out"] += 1
+                print(f"[Pipeline] {source.name} {source.last_error}")
+                self.emit(f"⏱️ {label}: {source.last_error}")
+            elif source.last_unchanged:
+                self.emit(f"📥 {label}: {len(items)} keywords ({source.last_unchanged} unchanged since last run, skipped)")
+            else:
+                self.emit(f"📥 {label}: {len(items)} keywords")
+            await out_q.put(items)
+
+        await asyncio.gather(*(_run_source(source) for source in source_registry.all()))
+        save_pacer(self.db, google_pacer)
+        source_registry.save(self.db)
+        self.checkpoint()
+        print(f"[Pipeline] Google pacing: {google_pacer.rate_per_minute:.1f} req/min ({google_pacer.throttles} throttles)")
+        await out_q.put(_DONE)
+
+    def _seed_clusters(self, backlog: list) -> set[str]:
+        """
+        Seed the clusters with the resumed backlog, then with recently stored trends (most
+        recently scored first, so each cluster's representative is the row worth keeping).
+        Returns the backlog's representatives.
+        """
+        seen = set()
+        for trend, _ in backlog:
+            seen.add(self._clusters.add(trend.keyword_normalized or canonical_key(trend.keyword, self._segmenter)))
+        cutoff = datetime.utcnow() - CLUSTER_SEED_MAX_AGE
+        rows = (
+            self.db.query(Trend.keyword_normalized)
+            .filter(Trend.keyword_normalized.isnot(None))
+            .filter(Trend.last_scraped_at >= cutoff)
+            .order_by(Trend.last_scored_at.desc().nullslast(), Trend.id)
+            .all()
+        )
+        for (key,) in rows:
+            self._clusters.add(key)
+            self._stored_keys.add(key)
+        return seen
+
+    async def _filter_stage(self, in_q: asyncio.Queue, out_q: asyncio.Queue, backlog: list) -> None:
+        """
+        Drop blacklisted keywords, canonicalize the rest and fold near-duplicates.
+        A variant of a keyword already delivered ("catmomlife" after "Cat Mom Life",
+        "cat mom life gifts") is merged into that candidate — its source, spelling and
+        Google metrics — and the candidate is re-ranked if it is still waiting to be scored.
+        A variant of a stored trend takes that trend's key, so it updates the existing row.
+        """
+        seen = self._seed_clusters(backlog)
+
+        while (items := await in_q.get()) is not _DONE:
+            clean_keywords, blocked = filter_blacklisted_keywords([item["keyword"] for item in items])
+            if blocked:
+                self.stats["blocked"] += len(blocked)
+                print(f"[Blacklist] Filtered {len(blocked)} blacklisted keywords: {[b['keyword'] for b in blocked]}")
+                self.emit(f"🚫 Filtered {len(blocked)} blacklisted keywords")
+
+            # Multi-word keywords teach the segmenter where hashtags break
+            self._segmenter.learn(clean_keywords)
+
+            clean = set(clean_keywords)
+            fresh = []
+            folded = 0
+            for item in items:
+                if item["keyword"] not in clean:
+                    continue
+                key = canonical_key(item["keyword"], self._segmenter)
+                if not key:
+                    continue
+                rep = self._clusters.add(key)
+                if rep in seen:
+                    continue
+                first = self._candidates.get(rep)
+                if first is not None:
+                    folded += self._merge_repeat(first, item, same_key=key == first["key"])
+                    continue
+                # rep is the key itself, or a stored trend's key this one is a variant of
+                item["key"] = key if key in self._stored_keys else rep
+                if item["key"] != key:
+                    folded += 1
+                item["sources"] = [item.get("source", "unknown")]
+                item["aliases"] = []
+                hashtag = item["keyword"].strip().lstrip("#")
+                spelled = segment_keyword(item["keyword"], self._segmenter)
+                if " " not in hashtag and " " in spelled:
+                    # Score and show "stoic mindset", not "stoicmindset"
+                    item["aliases"].append(item["keyword"])
+                    item["keyword"] = spelled
+                self._candidates[rep] = item
+                fresh.append(item)
+
+            if folded:
+                self.stats["clustered"] += folded
+                self.emit(f"🧬 Folded {folded} near-duplicate variants into existing candidates and trends")
+
+            # Forwarded even when empty: the ranking stage counts one batch per source
+            await out_q.put(fresh)
+        await out_q.put(_DONE)
+
+    def _merge_repeat(self, first: dict, repeat: dict, same_key: bool) -> bool:
+        """Fold a repeat into the first candidate of its cluster. Returns True if it was a new variant."""
+        source = repeat.get("source", "unknown")
+        if source not in first["sources"]:
+            first["sources"].append(source)
+        if first.get("avg_interest") is None and repeat.get("avg_interest") is not None:
+            for field in ("avg_interest", "interest_peak", "interest_delta", "trend_direction"):
+                first[field] = repeat.get(field)
+
+        variant = repeat["keyword"].strip()
+        is_new_variant = (
+            normalize_keyword(variant) != normalize_keyword(first["keyword"])
+            and variant not in first["aliases"]
+        )
+        if is_new_variant:
+            if same_key and " " not in first["keyword"].strip() and " " in variant:
+                # "Cat Mom Life" reads (and scores) better than the hashtag "catmomlife"
+                first["aliases"].append(first["keyword"])
+                first["keyword"] = variant
+            else:
+                first["aliases"].append(variant)
+
+        key = first["key"]
+        if key in self._ranked:
+            _, existing = self._ranked.get(key)
+            self._rank(key, first, existing)
+        return is_new_variant
+
+    def _rank(self, key: str, kw_data: dict, existing: Optional[Trend]) -> None:
+        self._ranked.push(key, (kw_data, existing), expected_value(key, kw_data, existing, self._peaks))
+
+    def _budget_released(self) -> int:
+        """
+        Scoring slots usable so far. The budget is released as each source's candidates
+        get ranked, so the first source to answer can't spend all of it before slower
+        (often better) sources have been heard from.
+        """
+        if self._ranked.closed:
+            return self.keyword_budget
+        return self.keyword_budget * self._sources_ranked // len(source_registry.sources)
+
+    async def _cache_stage(self, in_q: asyncio.Queue) -> None:
+        """
+        Look each batch up in one query. Fresh cached rows just get their scrape metadata
+        upserted; candidates near-identical to a recently scored trend inherit its score
+        (one similarity matrix product per batch); everything else goes into the ranked
+        queue for the scoring stage.
+        """
+        ranked_total = 0
+        while (items := await in_q.get()) is not _DONE:
+            existing = find_existing(self.db, [item["key"] for item in items])
+            cached, misses = [], []
+            for item in items:
+                trend = existing.get(item["key"])
+                if trend is not None and not should_rescore(trend):
+                    cached.append(item)
+                else:
+                    misses.append((item, trend))
+
+            matches = self._similar.match(
+                [item["key"] for item, _ in misses],
+                exclude_ids=[trend.id if trend else None for _, trend in misses],
+            )
+            similar = {}
+            for (item, trend), (source, similarity) in zip(misses, matches):
+                if source is not None:
+                    similar[item["key"]] = (item, source, similarity)
+                else:
+                    self._rank(item["key"], item, trend)
+                    ranked_total += 1
+
+            if cached:
+                self._upsert(cached)
+            if similar:
+                self._inherit_scores(similar)
+            self.stats["cached"] += len(cached)
+            self._sources_ranked += 1
+            self._ranked.changed.set()
+
+            self._queued_for_scoring = self.stats["resumed"] + min(ranked_total, self.keyword_budget)
+            saved = self.stats["cached"] + self.stats["inherited"]
+            total = saved + ranked_total
+            cache_rate = saved / total * 100 if total else 0
+            self.emit(
+                f"💰 Cache hit: {self.stats['cached']} exact + {self.stats['inherited']} similar | "
+                f"Ranked: {ranked_total} for {self.keyword_budget} scoring slots ({cache_rate:.0f}% saved)"
+            )
+            print(f"[Cache] Hit rate: {cache_rate:.0f}% - Saved {saved} API calls")
+        self._ranked.close()
+
+    def _upsert(self, items: list[dict]) -> list[tuple[Trend, dict, bool]]:
+        """upsert_candidates, remembering each row for this run's snapshot."""
+        rows = upsert_candidates(self.db, items)
+        for trend, kw_data, _ in rows:
+            self._observed[trend.id] = (trend, kw_data)
+        return rows
+
+    def _inherit_scores(self, similar: dict[str, tuple[dict, Trend, float]]) -> None:
+        """Upsert candidates that matched a recent trend and give them its score."""
+        rows = self._upsert([item for item, _, _ in similar.values()])
+        for trend, kw_data, is_new in rows:
+            _, source, similarity = similar[candidate_key(kw_data)]
+            if is_new:
+                self.stats["new_keywords"] += 1
+            inherit_score(trend, source, similarity)
+            self.stats["inherited"] += 1
+            print(f"[Cache] ≈ '{trend.keyword}' inherits {source.score_groq}/10 from '{source.keyword}' ({similarity:.2f})")
+        self.checkpoint()
+
+    async def _next_allowance(self, spent: int) -> int:
+        """Wait until there are ranked candidates and released budget; 0 once nothing is left."""
+        while True:
+            allowance = self._budget_released() - spent
+            if allowance > 0 and len(self._ranked):
+                return allowance
+            if self._ranked.closed and not len(self._ranked):
+                return 0
+            self._ranked.changed.clear()
+            await self._ranked.changed.wait()
+
+    async def _score_stage(self, out_q: asyncio.Queue, backlog: list) -> None:
+        """
+        Pull the best-ranked candidates whenever a scoring slot frees up, until the run's
+        budget is spent. Waiting for a free slot before picking lets later sources'
+        keywords compete for it.
+        """
+        batch_size = max(settings.SCORING_BATCH_SIZE, 1)
+        slots = asyncio.Semaphore(max(settings.SCORING_CONCURRENCY, 1))
+
+        async def _score_group(items: list) -> None:
+            try:
+                async for trend, _, res in score_concurrently(items, batch_size=batch_size, concurrency=1):
+                    self._scoring_done += 1
+                    if not res:
+                        continue
+                    apply_score(trend, res)
+                    self.stats["scored"] += 1
+                    self.scored_trends.append(trend)
+                    self._similar.add(trend)
+                    model = res.get("model_used", "Groq")
+                    # Commit every result so a crash loses at most the in-flight batch
+                    self.checkpoint()
+                    self.emit(f"✓ Scored '{trend.keyword[:30]}' → {trend.score_groq}/10 [{model}]")
+                    await out_q.put(trend)
+            finally:
+                slots.release()
+
+        async def _score_picked(picked: list) -> None:
+            items = []
+            try:
+                # Only candidates that made the cut get a row — the rest never hit the DB
+                for trend, kw_data, is_new in self._upsert([kw_data for kw_data, _ in picked]):
+                    if is_new:
+                        self.stats["new_keywords"] += 1
+                    # An overlapping run may have scored it in the meantime
+                    if should_rescore(trend):
+                        items.append((trend, kw_data))
+                    else:
+                        self.stats["cached"] += 1
+                        self._scoring_done += 1
+            except BaseException:
+                slots.release()
+                raise
+            await _score_group(items)
+
+        groups = []
+        try:
+            if backlog:
+                # Resumed rows were already budgeted by the run that queued them
+                self.emit(f"♻️ Resuming {len(backlog)} keywords left unscored by an interrupted run")
+                for i in range(0, len(backlog), batch_size):
+                    await slots.acquire()
+                    groups.append(asyncio.ensure_future(_score_group(backlog[i:i + batch_size])))
+
+            spent = 0
+            while spent < self.keyword_budget:
+                await slots.acquire()
+                allowance = await self._next_allowance(spent)
+                if not allowance:
+                    slots.release()
+                    break
+                picked = self._ranked.pop(min(batch_size, allowance))
+                spent += len(picked)
+                best = picked[0][0]["keyword"]
+                self.emit(f"🎯 Scoring {len(picked)} top-ranked keywords (best: '{best[:30]}') — {spent}/{self.keyword_budget} budget")
+                groups.append(asyncio.ensure_future(_score_picked(picked)))
+            await asyncio.gather(*groups)
+
+            # Whatever is still queued missed the budget; it competes again next run
+            while not self._ranked.closed:
+                self._ranked.changed.clear()
+                await self._ranked.changed.wait()
+            self.stats["deferred"] = len(self._ranked.drain())
+        finally:
+            for group in groups:
+                group.cancel()
+        print(
+            f"[Pipeline] Scored {self.stats['scored']} trends, cached {self.stats['cached']}, "
+            f"deferred {self.stats['deferred']} below the budget cut"
+        )
+        await out_q.put(_DONE)
+
+    async def _analyze_stage(self, in_q: asyncio.Queue) -> None:
+        """
+        Deep analyze high-value trends concurrently as soon as they are scored, starting
+        with the ones earlier runs queued. Every call first reserves its worst-case cost
+        against the daily/monthly spend budget; what doesn't fit is queued for the next run.
+        """
+        semaphore = asyncio.Semaphore(max(settings.ANALYSIS_CONCURRENCY, 1))
+        tasks = []
+        seen = set()
+
+        def _consider(trend: Trend) -> None:
+            if trend.id in seen:
+                return
+            seen.add(trend.id)
+            if not should_deep_analyze(trend):
+                trend.analysis_queued_at = None
+                return
+            if self.analysis_limit is not None and len(tasks) >= self.analysis_limit:
+                self._queue_for_analysis(trend)
+                return
+            tasks.append(asyncio.ensure_future(self._analyze(trend, semaphore)))
+
+        # Runs that don't analyze (analysis_limit=0) only add to the queue
+        if self.analysis_limit != 0:
+            queued = load_analysis_queue(self.db)
+            if queued:
+                self.emit(f"📋 {len(queued)} trends queued for deep analysis by earlier runs")
+            for trend in queued:
+                _consider(trend)
+
+        try:
+            while (trend := await in_q.get()) is not _DONE:
+                _consider(trend)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.checkpoint()
+
+    def _queue_for_analysis(self, trend: Trend) -> None:
+        if trend.analysis_queued_at is None:
+            trend.analysis_queued_at = datetime.utcnow()
+        self.stats["analysis_queued"] += 1
+
+    async def _analyze(self, trend: Trend, semaphore: asyncio.Semaphore) -> None:
+        loop = asyncio.get_event_loop()
+        suggestions = trend.product_suggestions or []
+        estimate = estimate_analysis_cost(trend.keyword, trend.score_groq, suggestions)
+
+        async with semaphore:
+            reservation = analysis_budget.reserve(self.db, estimate)
+            if reservation is None:
+                self._queue_for_analysis(trend)
+                print(f"[Claude] Budget reached — queued '{trend.keyword}' for the next run")
+                self.emit(f"⏸ Analysis budget reached — '{trend.keyword[:30]}' queued for the next run")
+                self.checkpoint()
+                return
+
+            print(f"[Claude] Deep analyzing: {trend.keyword}")
+            self.emit(f"🧠 Claude analyzing '{trend.keyword[:30]}'...")
+            try:
+                analysis = await loop.run_in_executor(None, deep_analyze, trend.keyword, trend.score_groq, suggestions)
+            except BaseException:
+                analysis_budget.release(reservation)
+                raise
+
+        analysis_budget.record(
+            self.db,
+            reservation,
+            model=analysis["model"],
+            usage=analysis["usage"],
+            cost=analysis["cost"],
+            trend_id=trend.id,
+            run_id=self.run_id,
+        )
+        self.stats["analysis_cost"] += analysis["cost"]
+
+        if analysis["deep_analysis"] is None:
+            # Failed call — keep it for the next run rather than dropping it
+            self._queue_for_analysis(trend)
+            self.checkpoint()
+            return
+
+        trend.deep_analysis = analysis["deep_analysis"]
+        trend.design_brief = analysis["design_brief"]
+        trend.target_audience = analysis["target_audience"]
+        trend.last_analyzed_at = datetime.utcnow()
+        trend.analysis_queued_at = None
+        trend.analysis_cost = analysis["cost"]
+        trend.total_api_cost = (trend.scoring_cost or 0) + trend.analysis_cost
+        self.stats["analyzed"] += 1
+        self.checkpoint()
+
+        tokens = analysis["usage"]["input_tokens"] + analysis["usage"]["output_tokens"]
+        self.emit(f"✓ Analyzed '{trend.keyword}' ({tokens} tokens, ${trend.analysis_cost:.4f})")
+
+    async def _momentum_stage(self) -> None:
+        """Snapshot every trend this run saw, then recompute momentum for all trends in one pass."""
+        observed = list(self._observed.values())
+        self.stats["snapshots"] = write_snapshots(self.db, observed, self.run_id)
+        updated = refresh_momentum(self.db)
+        self.checkpoint()
+        print(f"[Pipeline] Snapshotted {len(observed)} trends; momentum refreshed for {updated}")
+        self.emit(f"📈 Momentum updated from {len(observed)} new snapshots")
@@ -2,25 +2,42 @@ from typing import List, Dict, Any
 import asyncio
 from services.research.competitor_analysis import analyze_etsy_competitors, analyze_redbubble_competitors
 from services.ai.gap_analyzer import generate_market_gap_report
-from services.ai.groq_client import client, GROQ_FAST_MODEL
+from services.ai.gateway import HEDGE_FALLBACK, INTERACTIVE, llm_gateway
+from services.ai.groq_client import GROQ_FAST_MODEL
+from config import settings
 import statistics
 import json
 
+# {"score": <int>, "logic": "<one short sentence>"}
+OPPORTUNITY_MAX_TOKENS = 150
+# Same as the gap report it is computed from
+OPPORTUNITY_CACHE_TTL = 12 * 3600
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
 class NicheValidator:
     """
     Unified service to validate a product niche across multiple marketplaces.
     """
     
-    async def explore_niche(self, keyword: str) -> Dict[str, Any]:
+    async def explore_niche(self, keyword: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Runs a deep search on Etsy and Redbubble to benchmark competition and find gaps.
+        The AI steps are answered from the LLM response cache unless refresh=True.
         """
         print(f"[Niche Explorer] Starting deep dive for: {keyword}")
         
-        # 1. Fetch Competitor Data
-        # Note: These are currently synchronous but wrapped for potential async expansion
-        etsy_listings = analyze_etsy_competitors(keyword)
-        rb_listings = analyze_redbubble_competitors(keyword)
+        # 1. Fetch Competitor Data (both marketplaces at once over the shared HTTP pool)
+        etsy_listings, rb_listings = await asyncio.gather(
+            analyze_etsy_competitors(keyword),
+            analyze_redbubble_competitors(keyword),
+        )
         
         all_listings = etsy_listings + rb_listings
         
@@ -50,11 +67,12 @@ class NicheValidator:
         
         # 3. Generate Market Gap Report using AI
         # We pass a subset of top listings to the AI to keep context manageable
-        report = generate_market_gap_report(keyword, all_listings[:15])
+        loop = asyncio.get_event_loop()
+        report = await loop.run_in_executor(None, generate_market_gap_report, keyword, all_listings[:15], refresh)
         
         # 4. Calculate Opportunity Score using AI
         # Higher score if many competitors but AI finds clear gaps
-        opportunity_score = await self._calculate_ai_opportunity_score(keyword, len(all_listings), report)
+        opportunity_score = await self._calculate_ai_opportunity_score(keyword, len(all_listings), report, refresh)
         
         return {
             "success": True,
@@ -70,11 +88,11 @@ class NicheValidator:
             "top_competitors": all_listings[:6] # Return few for UI cards
         }
 
-    async def _calculate_ai_opportunity_score(self, keyword: str, count: int, report: str) -> int:
+    async def _calculate_ai_opportunity_score(self, keyword: str, count: int, report: str, refresh: bool = False) -> int:
         """
         Uses Tier 1 Groq to evaluate the niche potential based on volume and gap analysis.
         """
-        if not client:
+        if not settings.AI_API_KEY:
             return 50
 
         prompt = f"""
@@ -94,18 +112,26 @@ class NicheValidator:
         """
 
         try:
-            # Run in executor because client is synchronous
+            # Run in executor because the gateway call blocks (it may queue for the token budget)
             loop = asyncio.get_event_loop()
             completion = await loop.run_in_executor(
                 None, 
-                lambda: client.chat.completions.create(
-                    model=GROQ_FAST_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
+                lambda: llm_gateway.complete(
+                    "groq",
+                    GROQ_FAST_MODEL,
+                    [{"role": "user", "content": prompt}],
+                    max_tokens=OPPORTUNITY_MAX_TOKENS,
+                    priority=INTERACTIVE,
+                    purpose="opportunity_score",
+                    cache_ttl=OPPORTUNITY_CACHE_TTL,
+                    refresh=refresh,
+                    validate=_parses,
+                    fallback=HEDGE_FALLBACK,
                     temperature=0.3,
                     response_format={"type": "json_object"}
                 )
             )
-            data = json.loads(completion.choices[0].message.content)
+            data = json.loads(completion)
             return int(data.get("score", 50))
         except Exception as e:
             print(f"[Niche Validator] AI Scoring Error: {e}")
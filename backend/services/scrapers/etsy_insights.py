@@ -1,5 +1,10 @@
-import httpx
-from typing import List
+import asyncio
+import re
+import string
+import time
+from typing import List, Optional
+from config import settings
+from services.helpers.http_pool import http_pool
 
 # Etsy headers to pass as a browser
 HEADERS = {
@@ -8,45 +13,162 @@ HEADERS = {
     "Referer": "https://www.etsy.com/",
 }
 
-def scrape_etsy_suggestions(query: str = "gift for") -> List[str]:
+COMPLETIONS_URL = "https://www.etsy.com/api/v3/ajax/search/completions"
+
+SEEDS = ["gift for", "custom", "funny", "aesthetic", "vintage"]
+
+# Autocomplete suggestions drift slowly
+CACHE_TTL = 6 * 3600
+
+# In-flight autocomplete requests (the expander runs this many workers)
+ETSY_CONCURRENCY = 5
+
+# Give up on a run after this many failed requests in a row (Etsy is blocking)
+MAX_CONSECUTIVE_ERRORS = 5
+
+http_pool.configure_host("www.etsy.com", concurrency=ETSY_CONCURRENCY)
+
+
+def _normalize_prefix(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+async def _completions(query: str) -> tuple[Optional[List[str]], bool]:
+    """(suggestions, or None on an error response; whether the network was hit)."""
+    # Headers are per request: www.etsy.com is shared with the competitor search pages
+    response = await http_pool.get(
+        COMPLETIONS_URL, params={"query": query, "locale": "en-US"}, headers=HEADERS, timeout=15, cache_ttl=CACHE_TTL
+    )
+    fetched = response.headers.get("X-Cache") not in ("HIT", "REPLAY")
+    if response.status_code != 200:
+        return None, fetched
+    # Data structure: { "results": [ { "query": "..." }, ... ] }
+    results = response.json().get("results", [])
+    return [r.get("query") for r in results if r.get("query")], fetched
+
+
+async def scrape_etsy_suggestions(query: str = "gift for") -> List[str]:
     """
-    Get search completion suggestions from Etsy. 
+    Get search completion suggestions from Etsy.
     Ideal for finding 'gift for' niches.
     """
-    url = f"https://www.etsy.com/api/v3/ajax/search/completions?query={query}&locale=en-US"
-    
     print(f"[Etsy] Fetching suggestions for: '{query}'...")
     try:
-        with httpx.Client(headers=HEADERS, timeout=15, follow_redirects=True) as client:
-            response = client.get(url)
-            if response.status_code != 200:
-                print(f"[Etsy] Error {response.status_code}. Etsy might be blocking.")
-                return []
-            
-            data = response.json()
-            # Data structure: { "results": [ { "query": "..." }, ... ] }
-            results = data.get("results", [])
-            keywords = [r.get("query") for r in results if r.get("query")]
-            
-            print(f"[Etsy] Found {len(keywords)} suggestions.")
-            return keywords
+        keywords, _ = await _completions(query)
+        if keywords is None:
+            print("[Etsy] Error response. Etsy might be blocking.")
+            return []
+
+        print(f"[Etsy] Found {len(keywords)} suggestions.")
+        return keywords
 
     except Exception as e:
         print(f"[Etsy] Scrape error: {e}")
         return []
 
-def get_all_etsy_trends() -> List[str]:
+
+async def expand_etsy_autocomplete(
+    seeds: List[str] = SEEDS,
+    max_depth: Optional[int] = None,
+    request_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> List[str]:
     """
-    Scrape multiple Etsy search entry points for broad niche coverage.
+    Breadth-first keyword discovery over Etsy autocomplete:
+        depth 0  the seed itself            "funny"
+        depth 1  seed + each letter a..z    "funny a", "funny b", ...
+        depth 2+ every suggestion found is queried as a prefix in turn
+    Suggestions from prefixes at max_depth are kept but not expanded; prefixes are
+    deduplicated through a seen-set. Completions come through the HTTP cache (CACHE_TTL),
+    so within the TTL a prefix costs nothing and only network requests count toward
+    `request_budget`. Stops at the request or time budget with what it has found, and
+    raises when Etsy rejects every request so the source registry sees the failure.
     """
-    seeds = ["gift for", "custom", "funny", "aesthetic", "vintage"]
-    all_keywords = set()
+    max_depth = settings.ETSY_EXPAND_DEPTH if max_depth is None else max_depth
+    request_budget = settings.ETSY_EXPAND_REQUEST_BUDGET if request_budget is None else request_budget
+    time_budget = settings.ETSY_EXPAND_TIME_BUDGET if time_budget is None else time_budget
+    stop_at = time.monotonic() + time_budget
+
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = asyncio.Event()
+    seen: set[str] = set()
+    keywords: set[str] = set()
+    counters = {"prefixes": 0, "requests": 0, "cached": 0, "errors": 0, "consecutive_errors": 0}
+
+    def enqueue(prefix: str, depth: int) -> None:
+        prefix = _normalize_prefix(prefix)
+        if prefix and prefix not in seen:
+            seen.add(prefix)
+            queue.put_nowait((prefix, depth))
+
+    def exhausted() -> bool:
+        return (
+            counters["requests"] >= request_budget
+            or time.monotonic() >= stop_at
+            or counters["consecutive_errors"] >= MAX_CONSECUTIVE_ERRORS
+        )
+
+    async def worker() -> None:
+        while True:
+            prefix, depth = await queue.get()
+            try:
+                if exhausted():
+                    stop.set()
+                    continue
+                try:
+                    suggestions, fetched = await _completions(prefix)
+                except Exception as e:
+                    print(f"[Etsy] Autocomplete error for '{prefix}': {e}")
+                    suggestions, fetched = None, True
+                counters["prefixes"] += 1
+                counters["requests" if fetched else "cached"] += 1
+                if suggestions is None:
+                    counters["errors"] += 1
+                    counters["consecutive_errors"] += 1
+                    continue
+                counters["consecutive_errors"] = 0
+                keywords.update(_normalize_prefix(s) for s in suggestions)
+                if depth == 0 and max_depth >= 1:
+                    for letter in string.ascii_lowercase:
+                        enqueue(f"{prefix} {letter}", 1)
+                if max(depth + 1, 2) <= max_depth:
+                    for suggestion in suggestions:
+                        enqueue(suggestion, max(depth + 1, 2))
+            finally:
+                queue.task_done()
+
     for seed in seeds:
-        all_keywords.update(scrape_etsy_suggestions(seed))
-    
+        enqueue(seed, 0)
+    workers = [asyncio.ensure_future(worker()) for _ in range(ETSY_CONCURRENCY)]
+    waiters = [asyncio.ensure_future(queue.join()), asyncio.ensure_future(stop.wait())]
+    try:
+        # Done when the frontier is empty or a budget ran out
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in workers + waiters:
+            task.cancel()
+
+    print(
+        f"[Etsy] Autocomplete expansion: {len(keywords)} keywords from {counters['prefixes']} prefixes "
+        f"({counters['requests']} requests, {counters['cached']} cached, {counters['errors']} errors, "
+        f"{len(seen) - counters['prefixes']} prefixes left)"
+    )
+    if not keywords and counters["errors"]:
+        raise RuntimeError(f"Etsy autocomplete failed ({counters['errors']} error responses)")
+    return sorted(keywords)
+
+
+async def get_all_etsy_trends() -> List[str]:
+    """
+    Scrape multiple Etsy search entry points concurrently for broad niche coverage.
+    """
+    all_keywords = set()
+    for keywords in await asyncio.gather(*(scrape_etsy_suggestions(seed) for seed in SEEDS)):
+        all_keywords.update(keywords)
+
     return list(all_keywords)
 
 if __name__ == "__main__":
-    trends = get_all_etsy_trends()
+    trends = asyncio.run(expand_etsy_autocomplete())
     for i, t in enumerate(trends[:20]):
         print(f"{i+1}. {t}")
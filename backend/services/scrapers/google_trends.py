@@ -1,14 +1,12 @@
 """
-Google Trends scraper using pytrends.
-No API key required — uses the unofficial Google Trends API.
+Google Trends scraper.
+No API key required — uses the unofficial Google Trends API via TrendsClient.
 
 NOTE: The `trending_searches` endpoint is unreliable (returns 404 for many regions).
 We rely primarily on `related_queries` from POD seed keywords, which is more stable.
 """
-from pytrends.request import TrendReq
-from pytrends.exceptions import TooManyRequestsError
-import time
-import random
+from services.helpers.rate_limiter import AdaptivePacer
+from services.scrapers.google_trends_client import TrendsClient, TooManyRequestsError
 
 
 # POD-relevant seed categories to explore
@@ -30,110 +28,235 @@ POD_SEED_KEYWORDS = [
 ]
 
 
-def get_related_queries(keywords: list[str], timeframe: str = "now 7-d", geo: str = "") -> list[str]:
+# Google compares at most this many terms per payload
+MAX_TERMS_PER_PAYLOAD = 5
+
+# Mid-volume POD term included in every interest payload. Google scales each payload so
+# its biggest term peaks at 100; the anchor's average lets batches be rescaled onto the
+# first batch's scale, so `anchored_interest` is comparable across the whole run.
+ANCHOR_KEYWORD = "funny shirts"
+
+
+# Shared by every Google request in the process. The pipeline loads its learned delay
+# from scraper_state before scraping and saves it afterwards.
+google_pacer = AdaptivePacer("google_trends", initial_delay=3.0, min_delay=1.0, max_delay=120.0)
+
+# A payload rate limited this many times in a row is skipped for the run
+MAX_THROTTLE_RETRIES = 3
+
+# Typical time for a payload's two HTTP calls (token + widget data), on top of pacing
+SECONDS_PER_PAYLOAD = 1.5
+
+# Seeds per run when no seed list is given
+DEFAULT_SEEDS_PER_RUN = 6
+
+
+def new_client() -> TrendsClient:
+    """One client (one HTTP session + cookie) to reuse for every payload in a run."""
+    return TrendsClient(hl="en-US", tz=0, timeout=25)
+
+
+def _paced(fetch, label):
+    """Call fetch() at google_pacer's pace, retrying rate-limited calls; None if it never got through."""
+    for _ in range(MAX_THROTTLE_RETRIES + 1):
+        google_pacer.wait()
+        try:
+            result = fetch()
+        except TooManyRequestsError:
+            delay = google_pacer.throttled()
+            print(f"[Google Trends] Rate limited on {label}, slowing to one request per {delay:.1f}s")
+            continue
+        google_pacer.success()
+        return result
+    print(f"[Google Trends] Giving up on {label} after {MAX_THROTTLE_RETRIES} retries")
+    return None
+
+
+def _related(client: TrendsClient, batch: list[str], timeframe: str, geo: str) -> dict:
+    client.build_payload(batch, timeframe=timeframe, geo=geo)
+    return client.related_queries()
+
+
+def _interest(client: TrendsClient, batch: list[str], timeframe: str):
+    client.build_payload(batch, timeframe=timeframe, geo="")
+    return client.interest_over_time()
+
+
+def _chunks(items: list[str], size: int) -> list[list[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def get_related_by_seed(
+    keywords: list[str],
+    timeframe: str = "now 7-d",
+    geo: str = "",
+    client: TrendsClient | None = None,
+) -> dict[str, list[str]]:
     """
-    Fetch related rising queries for given seed keywords.
-    Returns a deduplicated list of trending phrase strings.
+    Fetch related rising queries for given seed keywords, five seeds per payload.
+    Returns {seed: [phrase, ...]}, top 5 per seed; seeds that failed map to [].
     """
-    pytrends = TrendReq(hl="en-US", tz=0, timeout=(10, 25), retries=2, backoff_factor=0.5)
-    all_phrases = []
+    client = client or new_client()
+    by_seed: dict[str, list[str]] = {keyword: [] for keyword in keywords}
 
-    # Process in batches of 1 (most reliable way to avoid quota issues)
-    for keyword in keywords:
+    for batch in _chunks(keywords, MAX_TERMS_PER_PAYLOAD):
         try:
-            pytrends.build_payload([keyword], timeframe=timeframe, geo=geo)
-            related = pytrends.related_queries()
+            related = _paced(lambda: _related(client, batch, timeframe, geo), batch)
+            if related is None:
+                continue
 
-            if keyword in related:
-                rising_df = related[keyword].get("rising")
-                top_df = related[keyword].get("top")
+            for keyword in batch:
+                if keyword not in related:
+                    continue
+                rising = related[keyword]["rising"]
+                top = related[keyword]["top"]
 
-                if rising_df is not None and not rising_df.empty:
-                    all_phrases.extend(rising_df["query"].tolist()[:5])  # top 5 rising only
-                elif top_df is not None and not top_df.empty:
-                    all_phrases.extend(top_df["query"].tolist()[:5])  # fallback to top
+                if rising:
+                    by_seed[keyword] = rising[:5]  # top 5 rising only
+                elif top:
+                    by_seed[keyword] = top[:5]  # fallback to top
 
-            # Polite delay — avoids rate-limiting from Google
-            time.sleep(random.uniform(2.5, 5.0))
-
-        except TooManyRequestsError:
-            print(f"[Google Trends] Rate limited on '{keyword}', sleeping 90s...")
-            time.sleep(90)
         except Exception as e:
-            print(f"[Google Trends] Error on '{keyword}': {e}")
-            time.sleep(3)
+            print(f"[Google Trends] Error on {batch}: {e}")
+
+    return by_seed
 
-    # Deduplicate and clean
+
+def _dedupe(phrases: list[str]) -> list[str]:
     seen = set()
     unique = []
-    for phrase in all_phrases:
+    for phrase in phrases:
         if phrase:
             cleaned = phrase.strip().lower()
             if cleaned and cleaned not in seen:
                 seen.add(cleaned)
                 unique.append(phrase.strip())
-
     return unique
 
 
-def get_interest_over_time(keyword: str, timeframe: str = "today 3-m") -> dict | None:
+def get_related_queries(
+    keywords: list[str],
+    timeframe: str = "now 7-d",
+    geo: str = "",
+    client: TrendsClient | None = None,
+) -> list[str]:
     """
-    Get detailed interest metrics for a keyword.
-    Returns: {avg_interest, interest_peak, current_interest, trend_direction}
+    Fetch related rising queries for given seed keywords.
+    Returns a deduplicated list of trending phrase strings.
     """
-    try:
-        pytrends = TrendReq(hl="en-US", tz=0, timeout=(10, 25), retries=2, backoff_factor=0.5)
-        pytrends.build_payload([keyword], timeframe=timeframe, geo="")
-
-        interest_df = pytrends.interest_over_time()
-
-        if interest_df.empty or keyword not in interest_df.columns:
-            return None
+    by_seed = get_related_by_seed(keywords, timeframe, geo, client)
+    return _dedupe([phrase for phrases in by_seed.values() for phrase in phrases])
 
-        values = interest_df[keyword].tolist()
 
-        # Calculate metrics
-        avg = sum(values) / len(values) if values else 0
-        peak = max(values) if values else 0
-        current = values[-1] if values else 0
+def estimate_seconds_per_seed() -> float:
+    """
+    Rough wall time one seed costs at the current pace: its share of a related-queries
+    payload plus interest payloads for its ~5 related keywords (4 per payload).
+    """
+    payloads = 1 / MAX_TERMS_PER_PAYLOAD + 5 / (MAX_TERMS_PER_PAYLOAD - 1)
+    return payloads * (google_pacer.delay + SECONDS_PER_PAYLOAD)
 
-        # Determine trend direction (compare recent vs older)
-        if len(values) >= 4:
-            recent_avg = sum(values[-4:]) / 4
-            older_avg = sum(values[:-4]) / len(values[:-4]) if len(values[:-4]) > 0 else recent_avg
 
-            if recent_avg > older_avg * 1.3:
-                direction = "rising"
-            elif recent_avg < older_avg * 0.7:
-                direction = "declining"
-            else:
-                direction = "stable"
+def _interest_metrics(values: list[float]) -> dict:
+    """
+    avg/peak/current interest and direction from one interest-over-time series, on the
+    keyword's own 0-100 scale (its peak is 100, as when Google is asked about it alone).
+    """
+    top = max(values) if values else 0
+    if top > 0:
+        values = [v * 100 / top for v in values]
+    avg = sum(values) / len(values) if values else 0
+    peak = max(values) if values else 0
+    current = values[-1] if values else 0
+
+    # Determine trend direction (compare recent vs older)
+    if len(values) >= 4:
+        recent_avg = sum(values[-4:]) / 4
+        older_avg = sum(values[:-4]) / len(values[:-4]) if len(values[:-4]) > 0 else recent_avg
+
+        if recent_avg > older_avg * 1.3:
+            direction = "rising"
+        elif recent_avg < older_avg * 0.7:
+            direction = "declining"
         else:
             direction = "stable"
+    else:
+        direction = "stable"
+
+    return {
+        "avg_interest": int(avg),
+        "interest_peak": int(peak),
+        "current_interest": int(current),
+        "trend_direction": direction,
+        "interest_delta": ((current - avg) / avg * 100) if avg > 0 else 0
+    }
+
+
+def get_interest_batch(
+    keywords: list[str],
+    timeframe: str = "today 3-m",
+    client: TrendsClient | None = None,
+    anchor: str = ANCHOR_KEYWORD,
+) -> dict[str, dict | None]:
+    """
+    Interest metrics for many keywords, four per payload alongside the anchor term.
+    avg_interest, interest_peak and current_interest stay on each keyword's own 0-100 scale,
+    which the scoring thresholds are calibrated for. `anchored_interest` is the average
+    rescaled by the batch's anchor onto the first batch's scale: comparable across the run,
+    and above 100 when a later batch holds a bigger term. Returns {keyword: metrics or None}.
+    """
+    results: dict[str, dict | None] = {keyword: None for keyword in keywords}
+    if not keywords:
+        return results
+    client = client or new_client()
+    pending = list(dict.fromkeys(k for k in keywords if k.casefold() != anchor.casefold()))
+    reference = None  # anchor average in the first usable batch
+
+    for batch in _chunks(pending, MAX_TERMS_PER_PAYLOAD - 1) or [[]]:
+        try:
+            series = _paced(lambda: _interest(client, [anchor] + batch, timeframe), batch)
+
+            if not series or anchor not in series:
+                continue
+
+            anchor_values = series[anchor]
+            anchor_avg = sum(anchor_values) / len(anchor_values) if anchor_values else 0
+            if reference is None and anchor_avg > 0:
+                reference = anchor_avg
+            # An anchor swamped to 0 by a huge term leaves nothing to rescale by; keep raw values
+            scale = reference / anchor_avg if reference and anchor_avg > 0 else 1.0
+
+            for keyword in [anchor] + batch:
+                if keyword in series:
+                    values = series[keyword]
+                    metrics = _interest_metrics(values)
+                    metrics["anchored_interest"] = round(sum(values) / len(values) * scale) if values else 0
+                    for original in keywords:
+                        if original.casefold() == keyword.casefold():
+                            results[original] = metrics
 
-        return {
-            "avg_interest": int(avg),
-            "interest_peak": int(peak),
-            "current_interest": int(current),
-            "trend_direction": direction,
-            "interest_delta": ((current - avg) / avg * 100) if avg > 0 else 0
-        }
+        except Exception as e:
+            print(f"[Interest] Error fetching interest for {batch}: {e}")
 
-    except Exception as e:
-        print(f"[Interest] Error fetching interest for '{keyword}': {e}")
-        return None
+    return results
+
+
+def get_interest_over_time(keyword: str, timeframe: str = "today 3-m") -> dict | None:
+    """
+    Get detailed interest metrics for a keyword (see get_interest_batch).
+    Returns: {avg_interest, interest_peak, current_interest, trend_direction, anchored_interest}
+    """
+    return get_interest_batch([keyword], timeframe=timeframe).get(keyword)
 
 
 def scrape_google_trends(custom_seeds: list[str] | None = None) -> list[str]:
     """
     Main entry point: scrape Google Trends.
     Returns a list of trending keyword/phrase strings ready for AI scoring.
-    Limits to first 6 seeds per run to keep execution under 2 minutes.
+    Without custom seeds, takes the first 6 defaults to keep execution under 2 minutes;
+    the pipeline rotates through the trend_seeds table instead (services/pipeline/seeds.py).
     """
-    seeds = custom_seeds or POD_SEED_KEYWORDS
-
-    # Rotate through seeds each run (6 per call to stay fast)
-    batch = seeds[:6]
+    batch = custom_seeds or POD_SEED_KEYWORDS[:DEFAULT_SEEDS_PER_RUN]
     print(f"[Google Trends] Scraping {len(batch)} seed keyword groups...")
 
     related = get_related_queries(batch)
@@ -144,39 +267,47 @@ def scrape_google_trends(custom_seeds: list[str] | None = None) -> list[str]:
 def scrape_google_trends_enhanced(custom_seeds: list[str] | None = None) -> list[dict]:
     """
     Enhanced scraper that includes interest metrics.
-    Returns list of dicts: {keyword, avg_interest, trend_direction, source, ...}
+    Every custom seed is scraped; without them, the first 6 defaults.
+    Returns list of dicts: {keyword, seed, avg_interest, trend_direction, source, ...}
     """
-    seeds = custom_seeds or POD_SEED_KEYWORDS
-    batch = seeds[:6]
+    batch = custom_seeds or POD_SEED_KEYWORDS[:DEFAULT_SEEDS_PER_RUN]
 
     print(f"[Google Trends Enhanced] Scraping {len(batch)} seed keyword groups...")
 
-    related = get_related_queries(batch)
+    with new_client() as client:
+        by_seed = get_related_by_seed(batch, client=client)
+        related = _dedupe([phrase for phrases in by_seed.values() for phrase in phrases])
+        # Interest metrics for every related keyword, four per payload with the anchor
+        interest = get_interest_batch(related, client=client)
 
-    # Now get interest metrics for each keyword
-    enhanced_results = []
-    for keyword in related[:15]:  # Limit to prevent rate limiting
-        interest_data = get_interest_over_time(keyword)
+    # First seed that surfaced each phrase, for per-seed yield
+    seed_of = {}
+    for seed, phrases in by_seed.items():
+        for phrase in phrases:
+            seed_of.setdefault(phrase.strip().lower(), seed)
 
+    enhanced_results = []
+    for keyword in related:
         result = {
             "keyword": keyword,
+            "seed": seed_of.get(keyword.lower()),
             "source": "google",
         }
 
-        if interest_data:
-            result.update(interest_data)
+        if interest.get(keyword):
+            result.update(interest[keyword])
         else:
             # Fallback values if interest data unavailable
             result.update({
                 "avg_interest": None,
                 "interest_peak": None,
                 "current_interest": None,
+                "anchored_interest": None,
                 "trend_direction": "stable",
                 "interest_delta": 0
             })
 
         enhanced_results.append(result)
-        time.sleep(random.uniform(1.5, 3.0))  # Be polite to Google
 
     print(f"[Google Trends Enhanced] Enriched {len(enhanced_results)} keywords with interest data")
     return enhanced_results
@@ -0,0 +1,133 @@
+"""
+Minimal Google Trends client — the explore, interest-over-time and related-queries
+widgets only, parsed straight from JSON into plain lists (no pandas, no pytrends).
+
+Same call pattern as pytrends' TrendReq: build_payload() fetches the widget tokens for a
+set of terms, then interest_over_time() / related_queries() fetch the widgets.
+"""
+import json
+import httpx
+
+BASE_TRENDS_URL = "https://trends.google.com/trends"
+EXPLORE_URL = f"{BASE_TRENDS_URL}/api/explore"
+INTEREST_OVER_TIME_URL = f"{BASE_TRENDS_URL}/api/widgetdata/multiline"
+RELATED_QUERIES_URL = f"{BASE_TRENDS_URL}/api/widgetdata/relatedsearches"
+
+
+class TrendsResponseError(Exception):
+    """Google answered with a non-JSON or non-200 response."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TooManyRequestsError(TrendsResponseError):
+    """HTTP 429 — Google's rate limit."""
+
+
+class TrendsClient:
+    """
+    One HTTP session (and Google's NID cookie) reused for every payload.
+
+    Usage:
+        client = TrendsClient()
+        client.build_payload(["cat mom", "dog dad"], timeframe="today 3-m")
+        client.interest_over_time()   # {"cat mom": [41, 44, ...], "dog dad": [...]}
+        client.related_queries()      # {"cat mom": {"top": [...], "rising": [...]}, ...}
+    """
+
+    def __init__(self, hl: str = "en-US", tz: int = 0, timeout: float = 25.0):
+        self.hl = hl
+        self.tz = tz
+        self.http = httpx.Client(headers={"accept-language": hl}, timeout=timeout, follow_redirects=True)
+        self.kw_list: list[str] = []
+        self._has_cookie = False
+        self._timeseries_widget: dict | None = None
+        self._related_widgets: list[dict] = []
+
+    def close(self) -> None:
+        self.http.close()
+
+    def __enter__(self) -> "TrendsClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _ensure_cookie(self) -> None:
+        """
+        Google rejects API calls without the NID cookie set by the explore page. A page that
+        did not set it (429, consent redirect) raises TooManyRequestsError, so the caller's
+        pacing backs off and the next call asks again.
+        """
+        if self._has_cookie:
+            return
+        response = self.http.get(f"{BASE_TRENDS_URL}/explore/", params={"geo": self.hl[-2:]})
+        if response.status_code != 200 or not any(c.name == "NID" for c in self.http.cookies.jar):
+            raise TooManyRequestsError(
+                f"Google Trends explore page returned {response.status_code} without the NID cookie",
+                response.status_code,
+            )
+        self._has_cookie = True
+
+    def _get_json(self, url: str, method: str = "GET", params: dict | None = None) -> dict:
+        self._ensure_cookie()
+        response = self.http.request(method, url, params=params)
+        if response.status_code == 429:
+            raise TooManyRequestsError("Google Trends rate limit (429)", 429)
+        if response.status_code != 200:
+            raise TrendsResponseError(f"Google Trends returned {response.status_code}", response.status_code)
+        # Responses start with an anti-JSON-hijacking prefix like )]}',
+        text = response.text
+        start = text.find("{")
+        if start < 0:
+            raise TrendsResponseError("Google Trends returned no JSON", response.status_code)
+        return json.loads(text[start:])
+
+    def build_payload(self, kw_list: list[str], timeframe: str = "today 5-y", geo: str = "", cat: int = 0) -> None:
+        """Fetch the widget tokens for up to five terms compared together."""
+        self.kw_list = list(kw_list)
+        req = {
+            "comparisonItem": [{"keyword": kw, "time": timeframe, "geo": geo} for kw in self.kw_list],
+            "category": cat,
+            "property": "",
+        }
+        widgets = self._get_json(
+            EXPLORE_URL,
+            method="POST",
+            params={"hl": self.hl, "tz": self.tz, "req": json.dumps(req)},
+        )["widgets"]
+        self._timeseries_widget = next((w for w in widgets if w["id"] == "TIMESERIES"), None)
+        self._related_widgets = [w for w in widgets if "RELATED_QUERIES" in w["id"]]
+
+    def _widget_params(self, widget: dict) -> dict:
+        return {"req": json.dumps(widget["request"]), "token": widget["token"], "tz": self.tz}
+
+    def interest_over_time(self) -> dict[str, list[int]]:
+        """{term: interest per time step} for the current payload; {} when Google has no data."""
+        if self._timeseries_widget is None:
+            return {}
+        data = self._get_json(INTEREST_OVER_TIME_URL, params=self._widget_params(self._timeseries_widget))
+        timeline = data.get("default", {}).get("timelineData", [])
+        if not timeline:
+            return {}
+        return {kw: [point["value"][i] for point in timeline] for i, kw in enumerate(self.kw_list)}
+
+    def related_queries(self) -> dict[str, dict[str, list[str]]]:
+        """{term: {"top": [query, ...], "rising": [query, ...]}} for the current payload."""
+        results = {}
+        for widget in self._related_widgets:
+            try:
+                kw = widget["request"]["restriction"]["complexKeywordsRestriction"]["keyword"][0]["value"]
+            except (KeyError, IndexError):
+                kw = ""
+            data = self._get_json(RELATED_QUERIES_URL, params=self._widget_params(widget))
+            ranked = data.get("default", {}).get("rankedList", [])
+            top = ranked[0]["rankedKeyword"] if len(ranked) > 0 else []
+            rising = ranked[1]["rankedKeyword"] if len(ranked) > 1 else []
+            results[kw] = {
+                "top": [item["query"] for item in top],
+                "rising": [item["query"] for item in rising],
+            }
+        return results
@@ -1,12 +1,17 @@
-import httpx
+import asyncio
+import hashlib
 import json
-import re
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Optional
+from services.helpers.http_pool import http_pool
+from services.helpers.scraper_state import ScrapeResult, read_state, write_state
 
 # Target regions for POD
 TARGET_REGIONS = ["US", "GB", "DE", "CA", "AU"]
 
+PINTEREST_HOST = "trends.pinterest.com"
+
 # Browser-like headers
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -16,79 +21,164 @@ HEADERS = {
     "X-Requested-With": "XMLHttpRequest",
 }
 
-def scrape_pinterest_trends(client: httpx.Client, region: str = "US") -> List[str]:
-    """
-    Scrape trending keywords from Pinterest Trends API using an existing session.
-    """
+# The trend lists only move a few times a day
+CACHE_TTL = 6 * 3600
+
+# A stored session is reused until its cookies expire, but never for longer than this
+SESSION_MAX_AGE = 7 * 24 * 3600
+SESSION_STATE_KEY = "session:pinterest"
+
+# An unchanged region list is skipped downstream, but re-sent at least this often so
+# its keywords keep getting observed (days_trending counts distinct days)
+UNCHANGED_RESEND_AFTER = 24 * 3600
+HASHES_STATE_KEY = "hashes:pinterest"
+
+# All regions are fetched at once
+http_pool.configure_host(PINTEREST_HOST, headers=HEADERS, concurrency=len(TARGET_REGIONS), cache_ttl=CACHE_TTL)
+
+
+async def _fetch_region(region: str, csrftoken: Optional[str]) -> tuple[int, List[str]]:
+    """(HTTP status, trending terms) for one region."""
     p_region = "GB+IE" if region == "GB" else region
-    
-    # Pinterest API can be picky about the endDate. 
+
+    # Pinterest API can be picky about the endDate.
     # Let's try omitting it or using a more conservative one if we get 400s.
     # The browser interception used 2026-02-13.
     # We'll use a date from about a week ago to be safe.
     end_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-    
+
     url = (
         f"https://trends.pinterest.com/top_trends_filtered/"
         f"?lookbackWindow=2&endDate={end_date}&rankingMethod=3"
         f"&country={p_region}&trendsPreset=3&numTermsToReturn=30"
     )
-    
+    response = await http_pool.get(url, timeout=30, headers={"X-CSRFToken": csrftoken} if csrftoken else None)
+    if response.status_code != 200:
+        print(f"[Pinterest] Error {response.status_code} for {region}. Response: {response.text[:100]}")
+        return response.status_code, []
+
+    # New logic: access the 'values' key
+    values = response.json().get("values", [])
+    if not isinstance(values, list):
+        print(f"[Pinterest] Warning: 'values' is not a list for {region}")
+        return response.status_code, []
+    return response.status_code, [item.get("term") for item in values if isinstance(item, dict) and item.get("term")]
+
+
+async def scrape_pinterest_trends(region: str = "US", csrftoken: str | None = None) -> List[str]:
+    """
+    Scrape trending keywords from Pinterest Trends API using the pooled session's cookies.
+    """
     print(f"[Pinterest] Scraping trends for region: {region}...")
-    
     try:
-        response = client.get(url)
-        if response.status_code != 200:
-            print(f"[Pinterest] Error {response.status_code} for {region}. Response: {response.text[:100]}")
-            return []
-            
-        data = response.json()
-        
-        # New logic: access the 'values' key
-        values = data.get("values", [])
-        if not isinstance(values, list):
-            print(f"[Pinterest] Warning: 'values' is not a list for {region}")
-            return []
-
-        keywords = [item.get("term") for item in values if isinstance(item, dict) and item.get("term")]
+        _, keywords = await _fetch_region(region, csrftoken)
         print(f"[Pinterest] Found {len(keywords)} trends for {region}")
         return keywords
-
     except Exception as e:
         print(f"[Pinterest] Error scraping {region}: {e}")
         return []
 
-def get_all_pinterest_trends() -> List[str]:
+
+def _session_expiry(cookies: list[dict]) -> float:
+    expiries = [c["expires"] for c in cookies if c.get("expires")]
+    return min(expiries + [time.time() + SESSION_MAX_AGE])
+
+
+async def _new_session() -> Optional[str]:
+    """Cold GET of the home page for fresh cookies and CSRF token; stored for later runs."""
+    print("[Pinterest] Initializing session...")
+    # Never served from the cache (the page exists for its Set-Cookie)
+    await http_pool.get("https://trends.pinterest.com/", timeout=30, cache_ttl=0)
+    csrftoken = http_pool.cookie("csrftoken", PINTEREST_HOST)
+    if not csrftoken:
+        print("[Pinterest] Warning: No csrftoken found.")
+        return None
+    cookies = http_pool.export_cookies(PINTEREST_HOST)
+    await asyncio.get_running_loop().run_in_executor(None, write_state, SESSION_STATE_KEY, {
+        "cookies": cookies,
+        "csrftoken": csrftoken,
+        "expires_at": _session_expiry(cookies),
+    })
+    print("[Pinterest] CSRF token acquired.")
+    return csrftoken
+
+
+async def _stored_session() -> Optional[str]:
+    """Load a still-valid stored session into the shared cookie jar; returns its CSRF token."""
+    session = await asyncio.get_running_loop().run_in_executor(None, read_state, SESSION_STATE_KEY)
+    if not session or session.get("expires_at", 0) <= time.time():
+        return None
+    http_pool.import_cookies(session["cookies"])
+    return session["csrftoken"]
+
+
+def _list_hash(terms: List[str]) -> str:
+    return hashlib.sha256(json.dumps(sorted(terms)).encode()).hexdigest()
+
+
+async def get_all_pinterest_trends() -> ScrapeResult:
     """
-    Initialize session and scrape Pinterest trends across all target regions.
+    Scrape Pinterest trends across all target regions concurrently.
+
+    The session (cookies + CSRF token) is stored with its expiry and reused across
+    runs; a 401/403 from any region refreshes it and retries those regions once.
+    Each region's list is hashed, and a list identical to the last one sent downstream
+    is left out (counted in `unchanged`) until UNCHANGED_RESEND_AFTER has passed. The new
+    hashes go back in ScrapeResult.state; the pipeline saves them only once the run has
+    stored the keywords, so a failed run does not mark its lists as already sent.
     """
-    all_keywords = set()
-    
-    with httpx.Client(headers=HEADERS, timeout=30, follow_redirects=True) as client:
+    loop = asyncio.get_running_loop()
+    try:
+        csrftoken = await _stored_session()
+        if csrftoken:
+            print("[Pinterest] Reusing stored session.")
+        else:
+            csrftoken = await _new_session()
+    except Exception as e:
+        print(f"[Pinterest] Initialization failed: {e}")
+        return ScrapeResult()
+
+    async def fetch(region: str, token: Optional[str]) -> tuple[int, List[str]]:
+        try:
+            return await _fetch_region(region, token)
+        except Exception as e:
+            print(f"[Pinterest] Error scraping {region}: {e}")
+            return 0, []
+
+    results = dict(zip(TARGET_REGIONS, await asyncio.gather(*(fetch(r, csrftoken) for r in TARGET_REGIONS))))
+    rejected = [region for region, (status, _) in results.items() if status in (401, 403)]
+    if rejected:
+        print(f"[Pinterest] Session rejected for {', '.join(rejected)} — refreshing")
         try:
-            # Initial hit to get cookies and CSRF
-            print("[Pinterest] Initializing session...")
-            resp = client.get("https://trends.pinterest.com/")
-            csrftoken = client.cookies.get("csrftoken")
-            if csrftoken:
-                client.headers["X-CSRFToken"] = csrftoken
-                print("[Pinterest] CSRF token acquired.")
-            else:
-                print("[Pinterest] Warning: No csrftoken found.")
+            csrftoken = await _new_session()
         except Exception as e:
-            print(f"[Pinterest] Initialization failed: {e}")
-            return []
+            print(f"[Pinterest] Session refresh failed: {e}")
+        else:
+            retried = await asyncio.gather(*(fetch(r, csrftoken) for r in rejected))
+            results.update(zip(rejected, retried))
+
+    hashes = await loop.run_in_executor(None, read_state, HASHES_STATE_KEY) or {}
+    now = time.time()
+    all_keywords = set()
+    unchanged = set()
+    for region, (_, terms) in results.items():
+        if not terms:
+            continue
+        digest = _list_hash(terms)
+        previous = hashes.get(region, {})
+        if previous.get("hash") == digest and now - previous.get("sent_at", 0) < UNCHANGED_RESEND_AFTER:
+            unchanged.update(terms)
+            continue
+        hashes[region] = {"hash": digest, "sent_at": now}
+        all_keywords.update(terms)
 
-        for region in TARGET_REGIONS:
-            terms = scrape_pinterest_trends(client, region)
-            all_keywords.update(terms)
-    
     filtered = [t for t in all_keywords if len(t) > 2]
-    print(f"[Pinterest] Total unique trends found: {len(filtered)}")
-    return filtered
+    skipped = len(unchanged - all_keywords)
+    print(f"[Pinterest] Total unique trends found: {len(filtered)} ({skipped} unchanged since the last run)")
+    return ScrapeResult(filtered, unchanged=skipped, state={HASHES_STATE_KEY: hashes})
 
 if __name__ == "__main__":
     # Test script
-    results = get_all_pinterest_trends()
+    results = asyncio.run(get_all_pinterest_trends())
     for i, tag in enumerate(results[:20]):
         print(f"{i+1}. {tag}")
@@ -1,7 +1,7 @@
-import httpx
-import re
-from bs4 import BeautifulSoup
+import asyncio
 from typing import List
+from services.helpers.html_parse import get_backend
+from services.helpers.http_pool import http_pool
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -9,7 +9,10 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.5",
 }
 
-def scrape_redbubble_popular_tags() -> List[str]:
+# The explore page is re-ranked a few times a day
+CACHE_TTL = 3 * 3600
+
+async def scrape_redbubble_popular_tags() -> List[str]:
     """
     Scrape popular tags from Redbubble by looking at 'Popular Designs' sections.
     """
@@ -19,40 +22,37 @@ def scrape_redbubble_popular_tags() -> List[str]:
     print(f"[Redbubble] Scraping popular tags from: {url}...")
     
     try:
-        with httpx.Client(headers=HEADERS, timeout=20, follow_redirects=True) as client:
-            response = client.get(url)
-            if response.status_code != 200:
-                print(f"[Redbubble] Error {response.status_code}. Access might be restricted.")
-                return []
-            
-            html = response.text
-            # Use BeautifulSoup to find tags or just regex the keywords
-            soup = BeautifulSoup(html, "html.parser")
-            
-            # Often tags are in link elements with 'shop' or 'keywords' in the href
-            tags = set()
-            
-            # Strategy 1: Find all links to search results
-            for link in soup.find_all("a", href=re.compile(r"/shop/")):
-                text = link.text.strip().lower()
-                if len(text) > 3 and "redbubble" not in text and "login" not in text:
-                    tags.add(text)
-            
-            # Strategy 2: Look for 'Trending' or 'Popular' headers and their neighbors
-            # (Heuristic based on Redbubble's typical layout)
+        # Headers are per request: www.redbubble.com is shared with the competitor search pages
+        response = await http_pool.get(url, headers=HEADERS, timeout=20, cache_ttl=CACHE_TTL)
+        if response.status_code != 200:
+            print(f"[Redbubble] Error {response.status_code}. Access might be restricted.")
+            return []
+        
+        # Often tags are in link elements with 'shop' or 'keywords' in the href
+        tags = set()
+        
+        # Strategy 1: Find all links to search results (parsed off the event loop; see html_parse.py)
+        loop = asyncio.get_running_loop()
+        for text in await loop.run_in_executor(None, get_backend().link_texts, response.text, "/shop/"):
+            text = text.strip().lower()
+            if len(text) > 3 and "redbubble" not in text and "login" not in text:
+                tags.add(text)
+        
+        # Strategy 2: Look for 'Trending' or 'Popular' headers and their neighbors
+        # (Heuristic based on Redbubble's typical layout)
+        
+        refined_tags = [t for t in tags if " " in t] # Multi-word tags are better for niches
+        if not refined_tags:
+            refined_tags = list(tags)
             
-            refined_tags = [t for t in tags if " " in t] # Multi-word tags are better for niches
-            if not refined_tags:
-                refined_tags = list(tags)
-                
-            print(f"[Redbubble] Extracted {len(refined_tags)} potential tags/keywords.")
-            return refined_tags[:50]
+        print(f"[Redbubble] Extracted {len(refined_tags)} potential tags/keywords.")
+        return refined_tags[:50]
 
     except Exception as e:
         print(f"[Redbubble] Error during scrape: {e}")
         return []
 
 if __name__ == "__main__":
-    tags = scrape_redbubble_popular_tags()
+    tags = asyncio.run(scrape_redbubble_popular_tags())
     for i, t in enumerate(tags[:20]):
         print(f"{i+1}. {t}")
@@ -1,7 +1,7 @@
-import httpx
-import json
-import re
-from typing import List, Dict, Any
+import asyncio
+from typing import List
+from services.helpers.http_pool import http_pool
+from services.helpers.next_data import NextDataNotFound, fetch_next_data
 
 # Target regions for POD (Shopify/Etsy markets)
 TARGET_REGIONS = ["US", "GB", "DE", "AU", "CA"]
@@ -16,7 +16,15 @@ HEADERS = {
     "Referer": "https://ads.tiktok.com/",
 }
 
-def scrape_tiktok_hashtags(region: str = "US") -> List[str]:
+QUERIES_PATH = ("props", "pageProps", "dehydratedState", "queries")
+
+# The hashtag lists only move a few times a day
+CACHE_TTL = 3 * 3600
+
+# All regions are fetched at once
+http_pool.configure_host("ads.tiktok.com", headers=HEADERS, concurrency=len(TARGET_REGIONS), cache_ttl=CACHE_TTL)
+
+async def scrape_tiktok_hashtags(region: str = "US") -> List[str]:
     """
     Scrape trending hashtags from TikTok Creative Center for a specific region.
     Returns a list of hashtag strings (without #).
@@ -25,52 +33,41 @@ def scrape_tiktok_hashtags(region: str = "US") -> List[str]:
     print(f"[TikTok] Scraping trends for region: {region}...")
 
     try:
-        with httpx.Client(headers=HEADERS, timeout=30, follow_redirects=True) as client:
-            response = client.get(url)
-            response.raise_for_status()
-            html = response.text
+        # Only the dehydrated query list is parsed; the download stops once __NEXT_DATA__ closes
+        queries = await fetch_next_data(url, [QUERIES_PATH], timeout=30) or []
 
-            # Extract __NEXT_DATA__ JSON
-            match = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', html, re.DOTALL)
-            if not match:
-                print(f"[TikTok] Could not find __NEXT_DATA__ in HTML for {region}")
-                return []
-
-            data = json.loads(match.group(1))
-            
-            # Navigate the JSON structure to find the hashtag list
-            # Path: props -> pageProps -> dehydratedState -> queries -> state -> data -> pages -> list
-            hashtags = []
-            queries = data.get("props", {}).get("pageProps", {}).get("dehydratedState", {}).get("queries", [])
-            
-            for query in queries:
-                data_obj = query.get("state", {}).get("data", {})
-                if isinstance(data_obj, dict):
-                    # Check for keywords like 'list' or 'pages'
-                    pages = data_obj.get("pages", [])
-                    if pages and isinstance(pages, list):
-                        for page in pages:
-                            items = page.get("list", [])
-                            if items:
-                                for item in items:
-                                    name = item.get("hashtagName")
-                                    if name:
-                                        hashtags.append(name)
-            
-            print(f"[TikTok] Found {len(hashtags)} trending hashtags for {region}")
-            return hashtags
+        # Path below the queries: state -> data -> pages -> list -> hashtagName
+        hashtags = []
+        for query in queries:
+            data_obj = query.get("state", {}).get("data", {})
+            if isinstance(data_obj, dict):
+                # Check for keywords like 'list' or 'pages'
+                pages = data_obj.get("pages", [])
+                if pages and isinstance(pages, list):
+                    for page in pages:
+                        items = page.get("list", [])
+                        if items:
+                            for item in items:
+                                name = item.get("hashtagName")
+                                if name:
+                                    hashtags.append(name)
+        
+        print(f"[TikTok] Found {len(hashtags)} trending hashtags for {region}")
+        return hashtags
 
+    except NextDataNotFound:
+        print(f"[TikTok] Could not find __NEXT_DATA__ in HTML for {region}")
+        return []
     except Exception as e:
         print(f"[TikTok] Error scraping {region}: {e}")
         return []
 
-def get_all_tiktok_trends() -> List[str]:
+async def get_all_tiktok_trends() -> List[str]:
     """
-    Scrape TikTok trends across all target regions and return a unique list.
+    Scrape TikTok trends across all target regions concurrently and return a unique list.
     """
     all_hashtags = set()
-    for region in TARGET_REGIONS:
-        tags = scrape_tiktok_hashtags(region)
+    for tags in await asyncio.gather(*(scrape_tiktok_hashtags(region) for region in TARGET_REGIONS)):
         all_hashtags.update(tags)
     
     # Filter out 1-2 character tags or generic ones if necessary
@@ -80,6 +77,6 @@ def get_all_tiktok_trends() -> List[str]:
 
 if __name__ == "__main__":
     # Test script
-    results = get_all_tiktok_trends()
+    results = asyncio.run(get_all_tiktok_trends())
     for i, tag in enumerate(results[:20]):
         print(f"{i+1}. #{tag}")